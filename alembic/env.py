@@ -11,7 +11,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config, AsyncEngine
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.db.base import Base
-from app.db.models import user  # importa todos los modelos para metadata
+from app.db.models import user, revoked_token  # importa todos los modelos para metadata
 
 # Cargar variables de entorno desde .env
 load_dotenv()
@@ -0,0 +1,31 @@
+"""add binary apellidos index to users
+
+Revision ID: a2c7e4f19b30
+Revises: f3a6c2d8e917
+Create Date: 2026-10-18 19:48:03.611472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c7e4f19b30'
+down_revision: Union[str, Sequence[str], None] = 'f3a6c2d8e917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sólo PostgreSQL: en SQLite la comparación ya es binaria y alcanza ix_users_apellidos_id
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index('ix_users_apellidos_c', 'users', [sa.text('apellidos COLLATE "C"')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_users_apellidos_c', table_name='users')
@@ -0,0 +1,94 @@
+# app/core/admission.py
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+
+
+class AdmissionLimiter:
+    """Limita las operaciones concurrentes con una cola de espera acotada.
+
+    Si la cola está llena o se vence el tiempo de espera se responde 503 con
+    ``Retry-After`` en lugar de acumular trabajo que el worker no puede absorber.
+    No usa ``asyncio.Semaphore`` para no quedar atado a un event loop.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, timeout: float, retry_after: int = 1):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _overloaded(self) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, intenta de nuevo en unos segundos.",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._overloaded()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.timed_out += 1
+            raise self._overloaded()
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self.admitted += 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # Nos pasaron el lugar justo al abandonar: lo devolvemos
+            self.release()
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        # El lugar se transfiere al primer waiter vivo; in_flight no cambia
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
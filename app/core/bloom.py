@@ -0,0 +1,35 @@
+# app/core/bloom.py
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Filtro de Bloom: sin falsos negativos, falsos positivos acotados a ``fp_rate``."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un solo blake2b
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,124 @@
+# app/core/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """Cache LRU en memoria con vencimiento por entrada.
+
+    Acotado a ``maxsize`` entradas; con ``ttl <= 0`` queda deshabilitado.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (time.monotonic() + ttl, value)
+        while len(self._data) > self.maxsize:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        self._remove(key)
+        return entry[1]
+
+    def _remove(self, key: Hashable) -> None:
+        del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class PrincipalCache(TTLCache):
+    """Usuarios autenticados por email (``sub`` del token), invalidables por id o email."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._keys_by_id: dict[int, str] = {}
+        self.invalidations = 0
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        super().set(key, value, ttl)
+        if key in self._data:
+            self._keys_by_id[value.id] = key
+
+    def _remove(self, key: Hashable) -> None:
+        _, value = self._data.pop(key)
+        if self._keys_by_id.get(value.id) == key:
+            del self._keys_by_id[value.id]
+
+    def invalidate(self, user_id: int | None = None, email: str | None = None) -> None:
+        if user_id is not None and user_id in self._keys_by_id:
+            self._remove(self._keys_by_id[user_id])
+            self.invalidations += 1
+        if email is not None and self.pop(email.lower()) is not None:
+            self.invalidations += 1
+
+    def invalidate_many(self, user_ids) -> None:
+        for user_id in user_ids:
+            self.invalidate(user_id=user_id)
+
+    def clear(self) -> None:
+        super().clear()
+        self._keys_by_id.clear()
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), "invalidations": self.invalidations}
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
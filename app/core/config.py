@@ -5,14 +5,121 @@ from pydantic import Field
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Pool de conexiones (pool_* no aplica a SQLite)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    # en segundos
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_COMPILED_CACHE_SIZE: int = 500
+    # Cache de prepared statements de asyncpg
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Réplicas de sólo lectura (JSON: ["postgresql+asyncpg://...", ...]); vacío = todo al primario
+    DATABASE_READ_URLS: list[str] = []
+    # en segundos: réplica apartada tras un error de conexión, y lecturas
+    # al primario de un usuario (el sub del token) después de que escribió
+    DB_READ_EJECT_SECONDS: float = 30
+    DB_READ_STICKY_SECONDS: float = 5
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Firma de access tokens: HS256 con SECRET_KEY, o RS256/ES256 con las
+    # claves <kid>.pem de JWT_KEYS_DIR (publicadas en /.well-known/jwks.json)
+    JWT_ALGORITHM: str = "HS256"
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KID: str | None = None
+    # en segundos
+    JWKS_MAX_AGE: int = 300
+
+    # Refresh tokens y filtro de revocación
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_FP_RATE: float = 0.001
+    # en segundos
+    REVOCATION_REBUILD_SECONDS: float = 60
+    # Cache de tokens ya verificados (TTL máximo en segundos, 0 = deshabilitado)
+    TOKEN_CACHE_SIZE: int = 4096
+    TOKEN_CACHE_MAX_TTL: int = 3600
 
     MAX_ATTEMPTS: int = 3
     # en segundos
     LOCKOUT_TIME: int = 900 
     
+    # Esquemas de hashing: el primero se usa para hashear, el resto sólo
+    # para verificar (bcrypt, argon2id, scrypt). El costo de cada esquema es
+    # también el piso: los hashes por debajo se rehashean en el login.
+    PASSWORD_SCHEMES: list[str] = ["bcrypt"]
     BCRYPT_ROUNDS: int = Field(default=12)
+    ARGON2_TIME_COST: int = 3
+    # en KiB
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    # log2(N)
+    SCRYPT_ROUNDS: int = 16
+    SCRYPT_BLOCK_SIZE: int = 8
+    SCRYPT_PARALLELISM: int = 1
+    # Calibrar el costo del esquema principal al arrancar (en ms por hash).
+    # Cada pod calibra por su cuenta; el piso sigue siendo el costo configurado.
+    HASH_CALIBRATE: bool = False
+    HASH_TARGET_MS: int = 150
+    # Procesos del pool de hashing (None = cantidad de cores, 0 = threads)
+    HASH_WORKERS: int | None = None
+    # Control de admisión del hashing (None = tamaño del pool)
+    HASH_MAX_IN_FLIGHT: int | None = None
+    HASH_MAX_QUEUE: int = 32
+    # en segundos
+    HASH_QUEUE_TIMEOUT: float = 2.0
+    HASH_RETRY_AFTER: int = 1
+
+    # Exportación de usuarios: filas por lote serializado
+    EXPORT_BATCH_SIZE: int = 1000
+    # Importación masiva: filas validadas, chequeadas e insertadas por lote
+    IMPORT_BATCH_SIZE: int = 1000
+    # Altas/bajas/cambios masivos: filas por sentencia y commit
+    BULK_CHUNK_SIZE: int = 500
+
+    # Cache de usuarios autenticados (segundos, 0 = deshabilitado)
+    PRINCIPAL_CACHE_TTL: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
+    # Modo stateless: el usuario sale de los claims del token y sólo se
+    # valida token_version contra un mapa en memoria (en segundos)
+    AUTH_STATELESS: bool = False
+    TOKEN_VERSION_REFRESH_SECONDS: float = 5
+    TOKEN_VERSION_FULL_REFRESH_SECONDS: float = 60
+
+    # Escritura diferida de last_login: se agrupa y se escribe cada
+    # LOGIN_FLUSH_MS o al juntar LOGIN_FLUSH_MAX_ENTRIES usuarios
+    LOGIN_WRITE_BEHIND: bool = False
+    LOGIN_FLUSH_MS: int = 500
+    LOGIN_FLUSH_MAX_ENTRIES: int = 500
+    LOGIN_BUFFER_MAX: int = 10000
+
+    # Throttle de logins fallidos (ventana deslizante, en segundos; 0 = sin límite)
+    THROTTLE_ENABLED: bool = True
+    THROTTLE_WINDOW_SECONDS: int = 300
+    THROTTLE_EMAIL_LIMIT: int = 10
+    # El límite por IP (y el par email+IP) usa request.client.host. Detrás de
+    # un proxy esa es la IP del proxy, y el límite por IP bloquearía el login
+    # de todos: activarlo sólo si el servidor confía en X-Forwarded-For
+    # (uvicorn --proxy-headers --forwarded-allow-ips=<IPs del proxy>)
+    THROTTLE_IP_LIMIT: int = 0
+    THROTTLE_PAIR_LIMIT: int = 5
+    # "memory" (por proceso) o "redis" (compartido entre workers)
+    THROTTLE_BACKEND: str = "memory"
+    THROTTLE_REDIS_URL: str = "redis://localhost:6379/0"
+    THROTTLE_MAX_KEYS: int = 100000
+    # Respuestas de lectura de usuarios sin revalidar cada fila (orjson si está instalado)
+    FAST_JSON: bool = False
+    # Búsqueda de usuarios (índice en memoria por worker, ~0.7 GB por worker
+    # con 1M de usuarios: se activa a propósito)
+    SEARCH_INDEX_ENABLED: bool = False
+    # en segundos: cambios incrementales (por updated_at) y rebuild completo (bajas)
+    SEARCH_REFRESH_SECONDS: float = 5
+    SEARCH_FULL_REFRESH_SECONDS: float = 3600
+    SEARCH_MAX_WORDS: int = 12
+    SEARCH_MAX_CANDIDATES: int = 500
 
     @property
     def lockout_duration(self) -> timedelta:
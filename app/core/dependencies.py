@@ -3,8 +3,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import decode_access_token
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.core.token_versions import token_versions
 from app.db.models.user import User
-from app.schemas.token import TokenData
+from app.schemas.token import TokenData, TokenPrincipal
 from app.crud.user import get_user_by_email
 from app.db.session import get_session
 from app.schemas.user import UserRead
@@ -13,8 +16,10 @@ bearer_scheme = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    # Primario: lo que se lee acá queda en principal_cache, y una réplica
+    # atrasada podría volver a cachear un usuario recién borrado o su rol viejo
     db: AsyncSession = Depends(get_session)
-) -> UserRead: 
+) -> UserRead | TokenPrincipal:
     token = credentials.credentials
     payload = decode_access_token(token)
     if payload is None:
@@ -25,13 +30,21 @@ async def get_current_user(
         )
 
     email = payload.get("sub")
-    if email is None:
+    # Los refresh/reset tokens no sirven para autenticar requests
+    if email is None or payload.get("scope") is not None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No se pudieron validar las credenciales",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if settings.AUTH_STATELESS and payload.get("ver") is not None and payload.get("user_id") is not None:
+        return await _principal_from_claims(payload, db)
+
+    principal = principal_cache.get(email.lower())
+    if principal is not None:
+        return principal
+
     user = await get_user_by_email(db, email=email)
     if user is None:
         raise HTTPException(
@@ -41,4 +54,22 @@ async def get_current_user(
         )
 
     # Opcional: devolver User completo o solo TokenData, según necesites
-    return UserRead.model_validate(user) 
+    principal = UserRead.model_validate(user)
+    principal_cache.set(email.lower(), principal)
+    return principal
+
+async def _principal_from_claims(payload: dict, db: AsyncSession) -> TokenPrincipal:
+    # Sin consultas por request: el mapa de versiones se refresca en bloque
+    await token_versions.ensure_fresh(db)
+    if not token_versions.is_current(payload["user_id"], payload["ver"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revocado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return TokenPrincipal(id=payload["user_id"], email=payload["sub"], rol=payload["user_role"])
+
+async def get_current_admin(current_user: UserRead = Depends(get_current_user)) -> UserRead:
+    if current_user.rol.upper() != "ADMIN":
+        raise HTTPException(status_code=403, detail="Se requieren permisos de administrador")
+    return current_user
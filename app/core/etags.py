@@ -0,0 +1,42 @@
+# app/core/etags.py
+import hashlib
+from datetime import datetime
+
+
+def _digest(*parts) -> str:
+    return '"' + hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:24] + '"'
+
+
+def user_etag(user_id: int, updated_at: datetime, fields: str | None = None) -> str:
+    # fields entra en la cuenta: cada proyección es una representación distinta
+    return _digest(user_id, updated_at.isoformat(), fields or "")
+
+
+def list_etag(rows, query: str) -> str | None:
+    """ETag de una página: cantidad, updated_at máximo e ``(id, updated_at)`` de cada fila.
+
+    Devuelve None si alguna fila no trae ``version`` (la columna updated_at
+    que agregan las lecturas de ``app.crud.user``).
+    """
+    versions = [getattr(row, "version", None) for row in rows]
+    if None in versions:
+        return None
+    latest = max(versions).isoformat() if versions else ""
+    pairs = (f"{row.id}:{version.isoformat()}" for row, version in zip(rows, versions))
+    return _digest(query, len(rows), latest, *pairs)
+
+
+def etag_matches(header: str | None, etag: str, weak: bool = False) -> bool:
+    """``If-None-Match`` compara en forma débil (``weak=True``); ``If-Match``, fuerte."""
+    if not header:
+        return False
+    for candidate in (part.strip() for part in header.split(",")):
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,291 @@
+# app/core/hashing.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+
+from passlib.context import CryptContext
+
+from app.core.admission import AdmissionLimiter
+from app.core.config import settings
+
+# Nombre de configuración -> handler de passlib
+SCHEME_HANDLERS = {
+    "bcrypt": "bcrypt",
+    "argon2id": "argon2",
+    "scrypt": "scrypt",
+}
+
+# Setting que define el costo de cada esquema y rango válido para calibrar
+COST_SETTINGS = {
+    "bcrypt": "BCRYPT_ROUNDS",
+    "argon2id": "ARGON2_TIME_COST",
+    "scrypt": "SCRYPT_ROUNDS",
+}
+COST_LIMITS = {
+    "bcrypt": (4, 31),
+    "argon2id": (1, 50),
+    "scrypt": (10, 22),
+}
+
+# Costos calibrados en runtime; tienen prioridad sobre los settings
+_cost_overrides: dict[str, int] = {}
+_calibration: dict | None = None
+
+
+def get_cost(scheme: str) -> int:
+    return _cost_overrides.get(scheme, getattr(settings, COST_SETTINGS[scheme]))
+
+
+def _scheme_options(scheme: str, cost: int | None = None) -> dict:
+    # Sólo se marcan como desactualizados (needs_update) los hashes por debajo
+    # del piso: el costo configurado, o el calibrado si quedó más bajo. El
+    # máximo es el del esquema (passlib toma el default si no se indica), para
+    # que pods con distinta calibración no se rehasheen entre sí.
+    if scheme not in COST_SETTINGS:
+        raise ValueError(f"Esquema de hashing no soportado: {scheme}")
+    cost = cost if cost is not None else get_cost(scheme)
+    floor = min(cost, getattr(settings, COST_SETTINGS[scheme]))
+    ceiling = COST_LIMITS[scheme][1]
+    if scheme == "bcrypt":
+        return {"rounds": cost, "min_rounds": floor, "max_rounds": ceiling}
+    if scheme == "argon2id":
+        return {
+            "type": "ID",
+            "rounds": cost,
+            "min_rounds": floor,
+            "max_rounds": ceiling,
+            "memory_cost": settings.ARGON2_MEMORY_COST,
+            "parallelism": settings.ARGON2_PARALLELISM,
+        }
+    if scheme == "scrypt":
+        return {
+            "rounds": cost,
+            "min_rounds": floor,
+            "max_rounds": ceiling,
+            "block_size": settings.SCRYPT_BLOCK_SIZE,
+            "parallelism": settings.SCRYPT_PARALLELISM,
+        }
+
+
+def build_context(schemes: list[str] | None = None) -> CryptContext:
+    """Arma el CryptContext a partir de la configuración.
+
+    El primer esquema es el que se usa para hashear; el resto sólo se
+    acepta para verificar hashes viejos, que quedan marcados para rehash.
+    """
+    schemes = schemes or settings.PASSWORD_SCHEMES
+    options = {}
+    for scheme in schemes:
+        handler = SCHEME_HANDLERS.get(scheme)
+        if handler is None:
+            raise ValueError(f"Esquema de hashing no soportado: {scheme}")
+        for key, value in _scheme_options(scheme).items():
+            options[f"{handler}__{key}"] = value
+    return CryptContext(
+        schemes=[SCHEME_HANDLERS[s] for s in schemes],
+        deprecated="auto",
+        **options,
+    )
+
+
+pwd_context = build_context()
+
+
+def configure(costs: dict[str, int]) -> None:
+    """Aplica costos nuevos (p. ej. calibrados) y reconstruye el contexto."""
+    global pwd_context
+    _cost_overrides.update(costs)
+    pwd_context = build_context()
+
+
+def _measure_ms(scheme: str, cost: int, repeat: int = 2) -> float:
+    handler = SCHEME_HANDLERS[scheme]
+    options = {f"{handler}__{k}": v for k, v in _scheme_options(scheme, cost).items()}
+    context = CryptContext(schemes=[handler], **options)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        context.hash("calibration-password")
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def calibrate(scheme: str | None = None, target_ms: int | None = None, repeat: int = 2) -> dict:
+    """Busca el costo más alto del esquema que hashea dentro de ``target_ms`` en este hardware."""
+    scheme = scheme or settings.PASSWORD_SCHEMES[0]
+    target_ms = target_ms or settings.HASH_TARGET_MS
+    low, high = COST_LIMITS[scheme]
+    best_cost, best_ms = low, _measure_ms(scheme, low, repeat)
+    for cost in range(low + 1, high + 1):
+        elapsed = _measure_ms(scheme, cost, repeat)
+        if elapsed > target_ms:
+            break
+        best_cost, best_ms = cost, elapsed
+    return {
+        "scheme": scheme,
+        "cost": best_cost,
+        "measured_ms": round(best_ms, 1),
+        "target_ms": target_ms,
+    }
+
+
+# El hash de bcrypt bloquea ~250 ms; lo mandamos a un pool de procesos
+# para no frenar el event loop de uvicorn.
+_executor: Executor | None = None
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _hash_many(passwords: list[str]) -> list[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _init_worker(costs: dict[str, int]) -> None:
+    if costs:
+        configure(costs)
+
+
+def _warmup() -> int:
+    # Fuerza la carga del backend de bcrypt en el worker
+    pwd_context.hash("warmup")
+    return os.getpid()
+
+
+def pool_size() -> int:
+    if settings.HASH_WORKERS is not None:
+        return settings.HASH_WORKERS
+    return os.cpu_count() or 1
+
+
+def get_executor() -> Executor | None:
+    """Devuelve el pool de hashing, creándolo si hace falta.
+
+    Con ``HASH_WORKERS=0`` devuelve ``None`` y se usa el thread pool por
+    defecto del loop (útil en desarrollo).
+    """
+    global _executor
+    size = pool_size()
+    if size <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(dict(_cost_overrides),),
+        )
+    return _executor
+
+
+# Cuántos hashes puede tener en vuelo este worker antes de encolar/rechazar
+hash_limiter = AdmissionLimiter(
+    max_in_flight=settings.HASH_MAX_IN_FLIGHT or pool_size(),
+    max_queue=settings.HASH_MAX_QUEUE,
+    timeout=settings.HASH_QUEUE_TIMEOUT,
+    retry_after=settings.HASH_RETRY_AFTER,
+)
+
+
+async def _run(fn, *args):
+    async with hash_limiter.slot():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), fn, *args)
+
+
+async def hash_async(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def hash_many_async(passwords: list[str], chunk_size: int = 8) -> list[str]:
+    """Hashea en lotes de ``chunk_size`` por tarea del pool.
+
+    Como mucho una tarea por worker a la vez, para que una importación no
+    llene la cola de admisión y los logins sigan entrando por orden de llegada.
+    """
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+    concurrency = asyncio.Semaphore(max(1, pool_size()))
+
+    async def run_chunk(chunk: list[str]) -> list[str]:
+        async with concurrency:
+            return await _run(_hash_many, chunk)
+
+    results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
+
+
+async def verify_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run(_verify, plain_password, hashed_password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verifica y, si el hash quedó viejo, devuelve uno nuevo con la configuración actual."""
+    return await _run(_verify_and_update, plain_password, hashed_password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+async def calibrate_and_apply() -> dict:
+    """Calibra el esquema principal y aplica el costo al contexto y al pool.
+
+    Los hashes existentes siguen validando; sólo los que quedan por debajo
+    del costo configurado se rehashean en el próximo login.
+    """
+    global _calibration
+    result = await asyncio.to_thread(calibrate)
+    configure({result["scheme"]: result["cost"]})
+    result["calibrated_at"] = datetime.utcnow().isoformat()
+    _calibration = result
+    # Los workers ya creados tienen el costo viejo
+    shutdown_hash_pool()
+    logging.info(
+        f"[HASHING] Calibración: {result['scheme']} costo {result['cost']} "
+        f"({result['measured_ms']} ms, objetivo {result['target_ms']} ms)."
+    )
+    return result
+
+
+def hashing_metrics() -> dict:
+    return {
+        "schemes": settings.PASSWORD_SCHEMES,
+        "costs": {scheme: get_cost(scheme) for scheme in settings.PASSWORD_SCHEMES},
+        "pool_workers": pool_size(),
+        "calibration": _calibration,
+    }
+
+
+async def start_hash_pool() -> None:
+    executor = get_executor()
+    if executor is None:
+        logging.info("[HASHING] Pool deshabilitado (HASH_WORKERS=0), se usan threads.")
+        return
+    loop = asyncio.get_running_loop()
+    size = pool_size()
+    pids = await asyncio.gather(*(loop.run_in_executor(executor, _warmup) for _ in range(size)))
+    logging.info(f"[HASHING] Pool de hashing listo con {len(set(pids))} procesos.")
+
+
+def shutdown_hash_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,96 @@
+# app/core/keys.py
+import logging
+import time
+from pathlib import Path
+
+from jose import jwk
+from jose.backends.base import Key
+
+from app.core.config import settings
+
+# python-jose no soporta EdDSA: para firma asimétrica usamos RSA o EC
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"}
+
+# Mínimo entre relecturas del directorio al aparecer un kid desconocido
+_RELOAD_INTERVAL = 30
+
+
+def is_asymmetric() -> bool:
+    return settings.JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS
+
+
+class KeyStore:
+    """Claves privadas ``<kid>.pem`` de ``JWT_KEYS_DIR``, parseadas una sola vez.
+
+    Firma con ``JWT_ACTIVE_KID`` (o el último kid en orden alfabético) y
+    verifica con cualquier kid del directorio, así se puede rotar dejando
+    la clave vieja hasta que venzan sus tokens.
+    """
+
+    def __init__(self):
+        self._private: dict[str, Key] = {}
+        self._public: dict[str, Key] = {}
+        self._loaded_at: float | None = None
+
+    def reload(self) -> None:
+        if not settings.JWT_KEYS_DIR:
+            raise RuntimeError(f"JWT_KEYS_DIR es obligatorio con JWT_ALGORITHM={settings.JWT_ALGORITHM}")
+        private: dict[str, Key] = {}
+        public: dict[str, Key] = {}
+        for path in sorted(Path(settings.JWT_KEYS_DIR).glob("*.pem")):
+            key = jwk.construct(path.read_text(), settings.JWT_ALGORITHM)
+            private[path.stem] = key
+            public[path.stem] = key.public_key()
+        if not private:
+            raise RuntimeError(f"No hay claves .pem en {settings.JWT_KEYS_DIR}")
+        self._private = private
+        self._public = public
+        self._loaded_at = time.monotonic()
+        logging.info(f"[JWT] Claves cargadas: {', '.join(private)} (activa: {self.active_kid}).")
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded_at is None:
+            self.reload()
+
+    @property
+    def active_kid(self) -> str:
+        if settings.JWT_ACTIVE_KID:
+            return settings.JWT_ACTIVE_KID
+        return sorted(self._private)[-1]
+
+    def signing_key(self) -> tuple[str, Key]:
+        self._ensure_loaded()
+        kid = self.active_kid
+        if kid not in self._private:
+            raise RuntimeError(f"No existe la clave activa {kid} en {settings.JWT_KEYS_DIR}")
+        return kid, self._private[kid]
+
+    def verification_key(self, kid: str | None) -> Key | None:
+        self._ensure_loaded()
+        if kid is None:
+            return None
+        key = self._public.get(kid)
+        if key is None and self._loaded_at is not None and time.monotonic() - self._loaded_at >= _RELOAD_INTERVAL:
+            # Puede ser una clave nueva rotada en otro nodo
+            self.reload()
+            key = self._public.get(kid)
+        return key
+
+    def jwks(self) -> dict:
+        if not is_asymmetric():
+            return {"keys": []}
+        self._ensure_loaded()
+        keys = []
+        for kid, key in self._public.items():
+            data = key.to_dict()
+            data.update({"kid": kid, "use": "sig", "alg": settings.JWT_ALGORITHM})
+            keys.append(data)
+        return {"keys": keys}
+
+    def clear(self) -> None:
+        self._private.clear()
+        self._public.clear()
+        self._loaded_at = None
+
+
+key_store = KeyStore()
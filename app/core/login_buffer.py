@@ -0,0 +1,170 @@
+# app/core/login_buffer.py
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models.user import User
+
+
+class LoginWriteBehind:
+    """Acumula ``last_login`` de logins exitosos y los escribe en bloque.
+
+    Sólo entran usuarios sin intentos fallidos pendientes: para ellos el
+    login no cambia nada más que ``last_login``. Cada flush es un único
+    UPDATE con CASE por id. La espera está acotada a ``max_pending``
+    usuarios; si se llena, ``record`` devuelve False y el login escribe
+    como siempre.
+    """
+
+    def __init__(self, flush_interval: float, max_entries: int, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.max_pending = max_pending
+        self._pending: dict[int, datetime] = {}
+        self._oldest: float | None = None
+        self._session_maker: async_sessionmaker | None = None
+        self._task: asyncio.Task | None = None
+        # El loop sólo guarda referencias débiles a las tareas: sin esta, el
+        # flush por tamaño podría recolectarse antes de terminar
+        self._flush_task: asyncio.Task | None = None
+        self._flushing = False
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.last_flush_size = 0
+        self.max_flush_size = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.overflow = 0
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def record(self, user_id: int, logged_at: datetime) -> bool:
+        if user_id not in self._pending and len(self._pending) >= self.max_pending:
+            self.overflow += 1
+            return False
+        previous = self._pending.get(user_id)
+        if previous is None or logged_at > previous:
+            self._pending[user_id] = logged_at
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if (
+            len(self._pending) >= self.max_entries and self.running and not self._flushing
+            and self._flush_task is None
+        ):
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_with_new_session())
+            self._flush_task.add_done_callback(self._flush_done)
+        return True
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flush_task = None
+
+    def discard(self, user_id: int) -> None:
+        # El login se escribió directo; el valor en espera ya no sirve
+        self._pending.pop(user_id, None)
+
+    async def flush(self, db: AsyncSession) -> int:
+        if not self._pending:
+            return 0
+        pending, oldest = self._pending, self._oldest
+        self._pending, self._oldest = {}, None
+        self._flushing = True
+        new_login = case(pending, value=User.id)
+        try:
+            await db.execute(
+                update(User)
+                .where(User.id.in_(list(pending)))
+                # Nunca retroceder: otro worker pudo escribir un login posterior
+                .where(or_(User.last_login.is_(None), User.last_login < new_login))
+                .values(last_login=new_login)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            self.errors += 1
+            self._requeue(pending, oldest)
+            raise
+        finally:
+            self._flushing = False
+
+        lag_ms = (time.monotonic() - oldest) * 1000 if oldest is not None else 0.0
+        self.flushes += 1
+        self.rows_flushed += len(pending)
+        self.last_flush_size = len(pending)
+        self.max_flush_size = max(self.max_flush_size, len(pending))
+        self.last_lag_ms = round(lag_ms, 1)
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+        return len(pending)
+
+    def _requeue(self, pending: dict[int, datetime], oldest: float | None) -> None:
+        for user_id, logged_at in pending.items():
+            current = self._pending.get(user_id)
+            if current is None or logged_at > current:
+                self._pending[user_id] = logged_at
+        if oldest is not None and (self._oldest is None or oldest < self._oldest):
+            self._oldest = oldest
+
+    async def _flush_with_new_session(self) -> None:
+        try:
+            async with self._session_maker() as db:
+                await self.flush(db)
+        except Exception as e:
+            logging.error(f"[LOGIN] No se pudo escribir el lote de last_login: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_with_new_session()
+
+    def start(self, session_maker: async_sessionmaker) -> None:
+        self._session_maker = session_maker
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if self._session_maker is not None:
+            await self._flush_with_new_session()
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._oldest = None
+
+    def metrics(self) -> dict:
+        pending_age = (time.monotonic() - self._oldest) * 1000 if self._oldest is not None else 0.0
+        return {
+            "enabled": settings.LOGIN_WRITE_BEHIND,
+            "pending": len(self._pending),
+            "pending_age_ms": round(pending_age, 1),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "last_flush_size": self.last_flush_size,
+            "max_flush_size": self.max_flush_size,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+            "overflow": self.overflow,
+            "errors": self.errors,
+        }
+
+
+login_buffer = LoginWriteBehind(
+    flush_interval=settings.LOGIN_FLUSH_MS / 1000,
+    max_entries=settings.LOGIN_FLUSH_MAX_ENTRIES,
+    max_pending=settings.LOGIN_BUFFER_MAX,
+)
@@ -0,0 +1,124 @@
+# app/core/revocation.py
+import calendar
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.db.models.revoked_token import RevokedToken
+
+
+class RevocationList:
+    """Revocación de refresh tokens con un filtro de Bloom delante de la tabla.
+
+    El camino normal (token no revocado) se resuelve en memoria; sólo un
+    positivo del filtro se confirma contra ``revoked_tokens``. El filtro se
+    reconstruye desde la tabla cada ``rebuild_interval`` para ver las
+    revocaciones hechas por otros workers.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float, rebuild_interval: float):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.rebuild_interval = rebuild_interval
+        self._filter = BloomFilter(capacity, fp_rate)
+        self._built_at: float | None = None
+        self.checks = 0
+        self.filter_hits = 0
+        self.confirmed = 0
+        self.rebuilds = 0
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        result = await db.execute(
+            select(RevokedToken.key).where(RevokedToken.expires_at > datetime.utcnow())
+        )
+        keys = result.scalars().all()
+        bloom = BloomFilter(max(self.capacity, 2 * len(keys)), self.fp_rate)
+        for key in keys:
+            bloom.add(key)
+        self._filter = bloom
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+
+    async def _ensure_fresh(self, db: AsyncSession) -> None:
+        if self._built_at is None or time.monotonic() - self._built_at >= self.rebuild_interval:
+            await self.rebuild(db)
+
+    async def is_revoked(self, db: AsyncSession, jti: str, user_id: int, issued_at: float) -> bool:
+        await self._ensure_fresh(db)
+        self.checks += 1
+        jti_key, user_key = f"jti:{jti}", f"user:{user_id}"
+        jti_hit, user_hit = jti_key in self._filter, user_key in self._filter
+        if not jti_hit and not user_hit:
+            return False
+
+        self.filter_hits += 1
+        if jti_hit:
+            found = await db.execute(select(RevokedToken.id).where(RevokedToken.key == jti_key).limit(1))
+            if found.first() is not None:
+                self.confirmed += 1
+                return True
+        if user_hit:
+            revoked_at = await db.scalar(
+                select(func.max(RevokedToken.revoked_at)).where(RevokedToken.key == user_key)
+            )
+            # iat tiene resolución de segundos
+            if revoked_at is not None and issued_at < calendar.timegm(revoked_at.utctimetuple()):
+                self.confirmed += 1
+                return True
+        return False
+
+    async def _add(self, db: AsyncSession, key: str, user_id: int, expires_at: datetime) -> None:
+        db.add(RevokedToken(key=key, user_id=user_id, revoked_at=datetime.utcnow(), expires_at=expires_at))
+        await db.commit()
+        self._filter.add(key)
+
+    async def revoke_token(self, db: AsyncSession, jti: str, user_id: int, expires_at: datetime) -> None:
+        await self._add(db, f"jti:{jti}", user_id, expires_at)
+
+    async def revoke_user(self, db: AsyncSession, user_id: int) -> None:
+        await self.revoke_users(db, [user_id])
+
+    async def revoke_users(self, db: AsyncSession, user_ids: list[int], commit: bool = True) -> None:
+        # Todos los refresh tokens emitidos hasta ahora; vencen como mucho en REFRESH_TOKEN_EXPIRE_DAYS.
+        # Con commit=False las filas viajan en la transacción de quien llama; marcar el
+        # filtro antes es inofensivo porque cada positivo se confirma contra la tabla.
+        if not user_ids:
+            return
+        now = datetime.utcnow()
+        expires_at = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        db.add_all([
+            RevokedToken(key=f"user:{user_id}", user_id=user_id, revoked_at=now, expires_at=expires_at)
+            for user_id in user_ids
+        ])
+        if commit:
+            await db.commit()
+        for user_id in user_ids:
+            self._filter.add(f"user:{user_id}")
+
+    def clear(self) -> None:
+        self._filter = BloomFilter(self.capacity, self.fp_rate)
+        self._built_at = None
+
+    def metrics(self) -> dict:
+        return {
+            "entries": len(self._filter),
+            "bits": self._filter.size,
+            "hashes": self._filter.hashes,
+            "fp_rate": self.fp_rate,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "confirmed": self.confirmed,
+            "unconfirmed_hits": self.filter_hits - self.confirmed,
+            "rebuilds": self.rebuilds,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    fp_rate=settings.REVOCATION_FILTER_FP_RATE,
+    rebuild_interval=settings.REVOCATION_REBUILD_SECONDS,
+)
@@ -0,0 +1,402 @@
+# app/core/search.py
+import asyncio
+import logging
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from heapq import heappush, heappushpop, merge
+from itertools import islice
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models.user import User
+
+# Palabras distintas que se miran por término: acota el costo de un prefijo corto
+MAX_EXPANSIONS = 256
+# Palabras nuevas que se acumulan aparte antes de mezclarlas con el vocabulario
+RECENT_WORDS_MAX = 4096
+# Hasta cuántas palabras de un término se filtra intersecando sus postings
+NARROW_WORDS = 8
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+# Margen al pedir cambios incrementales, como en token_versions
+_OVERLAP = timedelta(seconds=2)
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin tildes: "Núñez" -> "nunez"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def words(text: str) -> list[str]:
+    return _WORD.findall(fold(text))
+
+
+def _upper_bound(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# Un posting es un id suelto mientras la palabra es de un solo usuario (DNI,
+# email): un set vacío ya ocupa más de 200 bytes.
+Posting = int | set[int]
+
+
+def _size(posting: Posting | None) -> int:
+    if posting is None:
+        return 0
+    return 1 if isinstance(posting, int) else len(posting)
+
+
+def _ids(posting: Posting | None):
+    if posting is None:
+        return ()
+    return (posting,) if isinstance(posting, int) else posting
+
+
+def _intersect(ids, terms: list[list[Posting]]) -> list[int]:
+    # Se queda con los ids que tienen alguna palabra de cada término
+    remaining = set(ids)
+    for postings in terms:
+        keep: set[int] = set()
+        for posting in postings:
+            if isinstance(posting, int):
+                if posting in remaining:
+                    keep.add(posting)
+            else:
+                keep |= remaining & posting
+        remaining = keep
+        if not remaining:
+            break
+    return sorted(remaining)
+
+
+class UserSearchIndex:
+    """Índice invertido en memoria: palabra -> usuarios, con búsqueda por prefijo.
+
+    Cada usuario aporta las palabras (sin tildes) de ``apellidos``,
+    ``nombres``, ``dni`` y la parte local del ``email``, hasta
+    ``max_words``: la memoria por usuario queda acotada. Los prefijos se
+    resuelven con bisect sobre el vocabulario ordenado; el término más
+    selectivo aporta candidatos de la mejor palabra a la peor (como mucho
+    ``max_candidates``), que se verifican contra el resto de los términos
+    hasta que ningún candidato que falta pueda mejorar los resultados.
+
+    Es por proceso: lo construye el arranque leyendo la tabla y lo
+    mantienen las altas, cambios y bajas hechas en este worker. Lo que
+    cambie otro worker (o la importación por CLI) entra con el refresco
+    incremental cada ``refresh_interval``; sus bajas, con el rebuild
+    completo cada ``full_refresh_interval``. Deshabilitado
+    (``enabled=False``) no guarda nada.
+    """
+
+    def __init__(self, max_words: int, max_candidates: int, refresh_interval: float = 5.0,
+                 full_refresh_interval: float = 3600.0, enabled: bool = True):
+        self.max_words = max_words
+        self.max_candidates = max_candidates
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.enabled = enabled
+        self._postings: dict[str, Posting] = {}
+        self._docs: dict[int, tuple[str, ...]] = {}
+        # Vocabulario ordenado más las palabras nuevas desde la última mezcla.
+        # Puede tener palabras que ya no tienen usuarios hasta el próximo rebuild.
+        self._vocabulary: list[str] = []
+        self._recent: list[str] = []
+        # Cambios que llegan durante un rebuild, para aplicarlos al índice nuevo
+        self._replay: list[tuple[int, tuple[str, ...] | None]] | None = None
+        self._task: asyncio.Task | None = None
+        # updated_at más alto leído, y cuándo fue el último rebuild
+        self._watermark: datetime | None = None
+        self._built_at = 0.0
+        self.ready = False
+        self.queries = 0
+        self.truncated = 0
+        self.last_query_us = 0.0
+        self.max_query_us = 0.0
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.last_build_ms = 0.0
+
+    def _document(self, nombres: str, apellidos: str, dni: str, email: str) -> tuple[str, ...]:
+        # Sin repetidos y en orden de importancia: el recorte deja afuera el email primero
+        local = email.split("@", 1)[0]
+        doc = dict.fromkeys(words(apellidos) + words(nombres) + words(dni) + words(local))
+        return tuple(islice(doc, self.max_words))
+
+    @staticmethod
+    def _put(postings: dict[str, Posting], docs: dict[int, tuple[str, ...]], user_id: int,
+             doc: tuple[str, ...] | None) -> list[str]:
+        """Reemplaza el documento de ``user_id``; devuelve las palabras nuevas del vocabulario."""
+        old = docs.pop(user_id, None)
+        for word in old or ():
+            posting = postings.get(word)
+            if posting == user_id:
+                del postings[word]
+            elif isinstance(posting, set):
+                posting.discard(user_id)
+                if len(posting) == 1:
+                    postings[word] = next(iter(posting))
+        if doc is None:
+            return []
+        docs[user_id] = doc
+        new_words = []
+        for word in doc:
+            posting = postings.get(word)
+            if posting is None:
+                postings[word] = user_id
+                new_words.append(word)
+            elif isinstance(posting, int):
+                if posting != user_id:
+                    postings[word] = {posting, user_id}
+            else:
+                posting.add(user_id)
+        return new_words
+
+    def _apply(self, user_id: int, doc: tuple[str, ...] | None) -> None:
+        if not self.enabled:
+            return
+        for word in self._put(self._postings, self._docs, user_id, doc):
+            i = bisect_left(self._recent, word)
+            if i == len(self._recent) or self._recent[i] != word:
+                self._recent.insert(i, word)
+        if len(self._recent) > RECENT_WORDS_MAX:
+            self._vocabulary = list(dict.fromkeys(merge(self._vocabulary, self._recent)))
+            self._recent = []
+        if self._replay is not None:
+            self._replay.append((user_id, doc))
+
+    def upsert(self, user_id: int, nombres: str, apellidos: str, dni: str, email: str) -> None:
+        self._apply(user_id, self._document(nombres, apellidos, dni, email))
+
+    def upsert_user(self, user: User) -> None:
+        self.upsert(user.id, user.nombres, user.apellidos, user.dni, user.email)
+
+    def remove(self, user_id: int) -> None:
+        self._apply(user_id, None)
+
+    def remove_many(self, user_ids: list[int]) -> None:
+        for user_id in user_ids:
+            self.remove(user_id)
+
+    async def refresh(self, db: AsyncSession, condition) -> None:
+        # Para los caminos masivos, que no tienen las filas a mano
+        result = await db.execute(
+            select(User.id, User.nombres, User.apellidos, User.dni, User.email).where(condition)
+        )
+        for row in result:
+            self.upsert(*row)
+
+    async def refresh_changes(self, db: AsyncSession) -> None:
+        """Aplica las filas con ``updated_at`` desde el último visto, las escriba quien las escriba."""
+        stmt = select(User.id, User.nombres, User.apellidos, User.dni, User.email, User.updated_at)
+        if self._watermark is not None:
+            stmt = stmt.where(User.updated_at >= self._watermark - _OVERLAP)
+        result = await db.execute(stmt)
+        for user_id, nombres, apellidos, dni, email, updated_at in result:
+            self.upsert(user_id, nombres, apellidos, dni, email)
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+        self.refreshes += 1
+
+    def _expand(self, term: str) -> list[str]:
+        """Palabras con prefijo ``term``: la exacta primero, después las más cortas."""
+        found = []
+        for vocabulary in (self._vocabulary, self._recent):
+            lo = bisect_left(vocabulary, term)
+            hi = bisect_left(vocabulary, _upper_bound(term), lo)
+            found.extend(word for word in vocabulary[lo:min(hi, lo + MAX_EXPANSIONS)] if word in self._postings)
+        if len(found) >= MAX_EXPANSIONS:
+            self.truncated += 1
+        # Una palabra que volvió a usarse puede estar en las dos listas
+        found = list(dict.fromkeys(found))
+        found.sort(key=lambda word: (word != term, len(word), word))
+        return found
+
+    @staticmethod
+    def _score(terms: list[str], doc: tuple[str, ...]) -> float | None:
+        score = 0.0
+        for term in terms:
+            best = 0.0
+            for position, word in enumerate(doc):
+                if word.startswith(term):
+                    # Palabra exacta > prefijo largo > prefijo corto; apellidos primero
+                    value = (2.0 if word == term else len(term) / len(word)) - position * 0.01
+                    best = max(best, value)
+            if best <= 0:
+                return None
+            score += best
+        return score
+
+    def search(self, query: str, limit: int = 20) -> list[tuple[int, float]]:
+        """Devuelve ``(user_id, puntaje)`` de mayor a menor puntaje."""
+        start = time.perf_counter()
+        terms = list(dict.fromkeys(term for term in words(query) if len(term) >= 2))
+        hits: list[tuple[int, float]] = []
+        if terms:
+            # Los candidatos salen del término con menos usuarios; los demás se verifican
+            expansions = {term: self._expand(term) for term in terms}
+            primary = min(terms, key=lambda t: sum(_size(self._postings.get(w)) for w in expansions[t]))
+            # Lo más que pueden sumar los otros términos: con eso se corta en cuanto
+            # ninguna palabra que falta mirar puede entrar entre los `limit` mejores
+            # La posición dentro del documento sólo desempata: no frena el corte
+            rest = 2.0 * (len(terms) - 1) - 0.01 * self.max_words * len(terms)
+            # Filtros en C para los otros términos: con pocas palabras, intersección
+            # de postings; si no, palabras del documento contra el set de palabras
+            narrow, others = [], []
+            for term in terms:
+                if term == primary or len(expansions[term]) >= MAX_EXPANSIONS:
+                    continue
+                if len(expansions[term]) <= NARROW_WORDS:
+                    narrow.append([self._postings[w] for w in expansions[term]])
+                else:
+                    others.append(set(expansions[term]))
+            top: list[float] = []
+            seen: set[int] = set()
+            for word in expansions[primary]:
+                bound = (2.0 if word == primary else len(primary) / len(word)) + rest
+                if len(top) >= limit and top[0] >= bound:
+                    break
+                ids = _ids(self._postings.get(word))
+                if narrow:
+                    ids = _intersect(ids, narrow)
+                for user_id in ids:
+                    if user_id in seen:
+                        continue
+                    if len(seen) >= self.max_candidates or (len(top) >= limit and top[0] >= bound):
+                        break
+                    seen.add(user_id)
+                    doc = self._docs[user_id]
+                    if any(other.isdisjoint(doc) for other in others):
+                        continue
+                    score = self._score(terms, doc)
+                    if score is not None:
+                        hits.append((user_id, score))
+                        if len(top) < limit:
+                            heappush(top, score)
+                        else:
+                            heappushpop(top, score)
+                if len(seen) >= self.max_candidates:
+                    self.truncated += 1
+                    break
+            hits.sort(key=lambda hit: (-hit[1], hit[0]))
+
+        elapsed_us = (time.perf_counter() - start) * 1_000_000
+        self.queries += 1
+        self.last_query_us = round(elapsed_us, 1)
+        self.max_query_us = max(self.max_query_us, self.last_query_us)
+        return hits[:limit]
+
+    async def rebuild(self, db: AsyncSession, batch_size: int = 5000) -> None:
+        """Rearma el índice leyendo la tabla por lotes; las búsquedas siguen mientras tanto."""
+        start = time.perf_counter()
+        postings: dict[str, Posting] = {}
+        docs: dict[int, tuple[str, ...]] = {}
+        self._replay = []
+        try:
+            # Lo escrito mientras se lee la tabla queda por encima y lo trae el próximo refresco
+            watermark = await db.scalar(select(func.max(User.updated_at)))
+            stmt = (
+                select(User.id, User.nombres, User.apellidos, User.dni, User.email)
+                .order_by(User.id)
+                .execution_options(yield_per=batch_size)
+            )
+            result = await db.stream(stmt)
+            async for rows in result.partitions(batch_size):
+                self._fill(postings, docs, rows)
+            vocabulary = await asyncio.to_thread(sorted, postings)
+            # Lo que cambió mientras se leía la tabla pisa lo leído
+            recent: set[str] = set()
+            for user_id, doc in self._replay:
+                recent.update(self._put(postings, docs, user_id, doc))
+        finally:
+            self._replay = None
+        self._swap(postings, docs, vocabulary, sorted(recent))
+        self._watermark = watermark
+        self.last_build_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def load(self, rows) -> None:
+        """Arma el índice de una vez desde filas ``(id, nombres, apellidos, dni, email)``."""
+        postings: dict[str, Posting] = {}
+        docs: dict[int, tuple[str, ...]] = {}
+        self._fill(postings, docs, rows)
+        self._swap(postings, docs, sorted(postings), [])
+
+    def _fill(self, postings: dict[str, Posting], docs: dict[int, tuple[str, ...]], rows) -> None:
+        for user_id, nombres, apellidos, dni, email in rows:
+            self._put(postings, docs, user_id, self._document(nombres, apellidos, dni, email))
+
+    def _swap(self, postings: dict[str, Posting], docs: dict[int, tuple[str, ...]],
+              vocabulary: list[str], recent: list[str]) -> None:
+        self._postings, self._docs = postings, docs
+        self._vocabulary, self._recent = vocabulary, recent
+        self.ready = True
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+
+    async def _refresh_once(self, session_maker: async_sessionmaker) -> None:
+        async with session_maker() as db:
+            if not self.ready or time.monotonic() - self._built_at >= self.full_refresh_interval:
+                await self.rebuild(db)
+                logging.info(f"[BUSQUEDA] Índice armado con {len(self._docs)} usuarios en {self.last_build_ms} ms.")
+            else:
+                await self.refresh_changes(db)
+
+    async def _run(self, session_maker: async_sessionmaker) -> None:
+        while True:
+            try:
+                await self._refresh_once(session_maker)
+            except Exception as e:
+                logging.error(f"[BUSQUEDA] No se pudo actualizar el índice: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self, session_maker: async_sessionmaker) -> None:
+        # En segundo plano: con muchos usuarios el arranque no espera al índice
+        if self._task is None and self.enabled:
+            self._task = asyncio.get_running_loop().create_task(self._run(session_maker))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._docs.clear()
+        self._vocabulary, self._recent = [], []
+        self._replay = None
+        self._watermark = None
+        self.ready = False
+
+    def metrics(self) -> dict:
+        return {
+            "ready": self.ready,
+            "users": len(self._docs),
+            "words": len(self._postings),
+            "vocabulary": len(self._vocabulary) + len(self._recent),
+            "queries": self.queries,
+            "truncated": self.truncated,
+            "last_query_us": self.last_query_us,
+            "max_query_us": self.max_query_us,
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "last_build_ms": self.last_build_ms,
+        }
+
+
+user_search = UserSearchIndex(
+    max_words=settings.SEARCH_MAX_WORDS,
+    max_candidates=settings.SEARCH_MAX_CANDIDATES,
+    refresh_interval=settings.SEARCH_REFRESH_SECONDS,
+    full_refresh_interval=settings.SEARCH_FULL_REFRESH_SECONDS,
+    enabled=settings.SEARCH_INDEX_ENABLED,
+)
@@ -1,10 +1,15 @@
 # core/security.py
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
+import hashlib
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 from app.core.config import settings
+from app.core.hashing import pwd_context, verify_password, get_password_hash
+from app.core.cache import TTLCache
+from app.core.keys import key_store, is_asymmetric
 
 load_dotenv()
 
@@ -12,27 +17,58 @@ SECRET_KEY = os.getenv("SECRET_KEY", "valor_por_defecto_inseguro")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=settings.BCRYPT_ROUNDS
-)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Payloads ya verificados, por digest del token, hasta su exp
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_MAX_TTL)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
+    if is_asymmetric():
+        kid, key = key_store.signing_key()
+        return jwt.encode(to_encode, key, algorithm=settings.JWT_ALGORITHM, headers={"kid": kid})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_access_token(token: str):
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    try:
+        if is_asymmetric():
+            verify_key = key_store.verification_key(jwt.get_unverified_header(token).get("kid"))
+            if verify_key is None:
+                return None
+            payload = jwt.decode(token, verify_key, algorithms=[settings.JWT_ALGORITHM])
+        else:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(cache_key, dict(payload), ttl=exp - time.time())
+    return payload
+
+def create_refresh_token(data: dict) -> str:
+    # Siempre HS256 con SECRET_KEY, como los de reset: sólo este servicio los lee,
+    # y con la clave publicada en el JWKS otro servicio los aceptaría como access tokens
+    to_encode = data.copy()
+    to_encode.update({
+        "scope": "refresh",
+        "jti": uuid.uuid4().hex,
+        "iat": int(time.time()),
+        "exp": datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    })
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_refresh_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
+    if payload.get("scope") != "refresh":
+        return None
+    return payload
 
 def create_password_reset_token(email: str, expires_minutes: int = 30):
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
@@ -51,6 +87,3 @@ def verify_password_reset_token(token: str):
         return payload.get("sub")
     except JWTError:
         return None
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
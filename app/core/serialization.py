@@ -0,0 +1,49 @@
+# app/core/serialization.py
+import json
+from datetime import date
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy import Row
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la stdlib
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"No se puede serializar {type(value).__name__}")
+
+
+def _plain(item) -> dict:
+    if isinstance(item, Row):
+        data = item._asdict()
+        # Columnas auxiliares del cursor y del ETag (ver app.crud.user)
+        data.pop("sort_key", None)
+        data.pop("version", None)
+        return data
+    if isinstance(item, BaseModel):
+        return item.model_dump(exclude_unset=True)
+    return dict(item)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def rows_response(content, headers: dict | None = None) -> Response:
+    """Respuesta JSON directa para filas ya validadas al escribirse.
+
+    Se salta el ``response_model``: no hay ``from_attributes`` ni
+    ``EmailStr`` por fila, y el encoder es orjson si está instalado.
+    """
+    if isinstance(content, list):
+        body = dumps([_plain(item) for item in content])
+    else:
+        body = dumps(_plain(content))
+    return Response(content=body, media_type="application/json", headers=headers)
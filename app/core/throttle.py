@@ -0,0 +1,209 @@
+# app/core/throttle.py
+import math
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+class ThrottleBackend(Protocol):
+    """Contadores de ventana deslizante compartibles entre workers."""
+
+    async def estimate(self, key: str, window: float) -> tuple[float, float]:
+        """Devuelve ``(cantidad estimada en la ventana, segundos hasta que rota)``."""
+        ...
+
+    async def hit(self, key: str, window: float) -> None: ...
+
+    async def reset(self, key: str, window: float) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+def _weighted(previous: int, current: int, elapsed: float, window: float) -> float:
+    # Aproximación de ventana deslizante con dos ventanas fijas: la anterior
+    # pesa según cuánto de ella todavía cae dentro de los últimos `window` segundos
+    return previous * (1 - elapsed / window) + current
+
+
+class MemoryThrottleBackend:
+    """Backend en proceso, acotado a ``max_keys`` claves.
+
+    Cada clave guarda sólo dos contadores (ventana actual y anterior). Las
+    claves sin actividad en dos ventanas se descartan al pasar por ellas y,
+    si se llega al máximo, se desaloja la usada hace más tiempo.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> (inicio de la ventana actual, anterior, actual)
+        self._counters: OrderedDict[str, tuple[float, int, int]] = OrderedDict()
+        self.evictions = 0
+
+    def _roll(self, key: str, window: float, now: float) -> tuple[float, int, int] | None:
+        entry = self._counters.get(key)
+        if entry is None:
+            return None
+        start, previous, current = entry
+        periods = int((now - start) // window)
+        if periods >= 2:
+            del self._counters[key]
+            return None
+        if periods == 1:
+            entry = (start + window, current, 0)
+            self._counters[key] = entry
+        return entry
+
+    async def estimate(self, key: str, window: float) -> tuple[float, float]:
+        now = time.monotonic()
+        entry = self._roll(key, window, now)
+        if entry is None:
+            return 0.0, 0.0
+        start, previous, current = entry
+        elapsed = now - start
+        return _weighted(previous, current, elapsed, window), window - elapsed
+
+    async def hit(self, key: str, window: float) -> None:
+        now = time.monotonic()
+        entry = self._roll(key, window, now)
+        if entry is None:
+            start = now - (now % window)
+            entry = (start, 0, 0)
+        start, previous, current = entry
+        self._counters[key] = (start, previous, current + 1)
+        self._counters.move_to_end(key)
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+            self.evictions += 1
+
+    async def reset(self, key: str, window: float) -> None:
+        self._counters.pop(key, None)
+
+    def clear(self) -> None:
+        self._counters.clear()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class KeyValueThrottleBackend:
+    """Backend compartido sobre un almacén clave-valor con ``incr`` atómico.
+
+    ``client`` tiene que ofrecer ``incr``, ``expire``, ``mget`` y ``delete``
+    asíncronos (la API de ``redis.asyncio``). Cada ventana fija es una
+    clave ``<key>:<número de ventana>`` que vence sola.
+    """
+
+    def __init__(self, client, prefix: str = "throttle:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _bucket(self, window: float) -> tuple[int, float]:
+        now = time.time()
+        return int(now // window), now % window
+
+    async def estimate(self, key: str, window: float) -> tuple[float, float]:
+        bucket, elapsed = self._bucket(window)
+        previous, current = await self.client.mget(
+            f"{self.prefix}{key}:{bucket - 1}", f"{self.prefix}{key}:{bucket}"
+        )
+        if previous is None and current is None:
+            return 0.0, 0.0
+        return _weighted(int(previous or 0), int(current or 0), elapsed, window), window - elapsed
+
+    async def hit(self, key: str, window: float) -> None:
+        bucket, _ = self._bucket(window)
+        name = f"{self.prefix}{key}:{bucket}"
+        await self.client.incr(name)
+        await self.client.expire(name, math.ceil(2 * window))
+
+    async def reset(self, key: str, window: float) -> None:
+        bucket, _ = self._bucket(window)
+        await self.client.delete(f"{self.prefix}{key}:{bucket - 1}", f"{self.prefix}{key}:{bucket}")
+
+    def clear(self) -> None:
+        pass
+
+
+class LoginThrottle:
+    """Límite de intentos fallidos por email, por IP y por el par email+IP.
+
+    Se consulta antes de buscar al usuario o verificar la contraseña, así
+    un ataque contra emails inexistentes no llega a la base.
+    """
+
+    def __init__(self, backend: ThrottleBackend, window: float, limits: dict[str, int]):
+        self.backend = backend
+        self.window = window
+        self.limits = limits
+        self.checks = 0
+        self.blocked: dict[str, int] = {kind: 0 for kind in limits}
+
+    def _keys(self, email: str, client_ip: str | None) -> list[tuple[str, str]]:
+        email = email.lower()
+        keys = [("email", f"email:{email}")]
+        if client_ip:
+            keys.append(("ip", f"ip:{client_ip}"))
+            keys.append(("pair", f"pair:{client_ip}|{email}"))
+        return [(kind, key) for kind, key in keys if self.limits.get(kind, 0) > 0]
+
+    async def check(self, email: str, client_ip: str | None = None) -> None:
+        self.checks += 1
+        for kind, key in self._keys(email, client_ip):
+            count, rotates_in = await self.backend.estimate(key, self.window)
+            if count >= self.limits[kind]:
+                self.blocked[kind] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Demasiados intentos. Intenta de nuevo más tarde.",
+                    headers={"Retry-After": str(max(1, math.ceil(rotates_in)))},
+                )
+
+    async def record_failure(self, email: str, client_ip: str | None = None) -> None:
+        for _, key in self._keys(email, client_ip):
+            await self.backend.hit(key, self.window)
+
+    async def record_success(self, email: str, client_ip: str | None = None) -> None:
+        # Sólo el par: un login válido no debe limpiar el contador de la IP ni del email
+        if client_ip:
+            await self.backend.reset(f"pair:{client_ip}|{email.lower()}", self.window)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def metrics(self) -> dict:
+        data = {
+            "backend": type(self.backend).__name__,
+            "window": self.window,
+            "limits": self.limits,
+            "checks": self.checks,
+            "blocked": dict(self.blocked),
+        }
+        if isinstance(self.backend, MemoryThrottleBackend):
+            data["keys"] = len(self.backend)
+            data["evictions"] = self.backend.evictions
+        return data
+
+
+def build_backend() -> ThrottleBackend:
+    if settings.THROTTLE_BACKEND == "redis":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("THROTTLE_BACKEND=redis requiere el paquete redis")
+        return KeyValueThrottleBackend(redis_asyncio.from_url(settings.THROTTLE_REDIS_URL))
+    return MemoryThrottleBackend(max_keys=settings.THROTTLE_MAX_KEYS)
+
+
+login_throttle = LoginThrottle(
+    backend=build_backend(),
+    window=settings.THROTTLE_WINDOW_SECONDS,
+    limits={
+        "email": settings.THROTTLE_EMAIL_LIMIT,
+        "ip": settings.THROTTLE_IP_LIMIT,
+        "pair": settings.THROTTLE_PAIR_LIMIT,
+    },
+)
@@ -0,0 +1,119 @@
+# app/core/token_versions.py
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.user import User
+
+# Margen al pedir cambios incrementales, por escrituras de otros workers
+# que commitean con un updated_at apenas anterior al último visto.
+_OVERLAP = timedelta(seconds=2)
+
+
+class TokenVersionMap:
+    """``user_id -> token_version`` en memoria para el modo stateless.
+
+    Se refresca en bloque: cada ``refresh_interval`` trae sólo las filas
+    modificadas y cada ``full_refresh_interval`` recarga todo (así se ven
+    los borrados hechos por otros workers). Los cambios de este proceso
+    se aplican al instante con ``set``/``forget``.
+    """
+
+    def __init__(self, refresh_interval: float, full_refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self._versions: dict[int, int] = {}
+        self._watermark: datetime | None = None
+        self._refreshed_at = 0.0
+        self._full_refreshed_at = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self.refreshes = 0
+        self.full_refreshes = 0
+        self.rejected = 0
+
+    def _needs_full(self, now: float) -> bool:
+        return not self._loaded or now - self._full_refreshed_at >= self.full_refresh_interval
+
+    def _stale(self, now: float) -> bool:
+        return self._needs_full(now) or now - self._refreshed_at >= self.refresh_interval
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        if not self._stale(time.monotonic()):
+            return
+        # Una sola recarga a la vez: las requests que llegan mientras tanto la esperan
+        async with self._lock:
+            now = time.monotonic()
+            if self._needs_full(now):
+                await self._full_refresh(db, now)
+            elif self._stale(now):
+                await self._incremental_refresh(db, now)
+
+    async def _full_refresh(self, db: AsyncSession, now: float) -> None:
+        result = await db.execute(select(User.id, User.token_version, User.updated_at))
+        versions: dict[int, int] = {}
+        watermark = None
+        for user_id, version, updated_at in result:
+            versions[user_id] = version
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        self._versions = versions
+        self._watermark = watermark
+        self._loaded = True
+        self._refreshed_at = self._full_refreshed_at = now
+        self.full_refreshes += 1
+
+    async def _incremental_refresh(self, db: AsyncSession, now: float) -> None:
+        stmt = select(User.id, User.token_version, User.updated_at)
+        if self._watermark is not None:
+            stmt = stmt.where(User.updated_at >= self._watermark - _OVERLAP)
+        result = await db.execute(stmt)
+        for user_id, version, updated_at in result:
+            self._versions[user_id] = version
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+        self._refreshed_at = now
+        self.refreshes += 1
+
+    async def refresh(self, db: AsyncSession, condition) -> None:
+        # Para las altas masivas, que no tienen los ids a mano
+        result = await db.execute(select(User.id, User.token_version).where(condition))
+        for user_id, version in result:
+            self._versions[user_id] = version
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        if self._versions.get(user_id) != version:
+            self.rejected += 1
+            return False
+        return True
+
+    def set(self, user_id: int, version: int) -> None:
+        self._versions[user_id] = version
+
+    def forget(self, user_id: int) -> None:
+        self._versions.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._versions.clear()
+        self._watermark = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": settings.AUTH_STATELESS,
+            "size": len(self._versions),
+            "refreshes": self.refreshes,
+            "full_refreshes": self.full_refreshes,
+            "rejected": self.rejected,
+        }
+
+
+token_versions = TokenVersionMap(
+    refresh_interval=settings.TOKEN_VERSION_REFRESH_SECONDS,
+    full_refresh_interval=settings.TOKEN_VERSION_FULL_REFRESH_SECONDS,
+)
@@ -1,16 +1,54 @@
 # app/crud/user.py
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
-from passlib.context import CryptContext
+from sqlalchemy import Row, and_, case, func, insert, or_, update, delete, tuple_
+from app.core.cache import principal_cache
+from app.core.hashing import hash_async
+from app.core.token_versions import token_versions
+from app.core.revocation import revocation_list
+from app.core.search import user_search
+from app.db.collation import binary
 from app.db.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserFilter, UserUpdate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Columnas públicas (las de UserRead), sin hash ni contadores internos
+READ_COLUMNS = ("id", "nombres", "apellidos", "dni", "fecha_nacimiento", "email", "rol")
 
-async def get_user(db: AsyncSession, user_id: int) -> User | None:
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalars().first()
+def parse_fields(fields: str | None) -> tuple[str, ...]:
+    """``"email,rol"`` -> columnas a leer; el id va siempre."""
+    if not fields:
+        return READ_COLUMNS
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in READ_COLUMNS]
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id", *requested]))
+
+def _projection(fields: tuple[str, ...], version: bool = False) -> list:
+    columns = [getattr(User, name) for name in fields]
+    if version:
+        # updated_at aparte, para los ETag; no es parte de la respuesta
+        columns.append(User.updated_at.label("version"))
+    return columns
+
+async def get_user_version(db: AsyncSession, user_id: int) -> datetime | None:
+    return await db.scalar(select(User.updated_at).where(User.id == user_id))
+
+async def get_token_version(db: AsyncSession, user_id: int) -> int | None:
+    return await db.scalar(select(User.token_version).where(User.id == user_id))
+
+async def get_user(db: AsyncSession, user_id: int, fields: tuple[str, ...] | None = None) -> User | Row | None:
+    # Sin fields, la entidad completa (la usan login y cambio de contraseña);
+    # con fields, sólo esas columnas en una fila liviana
+    if fields is None:
+        result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
+    result = await db.execute(select(*_projection(fields, version=True)).where(User.id == user_id))
+    return result.first()
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     normalized_email = email.lower()
@@ -21,37 +59,340 @@ async def get_user_by_dni(db: AsyncSession, dni: str) -> User | None:
     result = await db.execute(select(User).where(User.dni == dni))
     return result.scalars().first()
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[User]:
-    result = await db.execute(select(User).offset(skip).limit(limit))
-    return list(result.scalars().all())
+async def get_users(
+    db: AsyncSession, skip: int = 0, limit: int = 100, conditions: list | None = None,
+    fields: tuple[str, ...] = READ_COLUMNS,
+) -> list[Row]:
+    stmt = select(*_projection(fields, version=True)).where(*(conditions or [])).order_by(User.id)
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return list(result.all())
+
+# Órdenes estables para paginar por cursor; cada uno tiene índice (col, id)
+SORT_COLUMNS = {
+    "id": User.id,
+    "created_at": User.created_at,
+    "apellidos": User.apellidos,
+}
+
+def encode_cursor(sort: str, value, user_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "v": value, "id": user_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        value, user_id, cursor_sort = data["v"], int(data["id"]), data.get("s")
+        # El valor viaja sin firma: se valida el tipo antes de que llegue a la consulta
+        field = sort.lstrip("-")
+        if field == "created_at":
+            value = datetime.fromisoformat(value)
+        elif field == "id":
+            value = int(value)
+        elif not isinstance(value, str):
+            raise TypeError(value)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError("Cursor inválido")
+    if cursor_sort != sort:
+        raise ValueError("El cursor corresponde a otro orden")
+    return value, user_id
+
+async def get_users_keyset(
+    db: AsyncSession, limit: int = 100, sort: str = "id", cursor: str | None = None,
+    conditions: list | None = None, fields: tuple[str, ...] = READ_COLUMNS,
+) -> tuple[list[Row], str | None]:
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    if field not in SORT_COLUMNS:
+        raise ValueError(f"Orden no soportado: {sort}")
+    column = SORT_COLUMNS[field]
+
+    # El cursor necesita la columna de orden aunque no se haya pedido
+    sort_key = field if field in fields else "sort_key"
+    columns = _projection(fields, version=True)
+    if sort_key == "sort_key":
+        columns.append(column.label(sort_key))
+    stmt = select(*columns).where(*(conditions or []))
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        if field == "id":
+            stmt = stmt.where(User.id < last_id if descending else User.id > last_id)
+        else:
+            key, last = tuple_(column, User.id), tuple_(value, last_id)
+            stmt = stmt.where(key < last if descending else key > last)
+    if field == "id":
+        order = [User.id.desc() if descending else User.id]
+    else:
+        order = [column.desc(), User.id.desc()] if descending else [column, User.id]
+    # Un registro de más para saber si hay página siguiente
+    result = await db.execute(stmt.order_by(*order).limit(limit + 1))
+    users = list(result.all())
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        last_user = users[-1]
+        next_cursor = encode_cursor(sort, getattr(last_user, sort_key), last_user.id)
+    return users, next_cursor
+
+EXPORT_COLUMNS = READ_COLUMNS
+
+async def stream_users(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[list[Row]]:
+    # Cursor del lado del servidor: nunca hay más de un lote en memoria
+    stmt = (
+        select(*_projection(EXPORT_COLUMNS))
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    async for rows in result.partitions(batch_size):
+        yield rows
 
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
+    """Alta en una sola sentencia (INSERT ... RETURNING) y un commit.
+
+    No chequea duplicados antes: si el email o el DNI ya existen propaga el
+    ``IntegrityError`` de la restricción única.
+    """
     data = user_in.model_dump(exclude={"password"})
     data["email"] = data["email"].lower()  # 👈 normalizar
-    hashed_password = pwd_context.hash(user_in.password)
+    hashed_password = await hash_async(user_in.password)
     data["password_hash"] = hashed_password
-    user = User(**data)
-    db.add(user)
+    if db.get_bind().dialect.insert_returning:
+        result = await db.execute(insert(User).values(**data).returning(User))
+        user = result.scalar_one()
+    else:
+        user = User(**data)
+        db.add(user)
+        await db.flush()
     await db.commit()
-    await db.refresh(user)
+    user_search.upsert_user(user)
+    # Sin esto, en modo stateless el token del usuario nuevo no vale hasta el próximo refresco
+    token_versions.set(user.id, user.token_version)
     return user
 
-async def update_user(db: AsyncSession, user_id: int, user_in: UserUpdate) -> User | None:
+async def get_users_by_ids(db: AsyncSession, ids: list[int]) -> list[Row]:
+    if not ids:
+        return []
+    result = await db.execute(select(*_projection(READ_COLUMNS)).where(User.id.in_(ids)))
+    return list(result.all())
+
+async def get_existing_identities(db: AsyncSession, emails: list[str], dnis: list[str]) -> tuple[set[str], set[str]]:
+    # Una sola consulta por lote para detectar colisiones de email o DNI
+    if not emails and not dnis:
+        return set(), set()
+    result = await db.execute(
+        select(User.email, User.dni).where(or_(User.email.in_(emails), User.dni.in_(dnis)))
+    )
+    rows = result.all()
+    return {email for email, _ in rows}, {dni for _, dni in rows}
+
+# Columnas que carga la importación masiva (las que tienen default en Python van explícitas)
+BULK_COLUMNS = (
+    "nombres", "apellidos", "dni", "fecha_nacimiento", "email", "rol", "password_hash",
+    "created_at", "updated_at", "failed_login_attempts", "token_version",
+)
+
+async def bulk_insert_users(db: AsyncSession, rows: list[dict]) -> None:
+    """Inserta ``rows`` sin commitear: COPY en asyncpg, INSERT multi-fila en el resto."""
+    if not rows:
+        return
+    if db.get_bind().dialect.driver == "asyncpg":
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        records = [
+            tuple(row[c].value if c == "rol" else row[c] for c in BULK_COLUMNS)
+            for row in rows
+        ]
+        await raw.driver_connection.copy_records_to_table(
+            User.__tablename__, columns=list(BULK_COLUMNS), records=records
+        )
+    else:
+        # executemany con "insertmanyvalues": INSERT ... VALUES (...), (...) en tandas
+        await db.execute(insert(User), rows)
+
+async def _update_returning(db: AsyncSession, condition, values: dict) -> User | None:
+    """UPDATE ... RETURNING de una fila; sin RETURNING en el dialecto, UPDATE + SELECT."""
+    stmt = update(User).where(condition).values(**values)
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(
+            stmt.returning(User),
+            execution_options={"synchronize_session": False, "populate_existing": True},
+        )
+        return result.scalars().first()
+    await db.execute(stmt.execution_options(synchronize_session=False))
+    result = await db.execute(select(User).where(condition).execution_options(populate_existing=True))
+    return result.scalars().first()
+
+async def update_user(
+    db: AsyncSession, user_id: int, user_in: UserUpdate, expected_version: datetime | None = None
+) -> User | None:
+    """Con ``expected_version`` sólo actualiza si ``updated_at`` sigue igual (If-Match)."""
     values = user_in.model_dump(exclude_unset=True)
     if "email" in values:
         values["email"] = values["email"].lower()  # 👈 normalizar si viene email
+    if "rol" in values:
+        # Cambio de rol: los tokens con el rol viejo dejan de valer
+        values["token_version"] = User.token_version + 1
+    condition = User.id == user_id
+    if expected_version is not None:
+        condition = and_(condition, User.updated_at == expected_version)
+    user = await _update_returning(db, condition, values)
+    await db.commit()
+    principal_cache.invalidate(user_id=user_id)
+    if user is not None:
+        token_versions.set(user.id, user.token_version)
+        user_search.upsert_user(user)
+    return user
+
+async def register_failed_login(
+    db: AsyncSession, user_id: int, max_attempts: int, lockout: timedelta
+) -> int | None:
+    """Suma un intento fallido en un único UPDATE condicional.
+
+    Devuelve el contador nuevo, o ``None`` si el usuario ya está bloqueado
+    (ahí no se cuenta nada). Con el bloqueo vencido el contador vuelve a 1.
+    El incremento lo hace la base, así los fallos concurrentes no se pisan.
+    """
+    now = datetime.utcnow()
+    locked = and_(
+        User.failed_login_attempts >= max_attempts,
+        User.last_failed_login.is_not(None),
+        User.last_failed_login > now - lockout,
+    )
     stmt = (
         update(User)
-        .where(User.id == user_id)
-        .values(**values)
+        .where(User.id == user_id, ~locked)
+        .values(
+            failed_login_attempts=case(
+                (User.failed_login_attempts >= max_attempts, 1),
+                else_=User.failed_login_attempts + 1,
+            ),
+            last_failed_login=now,
+        )
+        # Expira los atributos del usuario si ya está en la sesión
         .execution_options(synchronize_session="fetch")
     )
-    await db.execute(stmt)
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(stmt.returning(User.failed_login_attempts))
+        attempts = result.scalar_one_or_none()
+    else:
+        result = await db.execute(stmt)
+        attempts = None
+        if result.rowcount:
+            attempts = await db.scalar(select(User.failed_login_attempts).where(User.id == user_id))
+    await db.commit()
+    return attempts
+
+async def update_password_hash(db: AsyncSession, condition, password_hash: str) -> User | None:
+    """Guarda el hash nuevo e invalida tokens y refresh tokens previos, en un solo commit."""
+    user = await _update_returning(db, condition, {
+        "password_hash": password_hash,
+        "last_password_change": datetime.utcnow(),
+        "token_version": User.token_version + 1,
+    })
+    if user is None:
+        return None
+    await revocation_list.revoke_users(db, [user.id], commit=False)
     await db.commit()
-    return await get_user(db, user_id)
+    principal_cache.invalidate(user_id=user.id, email=user.email)
+    token_versions.set(user.id, user.token_version)
+    return user
 
 async def delete_user(db: AsyncSession, user_id: int) -> bool:
     stmt = delete(User).where(User.id == user_id)
     result = await db.execute(stmt)
     await db.commit()
+    principal_cache.invalidate(user_id=user_id)
+    token_versions.forget(user_id)
+    user_search.remove(user_id)
+    if result.rowcount > 0:
+        await revocation_list.revoke_user(db, user_id)
     return result.rowcount > 0
+
+def _prefix_upper_bound(prefix: str) -> str:
+    # "Gar" -> "Gas": primer string que ya no empieza con el prefijo
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def filter_conditions(user_filter: UserFilter, exclude_id: int | None = None) -> list:
+    """Predicados del filtro, escritos para que cada uno pueda usar su índice."""
+    conditions = []
+    if user_filter.rol is not None:
+        conditions.append(User.rol == user_filter.rol)
+    if user_filter.ids is not None:
+        conditions.append(User.id.in_(user_filter.ids))
+    if user_filter.created_from is not None:
+        conditions.append(User.created_at >= user_filter.created_from)
+    if user_filter.created_to is not None:
+        conditions.append(User.created_at < user_filter.created_to)
+    if user_filter.inactive_since is not None:
+        conditions.append(or_(User.last_login < user_filter.inactive_since, User.last_login.is_(None)))
+    if user_filter.apellidos_prefix:
+        # Rango en lugar de LIKE 'x%': LIKE no usa el índice con collations no binarias.
+        # Comparación binaria en todas las bases: distingue mayúsculas y tildes
+        prefix = user_filter.apellidos_prefix
+        conditions.append(binary(User.apellidos) >= prefix)
+        conditions.append(binary(User.apellidos) < _prefix_upper_bound(prefix))
+    if exclude_id is not None:
+        conditions.append(User.id != exclude_id)
+    return conditions
+
+async def count_users(db: AsyncSession, conditions: list) -> int:
+    return await db.scalar(select(func.count()).select_from(User).where(*conditions))
+
+async def _chunk_ids(db: AsyncSession, conditions: list, after_id: int, chunk_size: int) -> list[int]:
+    result = await db.execute(
+        select(User.id).where(*conditions, User.id > after_id).order_by(User.id).limit(chunk_size)
+    )
+    return list(result.scalars().all())
+
+async def bulk_update_users(
+    db: AsyncSession, conditions: list, values: dict, chunk_size: int = 500
+) -> tuple[int, int]:
+    """UPDATE por tandas de ``chunk_size`` ids, con un commit por tanda.
+
+    Avanza por id (keyset), así un cambio que saca filas del filtro (p. ej.
+    el rol) no hace saltear ni repetir ninguna. Devuelve ``(filas, tandas)``.
+    """
+    values = dict(values)
+    if "rol" in values:
+        values["token_version"] = User.token_version + 1
+    affected = chunks = 0
+    last_id = 0
+    while ids := await _chunk_ids(db, conditions, last_id, chunk_size):
+        result = await db.execute(
+            update(User).where(User.id.in_(ids), *conditions).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        affected += result.rowcount
+        chunks += 1
+        last_id = ids[-1]
+        principal_cache.invalidate_many(ids)
+        if "rol" in values:
+            versions = await db.execute(select(User.id, User.token_version).where(User.id.in_(ids)))
+            for user_id, version in versions:
+                token_versions.set(user_id, version)
+        if "nombres" in values or "apellidos" in values:
+            await user_search.refresh(db, User.id.in_(ids))
+    return affected, chunks
+
+async def bulk_delete_users(db: AsyncSession, conditions: list, chunk_size: int = 500) -> tuple[int, int]:
+    affected = chunks = 0
+    last_id = 0
+    while ids := await _chunk_ids(db, conditions, last_id, chunk_size):
+        result = await db.execute(
+            delete(User).where(User.id.in_(ids), *conditions).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        affected += result.rowcount
+        chunks += 1
+        last_id = ids[-1]
+        principal_cache.invalidate_many(ids)
+        for user_id in ids:
+            token_versions.forget(user_id)
+        user_search.remove_many(ids)
+        await revocation_list.revoke_users(db, ids)
+    return affected, chunks
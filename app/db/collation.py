@@ -0,0 +1,30 @@
+# app/db/collation.py
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+
+class binary(ColumnElement):
+    """La columna comparada byte a byte en todas las bases.
+
+    SQLite ya compara así (BINARY). PostgreSQL usa la collation de la base,
+    que ignora mayúsculas o tildes al ordenar: ahí se agrega ``COLLATE "C"``
+    (con su índice, ver ``ix_users_apellidos_c``).
+    """
+
+    inherit_cache = True
+    _traverse_internals = [("column", InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, column):
+        self.column = column
+        self.type = column.type
+
+
+@compiles(binary)
+def _compile_binary(element, compiler, **kw):
+    return compiler.process(element.column, **kw)
+
+
+@compiles(binary, "postgresql")
+def _compile_binary_postgresql(element, compiler, **kw):
+    return f'{compiler.process(element.column, **kw)} COLLATE "C"'
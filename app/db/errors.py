@@ -0,0 +1,50 @@
+# app/db/errors.py
+import re
+
+from sqlalchemy import Table
+from sqlalchemy.exc import IntegrityError
+
+# SQLite: "UNIQUE constraint failed: users.email"
+_SQLITE_UNIQUE = re.compile(r"UNIQUE constraint failed: ([\w.]+)")
+
+
+def unique_constraints(table: Table) -> dict[str, str]:
+    """Nombre de cada restricción única de ``table`` -> columna.
+
+    Incluye los índices únicos (``ix_users_email``) y el nombre que
+    PostgreSQL asigna a ``unique=True`` sin nombre (``users_dni_key``).
+    """
+    names: dict[str, str] = {}
+    for index in table.indexes:
+        if index.unique and len(index.columns) == 1:
+            names[index.name] = next(iter(index.columns)).name
+    for column in table.columns:
+        if column.unique:
+            names[f"{table.name}_{column.name}_key"] = column.name
+    return names
+
+
+def _constraint_name(error: IntegrityError) -> str | None:
+    orig = error.orig
+    # psycopg expone diag; asyncpg deja la excepción original como causa
+    diag = getattr(orig, "diag", None)
+    if getattr(diag, "constraint_name", None):
+        return diag.constraint_name
+    for candidate in (orig, getattr(orig, "__cause__", None)):
+        name = getattr(candidate, "constraint_name", None)
+        if name:
+            return name
+    return None
+
+
+def unique_violation(error: IntegrityError, table: Table) -> str | None:
+    """Columna cuya restricción única violó ``error``, o ``None`` si no es el caso."""
+    name = _constraint_name(error)
+    if name is not None:
+        return unique_constraints(table).get(name)
+    match = _SQLITE_UNIQUE.search(str(error.orig))
+    if match:
+        table_name, _, column = match.group(1).rpartition(".")
+        if table_name == table.name and column in table.columns:
+            return column
+    return None
@@ -0,0 +1,19 @@
+# app/db/models/revoked_token.py
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, DateTime
+
+from app.db.base import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # "jti:<jti>" para un refresh token puntual, "user:<id>" para todos los
+    # emitidos a un usuario antes de revoked_at
+    key: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Pasada esta fecha los tokens alcanzados ya vencieron y la fila sobra
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
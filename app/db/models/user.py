@@ -4,13 +4,25 @@ from typing import Optional
 
 from sqlalchemy import Enum as PgEnum
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, Date, DateTime
+from sqlalchemy import Integer, String, Date, DateTime, Index, text
 
 from app.schemas.user import UserRole
 from app.db.base import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Paginación por cursor sobre (orden, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_apellidos_id", "apellidos", "id"),
+        # Filtros de GET /users
+        Index("ix_users_rol_id", "rol", "id"),
+        Index("ix_users_last_login", "last_login"),
+        # Filtro apellidos_prefix en PostgreSQL (comparación binaria, ver app.db.collation)
+        Index("ix_users_apellidos_c", text('apellidos COLLATE "C"')).ddl_if(dialect="postgresql"),
+        # Refrescos incrementales del mapa de versiones y del índice de búsqueda
+        Index("ix_users_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     nombres: Mapped[str] = mapped_column(String, nullable=False)
@@ -29,3 +41,6 @@ class User(Base):
     
     failed_login_attempts: Mapped[int] = mapped_column(Integer, default=0)
     last_failed_login: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # Se incrementa al cambiar contraseña o rol; invalida los tokens emitidos antes
+    token_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
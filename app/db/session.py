@@ -1,20 +1,54 @@
 # db/models/session.py
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+import logging
+import time
 
-# Cargar variables desde .env
-load_dotenv()
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+from app.core.config import settings
+from app.core.security import decode_access_token
+
+
+def build_engine(url: str | None = None) -> AsyncEngine:
+    """Crea el motor asíncrono con la configuración de pool de los settings."""
+    url = url or settings.DATABASE_URL
+    if not url:
+        raise ValueError("Falta la variable DATABASE_URL en el entorno")
+
+    parsed = make_url(url)
+    options: dict = {
+        "echo": settings.DB_ECHO,
+        "query_cache_size": settings.DB_COMPILED_CACHE_SIZE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    # SQLite usa pools sin tamaño (StaticPool / NullPool)
+    if parsed.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    if parsed.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return create_async_engine(url, **options)
+
+
+def pool_status(pool: Pool) -> dict:
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            status[name] = counter()
+    return status
 
-# Validar que DATABASE_URL exista
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("Falta la variable DATABASE_URL en el entorno")
 
 # Crear el motor asíncrono
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = build_engine()
 
 # Crear el sessionmaker con AsyncSession
 async_session = async_sessionmaker(
@@ -23,7 +57,138 @@ async_session = async_sessionmaker(
 )
 
 
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session: Session) -> None:
+    session.info["committed"] = True
+
+
+# Forzar el destino de las lecturas de un request: "primary" o "replica"
+TARGET_HEADER = "X-DB-Target"
+
+
+class ReadRouter:
+    """Reparte las sesiones de sólo lectura entre las réplicas.
+
+    Round-robin entre las réplicas sanas; una réplica con error de conexión
+    queda apartada ``eject_seconds``. Sin réplicas disponibles, o si el
+    cliente escribió hace menos de ``sticky_seconds`` (para que lea lo que
+    acaba de escribir), se usa el primario.
+    """
+
+    def __init__(self, urls: list[str], eject_seconds: float, sticky_seconds: float):
+        self.eject_seconds = eject_seconds
+        self.sticky_seconds = sticky_seconds
+        self.engines: dict[str, AsyncEngine] = {f"replica-{i}": build_engine(url) for i, url in enumerate(urls)}
+        self.replicas: list[tuple[str, async_sessionmaker]] = [
+            (name, async_sessionmaker(bind=replica, expire_on_commit=False))
+            for name, replica in self.engines.items()
+        ]
+        self._next = 0
+        self._ejected_until: dict[str, float] = {}
+        # usuario -> momento de su última escritura
+        self._writes: dict[str, float] = {}
+        self.sessions: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.ejections: dict[str, int] = {}
+
+    def mark_write(self, client: str | None) -> None:
+        if client is None or not self.replicas:
+            return
+        now = time.monotonic()
+        self._writes[client] = now
+        if len(self._writes) > 10000:
+            self._writes = {k: t for k, t in self._writes.items() if now - t < self.sticky_seconds}
+
+    def _sticky(self, client: str | None) -> bool:
+        written_at = self._writes.get(client) if client else None
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    def _pick_replica(self) -> tuple[str, async_sessionmaker] | None:
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            name, maker = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if self._ejected_until.get(name, 0) <= now:
+                return name, maker
+        return None
+
+    def choose(self, client: str | None = None, target: str | None = None) -> tuple[str, async_sessionmaker]:
+        chosen = None
+        if target != "primary" and (target == "replica" or not self._sticky(client)):
+            chosen = self._pick_replica()
+        name, maker = chosen or ("primary", async_session)
+        self.sessions[name] = self.sessions.get(name, 0) + 1
+        return name, maker
+
+    def eject(self, name: str, error: Exception) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+        if name == "primary":
+            return
+        self._ejected_until[name] = time.monotonic() + self.eject_seconds
+        self.ejections[name] = self.ejections.get(name, 0) + 1
+        logging.warning(f"[DB] Réplica {name} apartada {self.eject_seconds}s: {error}")
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        targets = ["primary"] + [name for name, _ in self.replicas]
+        return {
+            target: {
+                "sessions": self.sessions.get(target, 0),
+                "errors": self.errors.get(target, 0),
+                "ejections": self.ejections.get(target, 0),
+                "ejected": self._ejected_until.get(target, 0) > now,
+            }
+            for target in targets
+        }
+
+    def clear(self) -> None:
+        self._writes.clear()
+        self._ejected_until.clear()
+
+    async def dispose(self) -> None:
+        for replica in self.engines.values():
+            await replica.dispose()
+
+
+read_router = ReadRouter(
+    settings.DATABASE_READ_URLS,
+    eject_seconds=settings.DB_READ_EJECT_SECONDS,
+    sticky_seconds=settings.DB_READ_STICKY_SECONDS,
+)
+
+
+def _client_key(request: Request) -> str | None:
+    # El usuario del token, no la IP: detrás de un balanceador todos comparten
+    # la misma, y un cliente que cambia de IP perdería lo que acaba de escribir
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    subject = payload.get("sub") if payload else None
+    return subject.lower() if isinstance(subject, str) else None
+
+
 # Dependency para inyectar la sesión en endpoints
-async def get_session() -> AsyncSession: # type: ignore
+async def get_session(request: Request) -> AsyncSession: # type: ignore
     async with async_session() as session: # type: ignore
         yield session #type: ignore
+        if session.info.get("committed"):
+            # Las lecturas siguientes de este cliente van al primario un rato
+            read_router.mark_write(_client_key(request))
+
+
+# Para endpoints y dependencias que sólo leen
+async def get_read_session(request: Request) -> AsyncSession: # type: ignore
+    name, maker = read_router.choose(_client_key(request), request.headers.get(TARGET_HEADER))
+    async with maker() as session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError, OSError) as e:
+            # Errores de conexión, no de la consulta
+            read_router.eject(name, e)
+            raise
+
+
+# Para respuestas en streaming, que abren su propia sesión fuera del ciclo de la dependencia
+def get_sessionmaker() -> async_sessionmaker:
+    return async_session
@@ -1,12 +1,18 @@
 # app/main.py
 from fastapi import FastAPI
 from app.core.login_config import configure_logging
-from app.routers import user, auth
+from app.routers import user, auth, admin, jwks, health
+from app.core.config import settings
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import engine, async_session, read_router
+from app.core.revocation import revocation_list
+from app.core.login_buffer import login_buffer
+from app.core.search import user_search
+from app.core.hashing import start_hash_pool, shutdown_hash_pool, calibrate_and_apply
 
 # Importar modelos para crear tablas
 from app.db.models import user as user_models
+from app.db.models import revoked_token as revoked_token_models
 
 configure_logging()
 
@@ -14,8 +20,28 @@ app = FastAPI()
 
 app.include_router(user.router)
 app.include_router(auth.router)  # <--- acá incluimos el auth
+app.include_router(admin.router)
+app.include_router(jwks.router)
+app.include_router(health.router)
 
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as db:
+        await revocation_list.rebuild(db)
+    if settings.HASH_CALIBRATE:
+        await calibrate_and_apply()
+    await start_hash_pool()
+    if settings.LOGIN_WRITE_BEHIND:
+        login_buffer.start(async_session)
+    user_search.start(async_session)
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Lo que quedó en el buffer se escribe antes de cerrar el motor
+    await login_buffer.stop()
+    await user_search.stop()
+    shutdown_hash_pool()
+    await engine.dispose()
+    await read_router.dispose()
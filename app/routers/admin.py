@@ -0,0 +1,42 @@
+# app/routers/admin.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dependencies import get_current_admin
+from app.core.cache import principal_cache
+from app.core.hashing import hashing_metrics, hash_limiter
+from app.core.login_buffer import login_buffer
+from app.core.throttle import login_throttle
+from app.core.revocation import revocation_list
+from app.core.search import user_search
+from app.core.security import token_cache
+from app.core.token_versions import token_versions
+from app.db.session import get_session, read_router
+from app.schemas.user import UserRead
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/metrics")
+async def read_metrics(current_user: UserRead = Depends(get_current_admin)):
+    return {
+        "hashing": hashing_metrics(),
+        "hash_admission": hash_limiter.metrics(),
+        "principal_cache": principal_cache.metrics(),
+        "token_versions": token_versions.metrics(),
+        "token_cache": token_cache.metrics(),
+        "revocation": revocation_list.metrics(),
+        "login_write_behind": login_buffer.metrics(),
+        "login_throttle": login_throttle.metrics(),
+        "db_routing": read_router.metrics(),
+        "user_search": user_search.metrics(),
+    }
+
+@router.post("/search/rebuild")
+async def rebuild_search_index(
+    db: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_admin)
+):
+    # Sólo el índice de este worker; el resto se entera con su refresco periódico
+    if not user_search.enabled:
+        raise HTTPException(status_code=409, detail="La búsqueda de usuarios está deshabilitada.")
+    await user_search.rebuild(db)
+    return user_search.metrics()
@@ -1,10 +1,12 @@
 # app/router/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.token import UserLogin, Token, ForgotPasswordRequest, ResetPasswordRequest
-from app.db.session import get_session
+from app.schemas.token import UserLogin, Token, ForgotPasswordRequest, ResetPasswordRequest, RefreshRequest
+from app.db.session import get_session, read_router
 from app.services.auth import (
     login_user,
+    refresh_access_token,
+    logout_process,
     forgot_password_process,
     reset_password_process,
 )
@@ -13,8 +15,20 @@ from app.services.users import update_user_password_by_email  # si lo usás en s
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/login", response_model=Token)
-async def login(form_data: UserLogin, db: AsyncSession = Depends(get_session)):
-    return await login_user(form_data, db)
+async def login(form_data: UserLogin, request: Request, db: AsyncSession = Depends(get_session)):
+    client_ip = request.client.host if request.client else None
+    token = await login_user(form_data, db, client_ip)
+    # Las primeras lecturas con el token nuevo van al primario (p. ej. justo después del alta)
+    read_router.mark_write(form_data.email.lower())
+    return token
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_session)):
+    return await refresh_access_token(request, db)
+
+@router.post("/logout")
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_session)):
+    return await logout_process(request, db)
 
 @router.post("/forgot-password")
 async def forgot_password(request: ForgotPasswordRequest, db: AsyncSession = Depends(get_session)):
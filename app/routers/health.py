@@ -0,0 +1,28 @@
+# app/routers/health.py
+import time
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_session, pool_status
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/db")
+async def health_db(db: AsyncSession = Depends(get_session)):
+    start = time.perf_counter()
+    try:
+        await db.execute(text("SELECT 1"))
+        status_code, state = 200, "ok"
+    except SQLAlchemyError:
+        status_code, state = 503, "error"
+    latency_ms = round((time.perf_counter() - start) * 1000, 2)
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "status": state,
+            "latency_ms": latency_ms,
+            "pool": pool_status(db.bind.pool),
+        },
+    )
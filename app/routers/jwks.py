@@ -0,0 +1,14 @@
+# app/routers/jwks.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.keys import key_store
+
+router = APIRouter(tags=["jwks"])
+
+@router.get("/.well-known/jwks.json")
+async def read_jwks():
+    return JSONResponse(
+        content=key_store.jwks(),
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"},
+    )
@@ -1,18 +1,41 @@
 # routers/user.py
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from typing import cast 
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.db.models.user import User
-from app.schemas.user import UserCreate, UserRead, UserUpdate, UserUpdatePassword
-from app.db.session import get_session
-from app.core.dependencies import get_current_user
-from app.services.email import send_welcome_email
+from app.schemas.user import (
+    BulkDeleteRequest,
+    BulkImportReport,
+    BulkResult,
+    BulkUpdateRequest,
+    UserCreate,
+    UserFilter,
+    UserRead,
+    UserReadPartial,
+    UserRole,
+    UserUpdate,
+    UserUpdatePassword,
+)
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.db.session import get_read_session, get_session, get_sessionmaker, read_router
+from app.core.config import settings
+from app.core.dependencies import get_current_user, get_current_admin
+from app.core.etags import etag_matches, list_etag, user_etag
+from app.core.serialization import rows_response
+from app.services.export import MEDIA_TYPES, export_users
+from app.services.email import send_welcome_email, send_welcome_emails
+from app.services.bulk import bulk_delete_service, bulk_update_service, import_users
 from app.services.users import (
     create_user_service,
     get_users_service,
+    get_users_page_service,
     get_user_service,
+    get_user_version_service,
+    search_users_service,
     update_user_password,
     update_user_service,
     delete_user_service,
@@ -23,34 +46,181 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def create_user_endpoint(user_in: UserCreate, db: AsyncSession = Depends(get_session)):
     user = await create_user_service(db, user_in)
+    # Sin bearer get_session no sabe quién escribió: el alta se pega al primario por el email
+    read_router.mark_write(user.email)
     await send_welcome_email(user.email, user.nombres)
     logging.info(f"[ALTA USUARIO] Se creó el usuario {user.email} con rol {user.rol}.")
     return user
 
-@router.get("/", response_model=List[UserRead])
-async def read_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
-    return await get_users_service(db, skip, limit)
+@router.post("/bulk", response_model=BulkImportReport)
+async def import_users_endpoint(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_admin)
+):
+    try:
+        content = (await request.body()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar en UTF-8")
+
+    report, created = await import_users(db, content, format, settings.IMPORT_BATCH_SIZE)
+    if created:
+        background_tasks.add_task(send_welcome_emails, created)
+    logging.info(
+        f"[ALTA MASIVA] {current_user.email} importó {report.created} usuarios "
+        f"({report.failed} con error)."
+    )
+    return report
+
+@router.patch("/bulk", response_model=BulkResult)
+async def bulk_update_endpoint(
+    request: BulkUpdateRequest,
+    db: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_admin)
+):
+    result = await bulk_update_service(db, request, current_user.id, settings.BULK_CHUNK_SIZE)
+    if not result.dry_run:
+        logging.warning(
+            f"[CAMBIO MASIVO] {current_user.email} actualizó {result.affected} usuarios "
+            f"({request.patch.model_dump(exclude_none=True)})."
+        )
+    return result
+
+@router.post("/bulk/delete", response_model=BulkResult)
+async def bulk_delete_endpoint(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_admin)
+):
+    result = await bulk_delete_service(db, request, current_user.id, settings.BULK_CHUNK_SIZE)
+    if not result.dry_run:
+        logging.warning(f"[BAJA MASIVA] {current_user.email} eliminó {result.affected} usuarios.")
+    return result
+
+@router.get("/", response_model=List[UserReadPartial], response_model_exclude_unset=True)
+async def read_users(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str | None = None,
+    cursor: str | None = None,
+    rol: UserRole | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    inactive_since: datetime | None = None,
+    apellidos_prefix: str | None = Query(
+        None, min_length=1, max_length=100,
+        description="Prefijo exacto de apellidos: distingue mayúsculas y tildes",
+    ),
+    fields: str | None = Query(None, description="Campos separados por coma, p. ej. email,rol"),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    user_filter = UserFilter(
+        rol=rol,
+        created_from=created_from,
+        created_to=created_to,
+        inactive_since=inactive_since,
+        apellidos_prefix=apellidos_prefix,
+    )
+    if not user_filter.model_dump(exclude_none=True):
+        user_filter = None
+
+    async def load_page(columns: str | None):
+        # Con sort o cursor se pagina por keyset; si no, offset como siempre
+        if sort is None and cursor is None:
+            return await get_users_service(db, skip, limit, user_filter, columns), None
+        return await get_users_page_service(db, limit, sort or "id", cursor, user_filter, columns)
+
+    if if_none_match:
+        # Primero sólo (id, updated_at) de la página: si no cambió, no se lee nada más
+        versions, _ = await load_page("id")
+        etag = list_etag(versions, request.url.query)
+        if etag and etag_matches(if_none_match, etag, weak=True):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    users, next_cursor = await load_page(fields)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    etag = list_etag(users, request.url.query)
+    if etag:
+        headers["ETag"] = etag
+    if settings.FAST_JSON:
+        return rows_response(users, headers)
+    response.headers.update(headers)
+    return users
+
+@router.get("/search", response_model=List[UserRead])
+async def search_users(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    users = await search_users_service(db, q, limit)
+    return rows_response(users) if settings.FAST_JSON else users
+
+@router.get("/export")
+async def export_users_endpoint(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    session_maker: async_sessionmaker = Depends(get_sessionmaker),
+    current_user: UserRead = Depends(get_current_admin)
+):
+    # El generador abre su propia sesión: la de get_session se cierra antes de empezar a transmitir
+    logging.info(f"[EXPORT] {current_user.email} exporta usuarios en {format}.")
+    return StreamingResponse(
+        export_users(session_maker, format, settings.EXPORT_BATCH_SIZE),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+@router.get("/{user_id}", response_model=UserReadPartial, response_model_exclude_unset=True)
+async def read_user(
+    user_id: int,
+    response: Response,
+    fields: str | None = Query(None, description="Campos separados por coma, p. ej. email,rol"),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    if if_none_match:
+        # El 304 sale de leer sólo updated_at, sin cargar el usuario
+        version = await get_user_version_service(db, user_id)
+        if version is not None:
+            etag = user_etag(user_id, version, fields)
+            if etag_matches(if_none_match, etag, weak=True):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-@router.get("/{user_id}", response_model=UserRead)
-async def read_user(user_id: int, db: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
-    user = await get_user_service(db, user_id)
+    user = await get_user_service(db, user_id, fields)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    version = getattr(user, "version", None)
+    headers = {"ETag": user_etag(user_id, version, fields)} if version else {}
+    if settings.FAST_JSON:
+        return rows_response(user, headers)
+    response.headers.update(headers)
     return user
 
 @router.put("/{user_id}", response_model=UserRead)
 async def update_user_endpoint(
     user_id: int,
     user_in: UserUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_session),
     current_user: UserRead = Depends(get_current_user)
 ):
     if current_user.id != user_id and current_user.rol.upper() != "ADMIN":
         raise HTTPException(status_code=403, detail="No tienes permisos para actualizar a otros usuarios")
 
-    user = await update_user_service(db, user_id, user_in)
+    user = await update_user_service(db, user_id, user_in, if_match)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if getattr(user, "updated_at", None):
+        response.headers["ETag"] = user_etag(user.id, user.updated_at)
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
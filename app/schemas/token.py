@@ -1,17 +1,25 @@
 # app/schemas/token.py
 from pydantic import BaseModel, EmailStr
+from app.schemas.user import UserRole
 
 class Token(BaseModel):
     access_token: str
     token_type: str
     user_id: int
     user_role: str
+    refresh_token: str | None = None
 
 class TokenData(BaseModel):
     email: str | None = None
     user_id: int | None = None
     user_role: str | None = None
 
+class TokenPrincipal(BaseModel):
+    # Usuario armado sólo con los claims del token (modo stateless)
+    id: int
+    email: str
+    rol: UserRole
+
 class UserLogin(BaseModel):
     email: str
     password: str
@@ -19,6 +27,9 @@ class UserLogin(BaseModel):
 class ForgotPasswordRequest(BaseModel):
     email: EmailStr
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class ResetPasswordRequest(BaseModel):
     token: str
     new_password: str
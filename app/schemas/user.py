@@ -1,6 +1,6 @@
 # app/schemas/user.py
 from pydantic import BaseModel, EmailStr, Field, validator
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 import re
 
@@ -42,6 +42,19 @@ class UserRead(UserBase):
     class Config:
         from_attributes = True  # Cambiado para Pydantic v2
 
+class UserReadPartial(BaseModel):
+    # Respuesta con fields=: sólo vienen los campos pedidos
+    id: int
+    nombres: str | None = None
+    apellidos: str | None = None
+    dni: str | None = None
+    fecha_nacimiento: date | None = None
+    email: EmailStr | None = None
+    rol: UserRole | None = None
+
+    class Config:
+        from_attributes = True
+
 class UserUpdate(BaseModel):
     nombres: str | None = None
     apellidos: str | None = None
@@ -57,3 +70,46 @@ class UserUpdatePassword(BaseModel):
     @validator("new_password")
     def check_new_password(cls, v):
         return validar_password(v)
+
+class UserFilter(BaseModel):
+    rol: UserRole | None = None
+    ids: list[int] | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    # Sin login desde esa fecha (o nunca)
+    inactive_since: datetime | None = None
+    apellidos_prefix: str | None = None
+
+class UserBulkPatch(BaseModel):
+    # Sin email ni DNI: son únicos y no tiene sentido asignarlos en bloque
+    nombres: str | None = None
+    apellidos: str | None = None
+    fecha_nacimiento: date | None = None
+    rol: UserRole | None = None
+
+class BulkUpdateRequest(BaseModel):
+    filter: UserFilter
+    patch: UserBulkPatch
+    dry_run: bool = False
+
+class BulkDeleteRequest(BaseModel):
+    filter: UserFilter
+    dry_run: bool = False
+
+class BulkResult(BaseModel):
+    matched: int
+    affected: int
+    chunks: int
+    dry_run: bool
+
+class BulkRowResult(BaseModel):
+    row: int
+    status: str  # "created" | "error"
+    email: str | None = None
+    detail: str | None = None
+
+class BulkImportReport(BaseModel):
+    total: int
+    created: int
+    failed: int
+    results: list[BulkRowResult]
@@ -0,0 +1,28 @@
+# app/scripts/calibrate_hash.py
+"""Mide el costo de hashing en este hardware.
+
+    python -m app.scripts.calibrate_hash --target-ms 150
+"""
+import argparse
+
+from app.core.config import settings
+from app.core.hashing import COST_SETTINGS, calibrate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibra el costo del hash de contraseñas")
+    parser.add_argument("--scheme", choices=list(COST_SETTINGS), default=settings.PASSWORD_SCHEMES[0])
+    parser.add_argument("--target-ms", type=int, default=settings.HASH_TARGET_MS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    result = calibrate(args.scheme, args.target_ms, args.repeat)
+    print(
+        f"{result['scheme']}: costo {result['cost']} "
+        f"({result['measured_ms']} ms por hash, objetivo {result['target_ms']} ms)"
+    )
+    print(f"{COST_SETTINGS[result['scheme']]}={result['cost']}")
+
+
+if __name__ == "__main__":
+    main()
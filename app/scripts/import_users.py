@@ -0,0 +1,50 @@
+# app/scripts/import_users.py
+"""Alta masiva de usuarios desde un archivo NDJSON o CSV.
+
+    python -m app.scripts.import_users alumnos.csv --format csv --welcome
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.hashing import shutdown_hash_pool
+from app.db.session import async_session, engine
+from app.services.bulk import import_users
+from app.services.email import send_welcome_emails
+
+
+async def run(path: Path, fmt: str, batch_size: int, welcome: bool, report_path: Path | None) -> None:
+    content = path.read_text(encoding="utf-8-sig")
+    async with async_session() as db:
+        report, created = await import_users(db, content, fmt, batch_size)
+    print(f"{report.total} filas: {report.created} creadas, {report.failed} con error")
+    for result in report.results:
+        if result.status == "error":
+            print(f"  fila {result.row}: {result.detail}")
+    if report_path is not None:
+        report_path.write_text(json.dumps(report.model_dump(), ensure_ascii=False, indent=2), encoding="utf-8")
+    if welcome and created:
+        await send_welcome_emails(created)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa usuarios en bloque")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default=None)
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    parser.add_argument("--welcome", action="store_true", help="envía los mails de bienvenida")
+    parser.add_argument("--report", type=Path, default=None, help="guarda el reporte JSON")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    try:
+        asyncio.run(run(args.path, fmt, args.batch_size, args.welcome, args.report))
+    finally:
+        shutdown_hash_pool()
+
+
+if __name__ == "__main__":
+    main()
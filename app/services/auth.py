@@ -1,9 +1,16 @@
 # app/services/auth.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.crud.user import get_user_by_email
+from app.crud.user import get_token_version, get_user_by_email, register_failed_login
+from app.core.config import settings
+from app.core.hashing import verify_and_update_async
+from app.core.login_buffer import login_buffer
+from app.core.throttle import login_throttle
+from app.core.revocation import revocation_list
+from app.core.token_versions import token_versions
 from app.core.security import (
-    verify_password,
     create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
     create_password_reset_token,
     verify_password_reset_token,
 )
@@ -21,46 +28,74 @@ MAX_ATTEMPTS = int(os.getenv("MAX_ATTEMPTS", 3))
 LOCKOUT_TIME = timedelta(minutes=int(os.getenv("LOCKOUT_MINUTES", 15)))
 
 
-async def login_user(form_data, db: AsyncSession):
+def _locked_out() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Demasiados intentos fallidos. Intenta de nuevo en unos minutos."
+    )
+
+
+async def login_user(form_data, db: AsyncSession, client_ip: str | None = None):
+    # Antes de cualquier consulta o hash
+    throttled = settings.THROTTLE_ENABLED
+    if throttled:
+        await login_throttle.check(form_data.email, client_ip)
+
     user = await get_user_by_email(db, form_data.email)
     if not user:
+        if throttled:
+            await login_throttle.record_failure(form_data.email, client_ip)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    # Antes de tocar nada: ¿hay contadores de fallos para limpiar en la base?
+    clean = not user.failed_login_attempts and user.last_failed_login is None
 
-    # Chequeo de intentos fallidos previos
+    # Chequeo de intentos fallidos previos (evita el hash si ya está bloqueado;
+    # si se venció el castigo, el contador se reinicia al escribir)
     if getattr(user, "failed_login_attempts", 0) >= MAX_ATTEMPTS:
         last_fail = getattr(user, "last_failed_login", None)
         if last_fail and datetime.utcnow() - last_fail < LOCKOUT_TIME:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Demasiados intentos fallidos. Intenta de nuevo en unos minutos."
-            )
-        else:
-            # Se venció el castigo
-            user.failed_login_attempts = 0
-            user.last_failed_login = None
+            raise _locked_out()
 
     # Verificar contraseña
     hashed_password = cast(str, user.password_hash)
-    if not verify_password(form_data.password, hashed_password):
-        user.failed_login_attempts = getattr(user, "failed_login_attempts", 0) + 1
-        user.last_failed_login = datetime.utcnow()
-        db.add(user)
-        await db.commit()
+    verified, new_hash = await verify_and_update_async(form_data.password, hashed_password)
+    if not verified:
+        if throttled:
+            await login_throttle.record_failure(form_data.email, client_ip)
+        # Incremento y chequeo del bloqueo en la base, en una sola sentencia
+        attempts = await register_failed_login(db, user.id, MAX_ATTEMPTS, LOCKOUT_TIME)
+        if attempts is None:
+            # Otro request concurrente completó el bloqueo mientras verificábamos
+            raise _locked_out()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
     # Login exitoso → resetear contador y actualizar login
-    user.failed_login_attempts = 0
-    user.last_failed_login = None
-    user.last_login = datetime.utcnow()
-    db.add(user)
-    await db.commit()
+    logged_at = datetime.utcnow()
+    # Sin rehash ni contadores que limpiar sólo cambia last_login: puede esperar al próximo lote
+    buffered = (
+        settings.LOGIN_WRITE_BEHIND and clean and not new_hash
+        and login_buffer.record(user.id, logged_at)
+    )
+    if not buffered:
+        if new_hash:
+            # Hash con esquema/costo viejo: se guarda el nuevo en el mismo commit
+            user.password_hash = new_hash
+        user.failed_login_attempts = 0
+        user.last_failed_login = None
+        user.last_login = logged_at
+        db.add(user)
+        await db.commit()
+        login_buffer.discard(user.id)
 
-    logging.info(f"[LOGIN] Usuario {user.email} inició sesión exitosamente a las {user.last_login}.")
+    if throttled:
+        await login_throttle.record_success(form_data.email, client_ip)
+    logging.info(f"[LOGIN] Usuario {user.email} inició sesión exitosamente a las {logged_at}.")
 
     token_data = {
         "sub": user.email,
         "user_id": user.id,
-        "user_role": user.rol
+        "user_role": user.rol,
+        "ver": user.token_version,
     }
     access_token = create_access_token(data=token_data)
 
@@ -69,8 +104,56 @@ async def login_user(form_data, db: AsyncSession):
         access_token=access_token,
         token_type="bearer",
         user_id=user.id,
-        user_role=user.rol
+        user_role=user.rol,
+        refresh_token=create_refresh_token(token_data),
+    )
+
+
+async def _version_is_current(db: AsyncSession, user_id: int, version: int | None) -> bool:
+    # Un cambio de rol sube token_version: el refresh con el rol viejo deja de valer
+    if version is None:
+        return False
+    if settings.AUTH_STATELESS:
+        await token_versions.ensure_fresh(db)
+        return token_versions.is_current(user_id, version)
+    return await get_token_version(db, user_id) == version
+
+
+async def refresh_access_token(request, db: AsyncSession):
+    # Sin bcrypt ni cargar el usuario: el filtro de revocación y token_version
+    payload = decode_refresh_token(request.refresh_token)
+    if (
+        payload is None
+        or await revocation_list.is_revoked(db, payload["jti"], payload["user_id"], payload["iat"])
+        or not await _version_is_current(db, payload["user_id"], payload.get("ver"))
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token inválido o revocado")
+
+    token_data = {
+        "sub": payload["sub"],
+        "user_id": payload["user_id"],
+        "user_role": payload["user_role"],
+        "ver": payload.get("ver"),
+    }
+    from app.schemas.token import Token
+    return Token(
+        access_token=create_access_token(data=token_data),
+        token_type="bearer",
+        user_id=payload["user_id"],
+        user_role=payload["user_role"],
+        refresh_token=request.refresh_token,
+    )
+
+
+async def logout_process(request, db: AsyncSession):
+    payload = decode_refresh_token(request.refresh_token)
+    if payload is None:
+        raise HTTPException(status_code=400, detail="Token inválido o expirado")
+
+    await revocation_list.revoke_token(
+        db, payload["jti"], payload["user_id"], datetime.utcfromtimestamp(payload["exp"])
     )
+    return {"message": "Sesión cerrada"}
 
 
 async def forgot_password_process(request, db: AsyncSession):
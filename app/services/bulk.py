@@ -0,0 +1,247 @@
+# services/bulk.py
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.hashing import hash_many_async
+from app.core.search import user_search
+from app.core.token_versions import token_versions
+from app.db.errors import unique_violation
+from app.db.models.user import User
+from app.crud.user import (
+    bulk_delete_users,
+    bulk_insert_users,
+    bulk_update_users,
+    count_users,
+    filter_conditions,
+    get_existing_identities,
+)
+from app.schemas.user import (
+    BulkDeleteRequest,
+    BulkImportReport,
+    BulkResult,
+    BulkRowResult,
+    BulkUpdateRequest,
+    UserCreate,
+    UserFilter,
+)
+from app.services.users import CONFLICT_MESSAGES
+
+# Reintentos de un lote cuando el pool de hashing rechaza por saturación (503)
+HASH_RETRIES = 3
+
+
+def parse_rows(content: str, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Devuelve ``(número de fila, datos, error)`` por cada registro del archivo."""
+    if fmt == "csv":
+        for number, data in enumerate(csv.DictReader(io.StringIO(content)), start=1):
+            # DictReader junta las columnas de más bajo la clave None
+            if None in data:
+                yield number, None, "La fila tiene más columnas que el encabezado"
+                continue
+            yield number, data, None
+        return
+    for number, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, "JSON inválido"
+            continue
+        if not isinstance(data, dict):
+            yield number, None, "Se esperaba un objeto JSON"
+            continue
+        yield number, data, None
+
+
+def _validation_detail(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}" if field else first["msg"]
+
+
+def _integrity_detail(error: IntegrityError) -> str:
+    field = unique_violation(error, User.__table__)
+    return CONFLICT_MESSAGES.get(field, "Error al crear usuario.")
+
+
+class _Importer:
+    def __init__(self, db: AsyncSession, batch_size: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.results: list[BulkRowResult] = []
+        self.created: list[tuple[str, str]] = []
+        # Para detectar repetidos dentro del mismo archivo
+        self.seen_emails: set[str] = set()
+        self.seen_dnis: set[str] = set()
+
+    def fail(self, number: int, detail: str, email=None) -> None:
+        # El email del archivo puede venir con cualquier tipo (p. ej. un número en NDJSON)
+        email = email if isinstance(email, str) else None
+        self.results.append(BulkRowResult(row=number, status="error", email=email, detail=detail))
+
+    async def run(self, rows: Iterator[tuple[int, dict | None, str | None]]) -> None:
+        batch: list[tuple[int, UserCreate]] = []
+        for number, data, error in rows:
+            if error is not None:
+                self.fail(number, error)
+                continue
+            try:
+                user_in = UserCreate(**data)
+            except ValidationError as e:
+                self.fail(number, _validation_detail(e), data.get("email"))
+                continue
+            user_in.email = user_in.email.lower()
+            if user_in.email in self.seen_emails:
+                self.fail(number, "Email repetido en el archivo.", user_in.email)
+                continue
+            if user_in.dni in self.seen_dnis:
+                self.fail(number, "DNI repetido en el archivo.", user_in.email)
+                continue
+            self.seen_emails.add(user_in.email)
+            self.seen_dnis.add(user_in.dni)
+            batch.append((number, user_in))
+            if len(batch) >= self.batch_size:
+                await self.flush(batch)
+                batch = []
+        await self.flush(batch)
+
+    async def flush(self, batch: list[tuple[int, UserCreate]]) -> None:
+        if not batch:
+            return
+        emails, dnis = await get_existing_identities(
+            self.db, [u.email for _, u in batch], [u.dni for _, u in batch]
+        )
+        pending: list[tuple[int, UserCreate]] = []
+        for number, user_in in batch:
+            if user_in.email in emails:
+                self.fail(number, "Email ya registrado.", user_in.email)
+            elif user_in.dni in dnis:
+                self.fail(number, "DNI ya registrado.", user_in.email)
+            else:
+                pending.append((number, user_in))
+        if not pending:
+            return
+
+        hashes = await self.hash_batch(pending)
+        if hashes is None:
+            for number, user_in in pending:
+                self.fail(number, "Servidor ocupado, no se pudo procesar la fila.", user_in.email)
+            return
+        now = datetime.utcnow()
+        rows = [
+            {
+                **user_in.model_dump(exclude={"password"}),
+                "password_hash": password_hash,
+                "created_at": now,
+                "updated_at": now,
+                "failed_login_attempts": 0,
+                "token_version": 0,
+            }
+            for (_, user_in), password_hash in zip(pending, hashes)
+        ]
+        try:
+            await bulk_insert_users(self.db, rows)
+            await self.db.commit()
+        except IntegrityError:
+            # Alguien dio de alta uno de estos entre el chequeo y el insert:
+            # se reintenta fila por fila para identificar cuál
+            await self.db.rollback()
+            await self.flush_one_by_one(pending, rows)
+            return
+        # El insert masivo no devuelve ids: el índice de búsqueda y el mapa de versiones los leen por email
+        created = User.email.in_([u.email for _, u in pending])
+        await user_search.refresh(self.db, created)
+        await token_versions.refresh(self.db, created)
+        for number, user_in in pending:
+            self.created_row(number, user_in)
+
+    async def hash_batch(self, pending: list[tuple[int, UserCreate]]) -> list[str] | None:
+        # Los lotes anteriores ya están commiteados: un 503 por una ráfaga de
+        # logins no puede cortar el import sin reporte. Se reintenta y, si
+        # sigue saturado, el lote queda como error y se sigue con el próximo.
+        for attempt in range(HASH_RETRIES):
+            try:
+                return await hash_many_async([u.password for _, u in pending])
+            except HTTPException as e:
+                if e.status_code != 503:
+                    raise
+                if attempt + 1 < HASH_RETRIES:
+                    await asyncio.sleep(int((e.headers or {}).get("Retry-After", 1)))
+        return None
+
+    async def flush_one_by_one(self, pending: list[tuple[int, UserCreate]], rows: list[dict]) -> None:
+        for (number, user_in), row in zip(pending, rows):
+            try:
+                await bulk_insert_users(self.db, [row])
+                await self.db.commit()
+            except IntegrityError as e:
+                await self.db.rollback()
+                self.fail(number, _integrity_detail(e), user_in.email)
+                continue
+            await user_search.refresh(self.db, User.email == user_in.email)
+            await token_versions.refresh(self.db, User.email == user_in.email)
+            self.created_row(number, user_in)
+
+    def created_row(self, number: int, user_in: UserCreate) -> None:
+        self.results.append(BulkRowResult(row=number, status="created", email=user_in.email))
+        self.created.append((user_in.email, user_in.nombres))
+
+
+async def import_users(
+    db: AsyncSession, content: str, fmt: str, batch_size: int = 1000
+) -> tuple[BulkImportReport, list[tuple[str, str]]]:
+    """Alta masiva desde NDJSON o CSV.
+
+    Devuelve el reporte por fila y los ``(email, nombres)`` creados, para
+    encolar los mails de bienvenida.
+    """
+    importer = _Importer(db, batch_size)
+    await importer.run(parse_rows(content, fmt))
+    results = sorted(importer.results, key=lambda r: r.row)
+    created = len(importer.created)
+    report = BulkImportReport(
+        total=len(results), created=created, failed=len(results) - created, results=results
+    )
+    return report, importer.created
+
+
+def _conditions(user_filter: UserFilter, current_user_id: int) -> list:
+    if not user_filter.model_dump(exclude_none=True):
+        raise HTTPException(status_code=400, detail="Hay que indicar al menos un filtro.")
+    # El administrador que opera nunca queda incluido (igual que en la baja individual)
+    return filter_conditions(user_filter, exclude_id=current_user_id)
+
+
+async def bulk_update_service(
+    db: AsyncSession, request: BulkUpdateRequest, current_user_id: int, chunk_size: int = 500
+) -> BulkResult:
+    values = request.patch.model_dump(exclude_none=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="No hay cambios para aplicar.")
+    conditions = _conditions(request.filter, current_user_id)
+    matched = await count_users(db, conditions)
+    if request.dry_run:
+        return BulkResult(matched=matched, affected=0, chunks=0, dry_run=True)
+    affected, chunks = await bulk_update_users(db, conditions, values, chunk_size)
+    return BulkResult(matched=matched, affected=affected, chunks=chunks, dry_run=False)
+
+
+async def bulk_delete_service(
+    db: AsyncSession, request: BulkDeleteRequest, current_user_id: int, chunk_size: int = 500
+) -> BulkResult:
+    conditions = _conditions(request.filter, current_user_id)
+    matched = await count_users(db, conditions)
+    if request.dry_run:
+        return BulkResult(matched=matched, affected=0, chunks=0, dry_run=True)
+    affected, chunks = await bulk_delete_users(db, conditions, chunk_size)
+    return BulkResult(matched=matched, affected=affected, chunks=chunks, dry_run=False)
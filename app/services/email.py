@@ -1,3 +1,4 @@
+import logging
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from pydantic import EmailStr
 from app.core.config import settings
@@ -35,4 +36,12 @@ async def send_welcome_email(to_email: EmailStr, name: str):
     )
 
     fm = FastMail(conf)
-    await fm.send_message(message)
\ No newline at end of file
+    await fm.send_message(message)
+
+async def send_welcome_emails(recipients: list[tuple[str, str]]):
+    # Altas masivas: se envían de a uno en segundo plano; un fallo no corta el resto
+    for to_email, name in recipients:
+        try:
+            await send_welcome_email(to_email, name)
+        except Exception as e:
+            logging.warning(f"[EMAIL] No se pudo enviar la bienvenida a {to_email}: {e}")
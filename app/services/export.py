@@ -0,0 +1,51 @@
+# services/export.py
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.crud.user import EXPORT_COLUMNS, stream_users
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _plain(value):
+    # Enum -> valor, date -> ISO
+    if hasattr(value, "value"):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def _ndjson_batch(rows: list[Row]) -> bytes:
+    lines = [
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain, row))), ensure_ascii=False)
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+def _csv_batch(rows: list[Row]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([[_plain(value) for value in row] for row in rows])
+    return buffer.getvalue().encode()
+
+async def export_users(session_maker: async_sessionmaker, fmt: str, batch_size: int) -> AsyncIterator[bytes]:
+    """Genera el export por lotes de ``batch_size`` filas.
+
+    Cada lote se serializa y se entrega entero; el siguiente no se lee
+    de la base hasta que el cliente consumió el anterior.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue().encode()
+    serialize = _csv_batch if fmt == "csv" else _ndjson_batch
+
+    async with session_maker() as db:
+        async for rows in stream_users(db, batch_size):
+            yield serialize(rows)
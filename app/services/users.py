@@ -1,51 +1,50 @@
 # services/users.py
+from datetime import datetime
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row
 from sqlalchemy.future import select
-from passlib.context import CryptContext
 from sqlalchemy.exc import IntegrityError
-from app.core.security import verify_password
+from app.core.etags import etag_matches, user_etag
+from app.core.hashing import hash_async, verify_async
+from app.core.search import user_search
+from app.db.errors import unique_violation
 from app.db.models.user import User
 from app.schemas.user import UserCreate
-from datetime import datetime
 from app.crud.user import (
-    get_user_by_email as crud_get_user_by_email,
-    get_user_by_dni,
+    filter_conditions,
+    parse_fields,
     get_users,
+    get_users_keyset,
+    get_users_by_ids,
     get_user,
+    get_user_version,
     create_user as crud_create_user,
+    update_password_hash,
     update_user,
     delete_user
 )
-from app.schemas.user import UserCreate, UserUpdate
-
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.schemas.user import UserCreate, UserFilter, UserUpdate
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     normalized_email = email.lower()
     result = await db.execute(select(User).where(User.email == normalized_email))
     return result.scalars().first()
 
-async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
-    user_data = user_in.model_dump(exclude={"password"})
-    user_data["email"] = user_data["email"].lower()
-    hashed_password = pwd_context.hash(user_in.password)
-    user_data["password_hash"] = hashed_password
-    db_user = User(**user_data)
-    db.add(db_user)
+# Mensajes por columna de la restricción única violada
+CONFLICT_MESSAGES = {"email": "Email ya registrado.", "dni": "DNI ya registrado."}
+SERVICE_CONFLICT_MESSAGES = {"email": "Email already registered", "dni": "DNI already registered"}
+
+async def _create_or_400(db: AsyncSession, user_in: UserCreate, messages: dict[str, str]) -> User:
     try:
-        await db.commit()
-        await db.refresh(db_user)
+        return await crud_create_user(db, user_in)
     except IntegrityError as e:
         await db.rollback()
-        detail = "Error al crear usuario."
-        if "dni" in str(e.orig).lower():
-            detail = "DNI ya registrado."
-        elif "email" in str(e.orig).lower():
-            detail = "Email ya registrado."
-        raise HTTPException(status_code=400, detail=detail)
-    return db_user
+        field = unique_violation(e, User.__table__)
+        raise HTTPException(status_code=400, detail=messages.get(field, "Error al crear usuario."))
+
+async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
+    return await _create_or_400(db, user_in, CONFLICT_MESSAGES)
 
 async def update_user_password(
     db: AsyncSession,
@@ -57,45 +56,82 @@ async def update_user_password(
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    if not verify_password(current_password, user.password_hash):
+    if not await verify_async(current_password, user.password_hash):
         raise HTTPException(status_code=403, detail="Contraseña actual incorrecta")
 
-    user.password_hash = pwd_context.hash(new_password)
-    user.last_password_change = datetime.utcnow()  # ⬅️ acá se actualiza el campo
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    # Condicionado al hash leído: si otro cambio se adelantó, no se pisa
+    hashed_new = await hash_async(new_password)
+    updated = await update_password_hash(
+        db, (User.id == user_id) & (User.password_hash == user.password_hash), hashed_new
+    )
+    if updated is None:
+        raise HTTPException(status_code=409, detail="La contraseña cambió mientras tanto, intenta de nuevo")
 
 async def update_user_password_by_email(db: AsyncSession, email: str, new_password: str):
-    user = await get_user_by_email(db, email.lower())  # 👈 normalizar
+    hashed_new = await hash_async(new_password)
+    user = await update_password_hash(db, User.email == email.lower(), hashed_new)  # 👈 normalizar
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    hashed_new = pwd_context.hash(new_password)
-    user.password_hash = hashed_new  # type: ignore
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
     return user
 
 async def create_user_service(db: AsyncSession, user_in: UserCreate) -> User:
-    existing_email = await crud_get_user_by_email(db, user_in.email)
-    if existing_email:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    # Sin consultas previas: el duplicado lo detecta la restricción única, sin carrera
+    return await _create_or_400(db, user_in, SERVICE_CONFLICT_MESSAGES)
+
+def _fields_or_400(fields: str | None) -> tuple[str, ...]:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    existing_dni = await get_user_by_dni(db, user_in.dni)
-    if existing_dni:
-        raise HTTPException(status_code=400, detail="DNI already registered")
+async def get_users_service(
+    db: AsyncSession, skip: int = 0, limit: int = 100, user_filter: UserFilter | None = None,
+    fields: str | None = None,
+) -> list[Row]:
+    conditions = filter_conditions(user_filter) if user_filter else None
+    return await get_users(db, skip, limit, conditions, _fields_or_400(fields))
 
-    return await crud_create_user(db, user_in)
+async def get_users_page_service(
+    db: AsyncSession, limit: int = 100, sort: str = "id", cursor: str | None = None,
+    user_filter: UserFilter | None = None, fields: str | None = None,
+) -> tuple[list[Row], str | None]:
+    conditions = filter_conditions(user_filter) if user_filter else None
+    columns = _fields_or_400(fields)
+    try:
+        return await get_users_keyset(db, limit, sort, cursor, conditions, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def search_users_service(db: AsyncSession, query: str, limit: int = 20) -> list[Row]:
+    if not user_search.ready:
+        raise HTTPException(status_code=503, detail="El índice de búsqueda todavía se está armando.")
+    hits = user_search.search(query, limit)
+    users = {row.id: row for row in await get_users_by_ids(db, [user_id for user_id, _ in hits])}
+    # En el orden del índice; si otro worker lo borró, ya no está en la tabla
+    return [users[user_id] for user_id, _ in hits if user_id in users]
 
-async def get_users_service(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[User]:
-    return await get_users(db, skip, limit)
+async def get_user_service(db: AsyncSession, user_id: int, fields: str | None = None) -> Row | None:
+    return await get_user(db, user_id, fields=_fields_or_400(fields))
 
-async def get_user_service(db: AsyncSession, user_id: int) -> User | None:
-    return await get_user(db, user_id)
+async def get_user_version_service(db: AsyncSession, user_id: int) -> datetime | None:
+    return await get_user_version(db, user_id)
 
-async def update_user_service(db: AsyncSession, user_id: int, user_in: UserUpdate) -> User | None:
-    return await update_user(db, user_id, user_in)
+async def update_user_service(
+    db: AsyncSession, user_id: int, user_in: UserUpdate, if_match: str | None = None
+) -> User | None:
+    if if_match is None:
+        return await update_user(db, user_id, user_in)
+    version = await get_user_version(db, user_id)
+    if version is None:
+        return None
+    # If-Match se compara con el ETag de la representación completa (sin fields)
+    if not etag_matches(if_match, user_etag(user_id, version)):
+        raise HTTPException(status_code=412, detail="El usuario cambió desde que se leyó.")
+    user = await update_user(db, user_id, user_in, expected_version=version)
+    if user is None:
+        # Otro cambio entró entre la lectura de la versión y el UPDATE
+        raise HTTPException(status_code=412, detail="El usuario cambió desde que se leyó.")
+    return user
 
 async def delete_user_service(db: AsyncSession, user_id: int) -> bool:
     return await delete_user(db, user_id)
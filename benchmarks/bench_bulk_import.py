@@ -0,0 +1,75 @@
+# benchmarks/bench_bulk_import.py
+"""Filas por segundo de la importación masiva contra altas una por una.
+
+Usa un SQLite temporal; ``--rounds`` baja el costo de bcrypt para medir
+el resto del camino (con el costo real domina el hashing).
+
+    python -m benchmarks.bench_bulk_import --rows 5000 --rounds 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import hashing
+from app.db.base import Base
+from app.schemas.user import UserCreate
+from app.services.bulk import import_users
+from app.services.users import create_user
+
+
+def _rows(count: int, offset: int) -> list[dict]:
+    return [
+        {
+            "nombres": f"Alumno{i}",
+            "apellidos": "Bench",
+            "dni": f"{i:010d}",
+            "fecha_nacimiento": "2005-01-01",
+            "email": f"alumno{i}@example.com",
+            "password": "Password123",
+            "rol": "ALUMNO",
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+async def main(rows: int, sequential: int, batch_size: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await hashing.start_hash_pool()
+
+    async with session_maker() as db:
+        start = time.perf_counter()
+        for data in _rows(sequential, 0):
+            await create_user(db, UserCreate(**data))
+        elapsed = time.perf_counter() - start
+    print(f"POST /users uno por uno: {sequential / elapsed:10.1f} filas/s ({sequential} filas)")
+
+    content = "\n".join(json.dumps(row) for row in _rows(rows, sequential))
+    async with session_maker() as db:
+        start = time.perf_counter()
+        report, _ = await import_users(db, content, "ndjson", batch_size)
+        elapsed = time.perf_counter() - start
+    print(f"POST /users/bulk:        {report.created / elapsed:10.1f} filas/s ({report.created} filas, lotes de {batch_size})")
+
+    hashing.shutdown_hash_pool()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--sequential", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=None, help="costo de bcrypt para el benchmark")
+    args = parser.parse_args()
+    if args.rounds is not None:
+        hashing.configure({"bcrypt": args.rounds})
+    asyncio.run(main(args.rows, args.sequential, args.batch_size))
@@ -0,0 +1,104 @@
+# benchmarks/bench_login_latency.py
+"""p99 de ``GET /users/{id}`` mientras corren logins concurrentes.
+
+Compara el hashing en el pool de procesos contra bcrypt ejecutado dentro
+del event loop (el comportamiento anterior).
+
+    python -m benchmarks.bench_login_latency --logins 4 --duration 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+from unittest.mock import patch
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core import hashing
+from app.core.security import create_access_token, pwd_context
+from app.crud.user import create_user
+from app.db.base import Base
+from app.db.session import get_session
+from app.main import app
+from app.schemas.user import UserCreate, UserRole
+
+
+async def _blocking_verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def _setup():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_maker() as db:
+        user = await create_user(db, UserCreate(
+            nombres="Bench",
+            apellidos="User",
+            dni="10000000",
+            fecha_nacimiento=date(1990, 1, 1),
+            email="bench@example.com",
+            password="Password123",
+            rol=UserRole.ADMIN,
+        ))
+    return user
+
+
+async def _run(user_id: int, logins: int, duration: float) -> list[float]:
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench@example.com'})}"}
+    latencies: list[float] = []
+    stop = time.perf_counter() + duration
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def login_loop():
+            while time.perf_counter() < stop:
+                await client.post("/auth/login", json={"email": "bench@example.com", "password": "Password123"})
+
+        async def read_loop():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                await client.get(f"/users/{user_id}", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(read_loop(), *(login_loop() for _ in range(logins)))
+    return latencies
+
+
+def _report(label: str, latencies: list[float]) -> None:
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<8} lecturas={len(latencies):>5}  p50={statistics.median(latencies):8.1f} ms  p99={p99:8.1f} ms")
+
+
+async def main(logins: int, duration: float) -> None:
+    user = await _setup()
+    await hashing.start_hash_pool()
+
+    with patch("app.services.auth.verify_async", _blocking_verify):
+        _report("inline", await _run(user.id, logins, duration))
+    _report("pool", await _run(user.id, logins, duration))
+
+    hashing.shutdown_hash_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=4, help="logins concurrentes")
+    parser.add_argument("--duration", type=float, default=5.0, help="segundos por escenario")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.duration))
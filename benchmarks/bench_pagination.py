@@ -0,0 +1,86 @@
+# benchmarks/bench_pagination.py
+"""Latencia de una página de ``users`` a distintas profundidades: OFFSET vs cursor.
+
+Carga la tabla en un SQLite temporal (sin bcrypt, con un hash fijo).
+
+    python -m benchmarks.bench_pagination --rows 1001000 --depths 1000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.crud.user import encode_cursor, get_users, get_users_keyset
+from app.db.base import Base
+from app.db.models.user import User
+
+BATCH = 50_000
+
+
+async def _load(session_maker, rows: int) -> None:
+    start = datetime(2020, 1, 1)
+    async with session_maker() as db:
+        for offset in range(0, rows, BATCH):
+            await db.execute(insert(User), [
+                {
+                    "nombres": f"Nombre{i}",
+                    "apellidos": f"Apellido{i % 5000:05d}",
+                    "dni": f"{i:010d}",
+                    "fecha_nacimiento": date(1990, 1, 1),
+                    "email": f"user{i}@example.com",
+                    "rol": "ALUMNO",
+                    "password_hash": "x",
+                    "created_at": start + timedelta(seconds=i),
+                    "updated_at": start + timedelta(seconds=i),
+                    "failed_login_attempts": 0,
+                    "token_version": 0,
+                }
+                for i in range(offset, min(offset + BATCH, rows))
+            ])
+        await db.commit()
+
+
+async def _timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+async def main(rows: int, depths: list[int], limit: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    print(f"Cargando {rows:,} usuarios...")
+    await _load(session_maker, rows)
+
+    print(f"{'profundidad':>12} {'offset ms':>10} {'cursor ms':>10}")
+    async with session_maker() as db:
+        for depth in depths:
+            if depth + limit > rows:
+                print(f"{depth:>12,} (sin filas suficientes)")
+                continue
+            # El cursor apunta a la última fila de la página anterior
+            cursor = encode_cursor("id", depth, depth)
+            offset_ms = await _timed(lambda: get_users(db, skip=depth, limit=limit))
+            keyset_ms = await _timed(lambda: get_users_keyset(db, limit=limit, sort="id", cursor=cursor))
+            print(f"{depth:>12,} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_001_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.depths, args.limit))
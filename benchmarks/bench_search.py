@@ -0,0 +1,75 @@
+# benchmarks/bench_search.py
+"""Latencia de ``UserSearchIndex.search`` y memoria del índice con muchos usuarios.
+
+Arma el índice directo en memoria (sin base), con nombres y apellidos
+sintéticos, y mide consultas típicas de soporte: prefijo de apellido,
+nombre + apellido y prefijo de DNI.
+
+    python -m benchmarks.bench_search --users 1000000
+"""
+import argparse
+import random
+import resource
+import statistics
+import time
+
+from app.core.search import UserSearchIndex
+
+NOMBRES = ["Juan", "María", "José", "Ana", "Lucía", "Martín", "Sofía", "Diego", "Valentina", "Tomás",
+           "Camila", "Mateo", "Julieta", "Nicolás", "Agustina", "Joaquín", "Florencia", "Iván"]
+SILABAS = ["gar", "cí", "ro", "dri", "guez", "fer", "nán", "dez", "lo", "pez", "mar", "tí", "nez",
+           "go", "mez", "sán", "chez", "pé", "rez", "ál", "va", "ro", "ben", "ítez", "su", "á", "rez"]
+
+
+def _apellido(rng: random.Random) -> str:
+    return "".join(rng.choice(SILABAS) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(users: int, queries: int) -> None:
+    rng = random.Random(42)
+    index = UserSearchIndex(max_words=12, max_candidates=500)
+    apellidos = [f"{_apellido(rng)} {_apellido(rng)}" for _ in range(users)]
+    nombres = [rng.choice(NOMBRES) for _ in range(users)]
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    index.load(
+        (user_id, nombres[user_id - 1], apellidos[user_id - 1], f"{20_000_000 + user_id}",
+         f"{nombres[user_id - 1]}.{user_id}@example.com")
+        for user_id in range(1, users + 1)
+    )
+    build_s = time.perf_counter() - start
+    metrics = index.metrics()
+    print(f"{users:,} usuarios en {build_s:.1f} s; {metrics['words']:,} palabras distintas,"
+          f" ~{_max_rss_mb() - rss_before:,.0f} MB")
+
+    cases = {
+        "apellido completo": lambda: apellidos[rng.randrange(users)].split()[0],
+        "prefijo de apellido (4)": lambda: apellidos[rng.randrange(users)][:4],
+        "nombre + apellido": lambda: f"{rng.choice(NOMBRES)} {apellidos[rng.randrange(users)].split()[1]}",
+        "prefijo de DNI (6)": lambda: str(20_000_000 + rng.randrange(1, users))[:6],
+    }
+    print(f"{'consulta':<26} {'p50 µs':>8} {'p99 µs':>8} {'resultados':>11}")
+    for name, make_query in cases.items():
+        timings, found = [], []
+        for _ in range(queries):
+            query = make_query()
+            t0 = time.perf_counter()
+            hits = index.search(query)
+            timings.append((time.perf_counter() - t0) * 1_000_000)
+            found.append(len(hits))
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"{name:<26} {statistics.median(timings):>8.0f} {p99:>8.0f} {statistics.mean(found):>11.1f}")
+    print(f"consultas recortadas: {index.truncated}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.users, args.queries)
@@ -0,0 +1,45 @@
+# benchmarks/bench_token_decode.py
+"""Throughput de ``decode_access_token`` con y sin el cache de tokens.
+
+    python -m benchmarks.bench_token_decode --tokens 50 --calls 20000
+"""
+import argparse
+import time
+
+from app.core import security
+
+
+def _run(tokens: list[str], calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        security.decode_access_token(tokens[i % len(tokens)])
+    return calls / (time.perf_counter() - start)
+
+
+def main(n_tokens: int, calls: int) -> None:
+    tokens = [
+        security.create_access_token({"sub": f"user{i}@example.com", "user_id": i, "user_role": "ALUMNO"})
+        for i in range(n_tokens)
+    ]
+
+    ttl = security.token_cache.ttl
+    security.token_cache.ttl = 0
+    security.token_cache.clear()
+    without_cache = _run(tokens, calls)
+
+    security.token_cache.ttl = ttl
+    security.token_cache.clear()
+    security.token_cache.hits = security.token_cache.misses = 0
+    with_cache = _run(tokens, calls)
+
+    print(f"sin cache  {without_cache:12,.0f} decodes/s")
+    print(f"con cache  {with_cache:12,.0f} decodes/s  (x{with_cache / without_cache:.1f})")
+    print(f"hit rate   {security.token_cache.metrics()['hit_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=50, help="tokens distintos en rotación")
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.tokens, args.calls)
@@ -0,0 +1,106 @@
+# benchmarks/bench_user_filters.py
+"""Plan y latencia de cada filtro de ``GET /users`` sobre una tabla grande.
+
+Carga la tabla en un SQLite temporal (sin bcrypt, con un hash fijo) y, por
+cada filtro, muestra el índice que elige el planner (``EXPLAIN QUERY PLAN``)
+y el mejor tiempo de la primera página.
+
+    python -m benchmarks.bench_user_filters --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.crud.user import filter_conditions, get_users
+from app.db.base import Base
+from app.db.models.user import User
+from app.schemas.user import UserFilter, UserRole
+
+BATCH = 50_000
+START = datetime(2020, 1, 1)
+ROLES = [UserRole.ALUMNO] * 18 + [UserRole.DOCENTE, UserRole.ADMIN]
+
+
+async def _load(session_maker, rows: int) -> None:
+    async with session_maker() as db:
+        for offset in range(0, rows, BATCH):
+            await db.execute(insert(User), [
+                {
+                    "nombres": f"Nombre{i}",
+                    "apellidos": f"Apellido{i % 5000:05d}",
+                    "dni": f"{i:010d}",
+                    "fecha_nacimiento": date(1990, 1, 1),
+                    "email": f"user{i}@example.com",
+                    "rol": ROLES[i % len(ROLES)].value,
+                    "password_hash": "x",
+                    "created_at": START + timedelta(seconds=i),
+                    "updated_at": START + timedelta(seconds=i),
+                    # Uno de cada mil nunca entró; el resto, repartido en el último año
+                    "last_login": None if i % 1000 == 0 else START + timedelta(days=365 + i % 365),
+                    "failed_login_attempts": 0,
+                    "token_version": 0,
+                }
+                for i in range(offset, min(offset + BATCH, rows))
+            ])
+        await db.commit()
+
+
+async def _plan(conn, user_filter: UserFilter, limit: int) -> str:
+    stmt = select(User).where(*filter_conditions(user_filter)).order_by(User.id).limit(limit)
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return "; ".join(row[-1] for row in result)
+
+
+async def _timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+async def main(rows: int, limit: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    print(f"Cargando {rows:,} usuarios...")
+    await _load(session_maker, rows)
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+
+    middle = START + timedelta(seconds=rows // 2)
+    filters = {
+        "rol=DOCENTE": UserFilter(rol=UserRole.DOCENTE),
+        "created_at (1 día)": UserFilter(created_from=middle, created_to=middle + timedelta(days=1)),
+        "inactivos (desde el 1er día)": UserFilter(inactive_since=START + timedelta(days=366)),
+        "apellidos 'Apellido012'": UserFilter(apellidos_prefix="Apellido012"),
+    }
+
+    print(f"{'filtro':<26} {'ms':>8}  plan")
+    async with session_maker() as db:
+        for name, user_filter in filters.items():
+            conn = await db.connection()
+            plan = await _plan(conn, user_filter, limit)
+            conditions = filter_conditions(user_filter)
+            ms = await _timed(lambda: get_users(db, limit=limit, conditions=conditions))
+            print(f"{name:<26} {ms:>8.2f}  {plan}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit))
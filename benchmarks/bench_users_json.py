@@ -0,0 +1,99 @@
+# benchmarks/bench_users_json.py
+"""Throughput de ``GET /users?limit=1000`` con y sin ``FAST_JSON``.
+
+Carga la tabla en un SQLite temporal (sin bcrypt, con un hash fijo) y
+llama a la app en proceso (sin red), con el usuario autenticado fijo.
+
+    python -m benchmarks.bench_users_json --rows 5000 --limit 1000 --requests 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import date, datetime
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.dependencies import get_current_user
+from app.db.base import Base
+from app.db.models.user import User
+from app.db.session import get_read_session
+from app.main import app
+from app.schemas.user import UserRead, UserRole
+
+
+async def _load(session_maker, rows: int) -> None:
+    now = datetime.utcnow()
+    async with session_maker() as db:
+        await db.execute(insert(User), [
+            {
+                "nombres": f"Nombre{i}",
+                "apellidos": f"Apellido Núñez {i}",
+                "dni": f"{i:010d}",
+                "fecha_nacimiento": date(1990, 1, 1),
+                "email": f"user{i}@example.com",
+                "rol": "ALUMNO",
+                "password_hash": "x",
+                "created_at": now,
+                "updated_at": now,
+                "failed_login_attempts": 0,
+                "token_version": 0,
+            }
+            for i in range(rows)
+        ])
+        await db.commit()
+
+
+async def _run(client: AsyncClient, limit: int, requests: int) -> tuple[float, int]:
+    # Una de calentamiento
+    await client.get("/users/", params={"limit": limit})
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get("/users/", params={"limit": limit})
+        response.raise_for_status()
+    return requests / (time.perf_counter() - start), len(response.content)
+
+
+async def main(rows: int, limit: int, requests: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await _load(session_maker, rows)
+
+    async def read_session():
+        async with session_maker() as db:
+            yield db
+
+    async def current_user():
+        return UserRead(
+            id=1, nombres="Bench", apellidos="Bench", dni="0000000000",
+            fecha_nacimiento=date(1990, 1, 1), email="bench@example.com", rol=UserRole.ADMIN,
+        )
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.dependency_overrides[get_read_session] = read_session
+    app.dependency_overrides[get_current_user] = current_user
+    print(f"{'modo':<10} {'req/s':>8} {'filas/s':>10} {'bytes':>9}")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for fast in (False, True):
+            settings.FAST_JSON = fast
+            rps, size = await _run(client, limit, requests)
+            print(f"{'fast' if fast else 'default':<10} {rps:>8.1f} {rps * limit:>10,.0f} {size:>9,}")
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.requests))
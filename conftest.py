@@ -1,10 +1,12 @@
 # conftest.py
+import pytest
 import pytest_asyncio
 from datetime import date
 from typing import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
+from sqlalchemy import event
 
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
@@ -12,9 +14,15 @@ from httpx import AsyncClient
 from app.main import app
 from app.db.base import Base
 from app.db.models.user import User
-from app.db.session import get_session
+from app.db.session import get_read_session, get_session, get_sessionmaker, read_router
 from app.schemas.user import UserCreate, UserRole
 from app.crud.user import create_user
+from app.core.cache import principal_cache
+from app.core.token_versions import token_versions
+from app.core.revocation import revocation_list
+from app.core.login_buffer import login_buffer
+from app.core.throttle import login_throttle
+from app.core.search import user_search
 
 from httpx import AsyncClient, ASGITransport
 
@@ -35,6 +43,13 @@ TestSessionLocal = async_sessionmaker(
 
 @pytest_asyncio.fixture(scope="function", autouse=True)
 async def prepare_database():
+    principal_cache.clear()
+    token_versions.clear()
+    revocation_list.clear()
+    login_buffer.clear()
+    login_throttle.clear()
+    read_router.clear()
+    user_search.clear()
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
@@ -52,6 +67,8 @@ async def override_get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 app.dependency_overrides[get_session] = override_get_session
+app.dependency_overrides[get_read_session] = override_get_session
+app.dependency_overrides[get_sessionmaker] = lambda: TestSessionLocal
 
 @pytest_asyncio.fixture
 async def test_user(async_db: AsyncSession) -> User:
@@ -67,6 +84,27 @@ async def test_user(async_db: AsyncSession) -> User:
     user = await create_user(async_db, user_in)
     return user
 
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self):
+        self.statements.clear()
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    event.listen(test_engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(test_engine.sync_engine, "before_cursor_execute", counter)
+
 @pytest_asyncio.fixture(scope="module")
 async def async_client() -> AsyncGenerator[AsyncClient, None]:
     transport = ASGITransport(app=app)
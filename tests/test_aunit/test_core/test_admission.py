@@ -0,0 +1,75 @@
+# tests/test_core/test_admission.py
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core.admission import AdmissionLimiter
+
+@pytest.mark.asyncio
+async def test_admission_limits_in_flight():
+    limiter = AdmissionLimiter(max_in_flight=2, max_queue=10, timeout=1)
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        async with limiter.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(work() for _ in range(6)))
+
+    assert peak == 2
+    metrics = limiter.metrics()
+    assert metrics["admitted"] == 6
+    assert metrics["queued"] == 4
+    assert metrics["rejected"] == 0
+    assert metrics["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_admission_rejects_when_queue_full():
+    limiter = AdmissionLimiter(max_in_flight=1, max_queue=1, timeout=1, retry_after=3)
+    await limiter.acquire()
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers["Retry-After"] == "3"
+
+    limiter.release()
+    await waiting
+    limiter.release()
+    assert limiter.metrics()["rejected"] == 1
+    assert limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_admission_queue_timeout():
+    limiter = AdmissionLimiter(max_in_flight=1, max_queue=5, timeout=0.01)
+    await limiter.acquire()
+
+    with pytest.raises(HTTPException) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.status_code == 503
+
+    metrics = limiter.metrics()
+    assert metrics["timed_out"] == 1
+    assert metrics["waiting"] == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_admission_cancelled_waiter_leaves_queue():
+    limiter = AdmissionLimiter(max_in_flight=1, max_queue=5, timeout=1)
+    await limiter.acquire()
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert limiter.metrics()["waiting"] == 0
+    limiter.release()
+    assert limiter.in_flight == 0
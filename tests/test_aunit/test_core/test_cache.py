@@ -0,0 +1,51 @@
+# tests/test_core/test_cache.py
+from types import SimpleNamespace
+from app.core import cache
+from app.core.cache import TTLCache, PrincipalCache
+
+def test_ttl_cache_hit_and_miss():
+    c = TTLCache(maxsize=10, ttl=60)
+    assert c.get("a") is None
+    c.set("a", 1)
+    assert c.get("a") == 1
+    metrics = c.metrics()
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 1
+    assert metrics["hit_rate"] == 0.5
+
+def test_ttl_cache_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    c = TTLCache(maxsize=10, ttl=5)
+    c.set("a", 1)
+    now[0] += 6
+    assert c.get("a") is None
+    assert len(c) == 0
+
+def test_ttl_cache_lru_eviction():
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1
+    assert c.get("c") == 3
+    assert c.metrics()["evictions"] == 1
+
+def test_ttl_cache_disabled():
+    c = TTLCache(maxsize=10, ttl=0)
+    c.set("a", 1)
+    assert c.get("a") is None
+
+def test_principal_cache_invalidate_by_id_and_email():
+    c = PrincipalCache(maxsize=10, ttl=60)
+    c.set("ana@example.com", SimpleNamespace(id=1, email="ana@example.com"))
+    c.set("beto@example.com", SimpleNamespace(id=2, email="beto@example.com"))
+
+    c.invalidate(user_id=1)
+    assert c.get("ana@example.com") is None
+
+    c.invalidate(email="BETO@example.com")
+    assert c.get("beto@example.com") is None
+    assert c.metrics()["invalidations"] == 2
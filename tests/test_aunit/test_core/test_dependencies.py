@@ -58,3 +58,36 @@ async def test_get_current_user_user_not_found(monkeypatch, async_db):
     with pytest.raises(HTTPException) as excinfo:
         await dependencies.get_current_user(creds, async_db)
     assert excinfo.value.status_code == 401
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_principal_cache(monkeypatch, async_db):
+    monkeypatch.setattr(dependencies, "decode_access_token", lambda token: {"sub": "user@example.com"})
+    dummy_user = SimpleNamespace(
+        id=1,
+        nombres="Juan",
+        apellidos="Pérez",
+        dni="12345678",
+        fecha_nacimiento=date(1990, 1, 1),
+        email="user@example.com",
+        rol="ALUMNO",
+    )
+    lookup = AsyncMock(return_value=dummy_user)
+    monkeypatch.setattr(dependencies, "get_user_by_email", lookup)
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials="fake_token")
+
+    first = await dependencies.get_current_user(creds, async_db)
+    second = await dependencies.get_current_user(creds, async_db)
+
+    assert first == second
+    lookup.assert_awaited_once()
+
+    dependencies.principal_cache.invalidate(user_id=1)
+    await dependencies.get_current_user(creds, async_db)
+    assert lookup.await_count == 2
+
+def test_get_current_user_reads_from_primary():
+    # El principal se cachea: no puede venir de una réplica atrasada
+    import inspect
+    from app.db.session import get_session
+    db = inspect.signature(dependencies.get_current_user).parameters["db"].default
+    assert db.dependency is get_session
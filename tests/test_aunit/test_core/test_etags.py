@@ -0,0 +1,36 @@
+# tests/test_core/test_etags.py
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.core.etags import etag_matches, list_etag, user_etag
+
+
+def test_user_etag_depends_on_version_and_fields():
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    etag = user_etag(1, now)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert user_etag(1, now) == etag
+    assert user_etag(1, datetime(2024, 1, 1, 12, 0, 1)) != etag
+    assert user_etag(1, now, "email") != etag
+
+
+def test_list_etag_tracks_rows():
+    a = datetime(2024, 1, 1)
+    b = datetime(2024, 1, 2)
+    rows = [SimpleNamespace(id=1, version=a), SimpleNamespace(id=2, version=b)]
+    etag = list_etag(rows, "limit=10")
+    assert list_etag(rows, "limit=5") != etag
+    # Misma cantidad y mismo máximo, pero otra fila en la página
+    shifted = [SimpleNamespace(id=3, version=a), SimpleNamespace(id=2, version=b)]
+    assert list_etag(shifted, "limit=10") != etag
+    assert list_etag([SimpleNamespace(id=1)], "") is None
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", "abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"abc"', etag)
+    assert etag_matches('W/"abc"', etag, weak=True)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,127 @@
+# tests/test_core/test_hashing.py
+import asyncio
+import pytest
+from passlib.hash import bcrypt
+from app.core import hashing
+from app.core.security import verify_password
+
+@pytest.mark.asyncio
+async def test_hash_async_and_verify_async():
+    hashed = await hashing.hash_async("MySecret123")
+    assert hashed != "MySecret123"
+    assert verify_password("MySecret123", hashed)
+    assert await hashing.verify_async("MySecret123", hashed)
+    assert not await hashing.verify_async("WrongPass", hashed)
+
+@pytest.mark.asyncio
+async def test_hash_many_async_keeps_order():
+    passwords = [f"Secret{i}Abc" for i in range(5)]
+    hashes = await hashing.hash_many_async(passwords, chunk_size=2)
+    assert len(hashes) == 5
+    assert all(verify_password(p, h) for p, h in zip(passwords, hashes))
+    assert hashing.hash_limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_hash_async_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    await hashing.hash_async("MySecret123")
+    task.cancel()
+    assert ticks > 1
+
+@pytest.mark.asyncio
+async def test_hash_pool_disabled_uses_threads(monkeypatch):
+    monkeypatch.setattr(hashing.settings, "HASH_WORKERS", 0)
+    assert hashing.get_executor() is None
+    hashed = await hashing.hash_async("MySecret123")
+    assert await hashing.verify_async("MySecret123", hashed)
+
+def test_build_context_migrates_old_scheme():
+    old_hash = hashing.build_context(["bcrypt"]).hash("MySecret123")
+    context = hashing.build_context(["scrypt", "bcrypt"])
+    assert context.verify("MySecret123", old_hash)
+    assert context.needs_update(old_hash)
+    assert context.hash("MySecret123").startswith("$scrypt$")
+
+def test_build_context_flags_cost_changes(monkeypatch):
+    monkeypatch.setattr(hashing.settings, "BCRYPT_ROUNDS", 4)
+    low_cost = hashing.build_context(["bcrypt"]).hash("MySecret123")
+    monkeypatch.setattr(hashing.settings, "BCRYPT_ROUNDS", 5)
+    context = hashing.build_context(["bcrypt"])
+    assert context.needs_update(low_cost)
+    assert not context.needs_update(context.hash("MySecret123"))
+    # Un costo más alto (otro pod calibró distinto) no se rehashea para abajo
+    high_cost = hashing.build_context(["bcrypt"]).using(bcrypt__rounds=6).hash("MySecret123")
+    assert not context.needs_update(high_cost)
+
+def test_build_context_unknown_scheme():
+    with pytest.raises(ValueError):
+        hashing.build_context(["md5"])
+
+@pytest.mark.asyncio
+async def test_verify_and_update_async_returns_new_hash():
+    low_cost = bcrypt.using(rounds=4).hash("MySecret123")
+    verified, new_hash = await hashing.verify_and_update_async("MySecret123", low_cost)
+    assert verified
+    assert new_hash is not None and new_hash.startswith(f"$2b${hashing.settings.BCRYPT_ROUNDS:02d}$")
+
+@pytest.mark.asyncio
+async def test_verify_and_update_async_keeps_current_hash():
+    current = await hashing.hash_async("MySecret123")
+    assert await hashing.verify_and_update_async("MySecret123", current) == (True, None)
+
+def test_calibrate_respects_target():
+    result = hashing.calibrate("bcrypt", target_ms=20, repeat=1)
+    assert result["scheme"] == "bcrypt"
+    assert 4 <= result["cost"] <= 31
+    assert result["cost"] == 4 or result["measured_ms"] <= 20
+
+def test_configure_overrides_cost(monkeypatch):
+    monkeypatch.setattr(hashing, "_cost_overrides", {})
+    monkeypatch.setattr(hashing, "pwd_context", hashing.pwd_context)
+    old_hash = hashing.get_password_hash("MySecret123")
+
+    hashing.configure({"bcrypt": 5})
+
+    assert hashing.get_cost("bcrypt") == 5
+    assert hashing.get_password_hash("MySecret123").startswith("$2b$05$")
+    assert hashing.verify_password("MySecret123", old_hash)
+    # Calibrado por debajo de lo configurado: el hash más caro no se rehashea
+    assert not hashing.pwd_context.needs_update(old_hash)
+    assert hashing.pwd_context.needs_update(bcrypt.using(rounds=4).hash("MySecret123"))
+
+@pytest.mark.asyncio
+async def test_calibrate_and_apply(monkeypatch):
+    monkeypatch.setattr(hashing, "_cost_overrides", {})
+    monkeypatch.setattr(hashing, "_calibration", None)
+    monkeypatch.setattr(hashing, "pwd_context", hashing.pwd_context)
+    monkeypatch.setattr(hashing, "calibrate", lambda: {"scheme": "bcrypt", "cost": 5, "measured_ms": 3.0, "target_ms": 150})
+
+    result = await hashing.calibrate_and_apply()
+
+    assert result["cost"] == 5
+    metrics = hashing.hashing_metrics()
+    assert metrics["costs"]["bcrypt"] == 5
+    assert metrics["calibration"]["cost"] == 5
+
+@pytest.mark.asyncio
+async def test_hash_async_rejected_when_overloaded(monkeypatch):
+    from fastapi import HTTPException
+    from app.core.admission import AdmissionLimiter
+
+    limiter = AdmissionLimiter(max_in_flight=1, max_queue=0, timeout=1)
+    monkeypatch.setattr(hashing, "hash_limiter", limiter)
+    await limiter.acquire()
+
+    with pytest.raises(HTTPException) as excinfo:
+        await hashing.hash_async("MySecret123")
+    assert excinfo.value.status_code == 503
+    assert "Retry-After" in excinfo.value.headers
+    limiter.release()
@@ -0,0 +1,90 @@
+# tests/test_core/test_keys.py
+import pytest
+import rsa
+from ecdsa import SigningKey, NIST256p
+from httpx import AsyncClient
+from jose import jwt
+from app.core import security
+from app.core.config import settings
+from app.core.keys import key_store
+
+def write_rsa_key(directory, kid):
+    _, private = rsa.newkeys(1024)
+    (directory / f"{kid}.pem").write_bytes(private.save_pkcs1())
+
+@pytest.fixture
+def rs256(monkeypatch, tmp_path):
+    write_rsa_key(tmp_path, "k1")
+    monkeypatch.setattr(settings, "JWT_ALGORITHM", "RS256")
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", None)
+    key_store.clear()
+    security.token_cache.clear()
+    yield tmp_path
+    key_store.clear()
+    security.token_cache.clear()
+
+def test_rs256_token_roundtrip(rs256):
+    token = security.create_access_token({"sub": "rsa@example.com"})
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    assert security.decode_access_token(token)["sub"] == "rsa@example.com"
+
+def test_rs256_decode_uses_token_cache(rs256):
+    token = security.create_access_token({"sub": "rsa@example.com"})
+    hits = security.token_cache.hits
+    assert security.decode_access_token(token)["sub"] == "rsa@example.com"
+    assert security.decode_access_token(token)["sub"] == "rsa@example.com"
+    assert security.token_cache.hits == hits + 1
+    # La clave de la cache es el digest del token, no la clave pública
+    assert all(isinstance(key, bytes) for key in security.token_cache._data)
+
+def test_rs256_rejects_hs256_token(rs256):
+    token = jwt.encode({"sub": "hs@example.com"}, settings.SECRET_KEY, algorithm="HS256")
+    assert security.decode_access_token(token) is None
+
+def test_key_rotation_keeps_old_tokens_valid(rs256, monkeypatch):
+    old_token = security.create_access_token({"sub": "rot@example.com"})
+
+    write_rsa_key(rs256, "k2")
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "k2")
+    key_store.reload()
+
+    new_token = security.create_access_token({"sub": "rot@example.com"})
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    security.token_cache.clear()
+    assert security.decode_access_token(old_token) is not None
+    assert security.decode_access_token(new_token) is not None
+    assert {k["kid"] for k in key_store.jwks()["keys"]} == {"k1", "k2"}
+
+def test_es256_token_roundtrip(monkeypatch, tmp_path):
+    (tmp_path / "ec1.pem").write_bytes(SigningKey.generate(curve=NIST256p).to_pem())
+    monkeypatch.setattr(settings, "JWT_ALGORITHM", "ES256")
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(tmp_path))
+    key_store.clear()
+    security.token_cache.clear()
+
+    token = security.create_access_token({"sub": "ec@example.com"})
+    assert security.decode_access_token(token)["sub"] == "ec@example.com"
+    assert key_store.jwks()["keys"][0]["kty"] == "EC"
+    key_store.clear()
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint(rs256, async_client: AsyncClient):
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    keys = response.json()["keys"]
+    assert keys[0]["kid"] == "k1"
+    assert keys[0]["kty"] == "RSA"
+    assert "d" not in keys[0]
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_empty_for_hs256(async_client: AsyncClient):
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.json() == {"keys": []}
+
+def test_rs256_refresh_tokens_stay_on_hs256(rs256):
+    # Con la clave del JWKS, otro servicio lo aceptaría como access token
+    refresh = security.create_refresh_token({"sub": "rsa@example.com", "user_id": 1, "user_role": "ALUMNO"})
+    assert security.decode_access_token(refresh) is None
+    assert security.decode_refresh_token(refresh)["sub"] == "rsa@example.com"
@@ -0,0 +1,104 @@
+# tests/test_core/test_login_buffer.py
+import pytest
+from datetime import datetime, timedelta
+
+from app.core.login_buffer import LoginWriteBehind
+from app.crud.user import get_user
+from app.schemas.token import UserLogin
+from app.services.auth import login_user
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_one_update(async_db, test_user, query_counter):
+    buffer = LoginWriteBehind(flush_interval=1, max_entries=100, max_pending=100)
+    first = datetime(2025, 3, 1, 10, 0, 0)
+    assert buffer.record(test_user.id, first)
+    assert buffer.record(test_user.id, first - timedelta(minutes=1))  # no retrocede
+    assert buffer.record(999, first)  # ya no existe: se ignora
+
+    query_counter.reset()
+    assert await buffer.flush(async_db) == 2
+    assert query_counter.count == 1
+    assert query_counter.statements[0].startswith("UPDATE users")
+    await async_db.refresh(test_user)
+    assert test_user.last_login == first
+
+    metrics = buffer.metrics()
+    assert metrics["flushes"] == 1
+    assert metrics["last_flush_size"] == 2
+    assert metrics["pending"] == 0
+    assert await buffer.flush(async_db) == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_never_moves_last_login_back(async_db, test_user):
+    later = datetime(2025, 3, 1, 12, 0, 0)
+    test_user.last_login = later
+    await async_db.commit()
+
+    buffer = LoginWriteBehind(flush_interval=1, max_entries=100, max_pending=100)
+    buffer.record(test_user.id, later - timedelta(hours=1))
+    await buffer.flush(async_db)
+    await async_db.refresh(test_user)
+    assert test_user.last_login == later
+
+
+def test_record_is_bounded():
+    buffer = LoginWriteBehind(flush_interval=1, max_entries=100, max_pending=2)
+    now = datetime.utcnow()
+    assert buffer.record(1, now)
+    assert buffer.record(2, now)
+    assert buffer.record(1, now)  # el mismo usuario no ocupa otro lugar
+    assert not buffer.record(3, now)
+    assert buffer.metrics()["overflow"] == 1
+
+
+@pytest.mark.asyncio
+async def test_login_buffers_only_clean_successes(async_db, test_user, query_counter, monkeypatch):
+    from app.core.config import settings
+    from app.core.login_buffer import login_buffer
+    monkeypatch.setattr(settings, "LOGIN_WRITE_BEHIND", True)
+
+    query_counter.reset()
+    await login_user(UserLogin(email=test_user.email, password="Password123"), async_db)
+    assert [q.split()[0] for q in query_counter.statements] == ["SELECT"]
+    assert login_buffer.metrics()["pending"] == 1
+
+    # Con intentos fallidos previos se escribe en el momento
+    with pytest.raises(Exception):
+        await login_user(UserLogin(email=test_user.email, password="Wrong"), async_db)
+    await login_user(UserLogin(email=test_user.email, password="Password123"), async_db)
+    assert login_buffer.metrics()["pending"] == 0
+    user = await get_user(async_db, test_user.id)
+    assert user.failed_login_attempts == 0
+    assert user.last_login is not None
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending(async_db, test_user):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    buffer = LoginWriteBehind(flush_interval=60, max_entries=100, max_pending=100)
+    buffer.start(async_sessionmaker(async_db.bind, expire_on_commit=False))
+    logged_at = datetime(2025, 3, 2, 9, 0, 0)
+    buffer.record(test_user.id, logged_at)
+    await buffer.stop()
+    assert not buffer.running
+    user = await get_user(async_db, test_user.id)
+    await async_db.refresh(user)
+    assert user.last_login == logged_at
+
+@pytest.mark.asyncio
+async def test_size_flush_task_is_kept_until_done(async_db, test_user):
+    import asyncio
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    buffer = LoginWriteBehind(flush_interval=60, max_entries=1, max_pending=100)
+    buffer.start(async_sessionmaker(async_db.bind, expire_on_commit=False))
+    buffer.record(test_user.id, datetime(2025, 3, 3, 9, 0, 0))
+    # El flush por tamaño queda referenciado hasta que termina
+    task = buffer._flush_task
+    assert task is not None
+    await task
+    await asyncio.sleep(0)
+    assert buffer._flush_task is None
+    assert buffer.flushes == 1
+    await buffer.stop()
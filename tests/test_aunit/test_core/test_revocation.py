@@ -0,0 +1,41 @@
+# tests/test_core/test_revocation.py
+import pytest
+from datetime import datetime, timedelta
+from app.core.bloom import BloomFilter
+from app.core.revocation import RevocationList
+
+def test_bloom_filter_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, fp_rate=0.01)
+    items = [f"jti:{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, fp_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti:{i}")
+    false_positives = sum(f"otro:{i}" in bloom for i in range(10000))
+    assert false_positives / 10000 < 0.03
+
+@pytest.mark.asyncio
+async def test_revocation_list_confirms_against_table(async_db):
+    revocations = RevocationList(capacity=100, fp_rate=0.01, rebuild_interval=3600)
+    expires_at = datetime.utcnow() + timedelta(days=1)
+    await revocations.revoke_token(async_db, "abc", 1, expires_at)
+
+    assert await revocations.is_revoked(async_db, "abc", 1, issued_at=0)
+    assert not await revocations.is_revoked(async_db, "otro", 1, issued_at=0)
+    assert revocations.metrics()["confirmed"] == 1
+
+@pytest.mark.asyncio
+async def test_revocation_list_rebuild_from_table(async_db):
+    writer = RevocationList(capacity=100, fp_rate=0.01, rebuild_interval=3600)
+    await writer.revoke_user(async_db, 7)
+
+    # Otro worker sólo lo ve al reconstruir el filtro
+    reader = RevocationList(capacity=100, fp_rate=0.01, rebuild_interval=3600)
+    issued_before = (datetime.utcnow() - timedelta(minutes=1)).timestamp()
+    assert await reader.is_revoked(async_db, "cualquiera", 7, issued_at=issued_before)
+    assert not await reader.is_revoked(async_db, "cualquiera", 8, issued_at=issued_before)
+    assert reader.metrics()["rebuilds"] == 1
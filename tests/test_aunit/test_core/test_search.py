@@ -0,0 +1,101 @@
+# tests/test_core/test_search.py
+import pytest
+from datetime import date
+
+from app.core.search import UserSearchIndex, fold
+from app.crud.user import create_user, delete_user, update_user
+from app.schemas.user import UserCreate, UserRole, UserUpdate
+
+
+def build_index() -> UserSearchIndex:
+    index = UserSearchIndex(max_words=12, max_candidates=100)
+    index.upsert(1, "Juan Carlos", "Núñez", "30111222", "jc.nunez@example.com")
+    index.upsert(2, "Ana", "Nuñez Gómez", "30111333", "ana@example.com")
+    index.upsert(3, "Nuria", "López", "40222111", "nuria@example.com")
+    return index
+
+
+def test_fold_removes_accents():
+    assert fold("Núñez GÓMEZ") == "nunez gomez"
+
+
+def test_search_prefix_accent_folded_and_ranked():
+    index = build_index()
+    # Palabra completa antes que prefijo; "nu" también trae a Nuria
+    assert [user_id for user_id, _ in index.search("nunez")] == [1, 2]
+    assert [user_id for user_id, _ in index.search("NU")] == [1, 2, 3]
+    assert [user_id for user_id, _ in index.search("ana nuñ")] == [2]
+    assert [user_id for user_id, _ in index.search("30111")] == [1, 2]
+    assert index.search("x") == []
+    assert index.search("zzz") == []
+
+
+def test_search_upsert_remove_and_bounds():
+    index = build_index()
+    index.upsert(3, "Nuria", "Paz", "40222111", "nuria@example.com")
+    assert [user_id for user_id, _ in index.search("lopez")] == []
+    assert [user_id for user_id, _ in index.search("paz")] == [3]
+
+    index.remove(1)
+    assert [user_id for user_id, _ in index.search("nunez")] == [2]
+
+    bounded = UserSearchIndex(max_words=2, max_candidates=1)
+    bounded.upsert(1, "Uno Dos Tres", "Apellido", "1", "a@b.c")
+    # Se guardan sólo las primeras palabras (apellidos primero)
+    assert bounded.search("tres") == []
+    bounded.upsert(2, "Uno", "Apellido", "2", "c@d.e")
+    assert len(bounded.search("apellido")) == 1
+    assert bounded.truncated == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_and_crud_hooks(async_db, monkeypatch):
+    from app.core.search import user_search
+    monkeypatch.setattr(user_search, "enabled", True)
+
+    user = await create_user(async_db, UserCreate(
+        nombres="Rocío", apellidos="Ibáñez", dni="50111222", fecha_nacimiento=date(1990, 1, 1),
+        email="rocio@example.com", password="Password123", rol=UserRole.ALUMNO,
+    ))
+    assert [user_id for user_id, _ in user_search.search("ibanez")] == [user.id]
+
+    user_search.clear()
+    await user_search.rebuild(async_db)
+    assert user_search.ready
+    assert [user_id for user_id, _ in user_search.search("roci")] == [user.id]
+
+    await update_user(async_db, user.id, UserUpdate(apellidos="Sosa"))
+    assert user_search.search("ibanez") == []
+    assert [user_id for user_id, _ in user_search.search("sosa")] == [user.id]
+
+    await delete_user(async_db, user.id)
+    assert user_search.search("sosa") == []
+
+
+@pytest.mark.asyncio
+async def test_refresh_changes_sees_other_writers(async_db):
+    from datetime import datetime
+    from sqlalchemy import insert
+    from app.db.models.user import User
+
+    index = UserSearchIndex(max_words=12, max_candidates=100)
+    await index.rebuild(async_db)
+    # Alta hecha por otro proceso: no pasa por los hooks de este índice
+    now = datetime.utcnow()
+    await async_db.execute(insert(User).values(
+        nombres="Otro", apellidos="Proceso", dni="50111333", fecha_nacimiento=date(1990, 1, 1),
+        email="otro@example.com", rol=UserRole.ALUMNO, password_hash="x",
+        created_at=now, updated_at=now, token_version=0,
+    ))
+    await async_db.commit()
+    assert index.search("proceso") == []
+
+    await index.refresh_changes(async_db)
+    assert len(index.search("proceso")) == 1
+    assert index.metrics()["refreshes"] == 1
+
+
+def test_disabled_index_keeps_nothing():
+    index = UserSearchIndex(max_words=12, max_candidates=100, enabled=False)
+    index.upsert(1, "Ana", "Paz", "1", "ana@example.com")
+    assert index.metrics()["users"] == 0
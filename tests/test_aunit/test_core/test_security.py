@@ -54,4 +54,27 @@ def test_verify_password_reset_token_wrong_scope():
 def test_verify_password_reset_token_expired():
     token = security.create_password_reset_token("someone@example.com", expires_minutes=-1)
     result = security.verify_password_reset_token(token)
-    assert result is None
\ No newline at end of file
+    assert result is None
+
+def test_decode_access_token_uses_cache(monkeypatch):
+    security.token_cache.clear()
+    token = security.create_access_token({"sub": "cache@example.com"})
+    first = security.decode_access_token(token)
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("no debería volver a decodificar")
+
+    monkeypatch.setattr(security.jwt, "decode", fail_decode)
+    second = security.decode_access_token(token)
+    assert second == first
+
+    # Devuelve copias: modificar el payload no ensucia el cache
+    second["sub"] = "otro@example.com"
+    assert security.decode_access_token(token)["sub"] == "cache@example.com"
+
+def test_decode_access_token_cache_respects_exp():
+    security.token_cache.clear()
+    token = security.create_access_token({"sub": "test@example.com"}, expires_delta=timedelta(seconds=1))
+    assert security.decode_access_token(token) is not None
+    sleep(2)
+    assert security.decode_access_token(token) is None
@@ -0,0 +1,27 @@
+# tests/test_core/test_serialization.py
+import json
+from datetime import date
+
+from app.core import serialization
+from app.core.serialization import rows_response
+from app.schemas.user import UserRead, UserRole
+
+user = UserRead(
+    id=1,
+    nombres="Ana",
+    apellidos="Núñez",
+    dni="87654321",
+    fecha_nacimiento=date(1995, 5, 5),
+    email="ana@example.com",
+    rol=UserRole.DOCENTE,
+)
+
+
+def test_rows_response_without_orjson(monkeypatch):
+    fast = rows_response([user]).body
+    monkeypatch.setattr(serialization, "orjson", None)
+    plain = rows_response([user]).body
+    assert json.loads(plain) == json.loads(fast) == [{
+        "id": 1, "nombres": "Ana", "apellidos": "Núñez", "dni": "87654321",
+        "fecha_nacimiento": "1995-05-05", "email": "ana@example.com", "rol": "DOCENTE",
+    }]
@@ -0,0 +1,126 @@
+# tests/test_core/test_throttle.py
+import pytest
+from fastapi import HTTPException
+
+from app.core import throttle
+from app.core.throttle import KeyValueThrottleBackend, LoginThrottle, MemoryThrottleBackend
+from app.schemas.token import UserLogin
+from app.services.auth import login_user
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class LocalKeyValueStore:
+    """Reemplazo local del cliente compartido (subset de redis.asyncio)."""
+
+    def __init__(self):
+        self.data: dict[str, int] = {}
+        self.ttls: dict[str, int] = {}
+
+    async def incr(self, name):
+        self.data[name] = self.data.get(name, 0) + 1
+        return self.data[name]
+
+    async def expire(self, name, seconds):
+        self.ttls[name] = seconds
+
+    async def mget(self, *names):
+        return [self.data.get(name) for name in names]
+
+    async def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_sliding_window(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(throttle.time, "monotonic", clock)
+    backend = MemoryThrottleBackend(max_keys=100)
+    for _ in range(4):
+        await backend.hit("k", 100)
+    assert (await backend.estimate("k", 100))[0] == 4
+
+    # A mitad de la ventana siguiente la anterior pesa la mitad
+    clock.now += 150
+    count, rotates_in = await backend.estimate("k", 100)
+    assert count == pytest.approx(2)
+    assert rotates_in == pytest.approx(50)
+
+    # Dos ventanas sin actividad: la clave se descarta
+    clock.now += 200
+    assert await backend.estimate("k", 100) == (0.0, 0.0)
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_bounded():
+    backend = MemoryThrottleBackend(max_keys=3)
+    for i in range(5):
+        await backend.hit(f"k{i}", 100)
+    assert len(backend) == 3
+    assert backend.evictions == 2
+    assert (await backend.estimate("k0", 100))[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_login_throttle_with_shared_backend(monkeypatch):
+    monkeypatch.setattr(throttle.time, "time", FakeClock(10_000.0))
+    store = LocalKeyValueStore()
+    login_throttle = LoginThrottle(KeyValueThrottleBackend(store), window=60, limits={"email": 5, "ip": 10, "pair": 2})
+
+    await login_throttle.record_failure("Ana@Example.com", "10.0.0.1")
+    await login_throttle.check("ana@example.com", "10.0.0.1")
+    await login_throttle.record_failure("ana@example.com", "10.0.0.1")
+    with pytest.raises(HTTPException) as exc_info:
+        await login_throttle.check("ana@example.com", "10.0.0.1")
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+    assert login_throttle.blocked["pair"] == 1
+
+    # Desde otra IP el par no pesa; el email sigue contando
+    await login_throttle.check("ana@example.com", "10.0.0.2")
+    assert all(ttl == 120 for ttl in store.ttls.values())
+
+    await login_throttle.record_success("ana@example.com", "10.0.0.1")
+    await login_throttle.check("ana@example.com", "10.0.0.1")
+
+
+@pytest.mark.asyncio
+async def test_login_throttled_before_any_query(async_db, query_counter, monkeypatch):
+    from app.core.config import settings
+    from app.core.throttle import login_throttle
+    monkeypatch.setattr(login_throttle, "limits", {"email": 3, "ip": 0, "pair": 0})
+    login_data = UserLogin(email="nadie@example.com", password="Password123")
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc_info:
+            await login_user(login_data, async_db, "10.0.0.9")
+        assert exc_info.value.status_code == 401
+
+    query_counter.reset()
+    with pytest.raises(HTTPException) as exc_info:
+        await login_user(login_data, async_db, "10.0.0.9")
+    assert exc_info.value.status_code == 429
+    assert query_counter.count == 0
+
+    monkeypatch.setattr(settings, "THROTTLE_ENABLED", False)
+    with pytest.raises(HTTPException) as exc_info:
+        await login_user(login_data, async_db, "10.0.0.9")
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_default_throttle_has_no_ip_limit():
+    # Detrás de un proxy todos comparten IP: por defecto no hay límite por IP
+    login_throttle = LoginThrottle(
+        MemoryThrottleBackend(max_keys=1000), window=60, limits=throttle.login_throttle.limits
+    )
+    for i in range(200):
+        await login_throttle.record_failure(f"user{i}@example.com", "10.0.0.1")
+    await login_throttle.check("otro@example.com", "10.0.0.1")
@@ -0,0 +1,61 @@
+# tests/test_core/test_token_versions.py
+import asyncio
+import json
+import pytest
+from datetime import date, datetime
+from sqlalchemy import select, update
+from app.core.token_versions import TokenVersionMap, token_versions
+from app.crud.user import create_user
+from app.db.models.user import User
+from app.schemas.user import UserCreate, UserRole
+from app.services.bulk import import_users
+
+@pytest.mark.asyncio
+async def test_token_version_map_refresh(async_db, test_user):
+    versions = TokenVersionMap(refresh_interval=0, full_refresh_interval=3600)
+    await versions.ensure_fresh(async_db)
+    assert versions.is_current(test_user.id, 0)
+    assert not versions.is_current(9999, 0)
+
+    # Otro worker incrementa la versión
+    await async_db.execute(
+        update(User).where(User.id == test_user.id).values(token_version=1, updated_at=datetime.utcnow())
+    )
+    await async_db.commit()
+
+    await versions.ensure_fresh(async_db)
+    assert not versions.is_current(test_user.id, 0)
+    assert versions.is_current(test_user.id, 1)
+    assert versions.metrics()["refreshes"] == 1
+    assert versions.metrics()["full_refreshes"] == 1
+
+@pytest.mark.asyncio
+async def test_token_version_map_forget(async_db, test_user):
+    versions = TokenVersionMap(refresh_interval=3600, full_refresh_interval=3600)
+    await versions.ensure_fresh(async_db)
+    versions.forget(test_user.id)
+    assert not versions.is_current(test_user.id, 0)
+
+@pytest.mark.asyncio
+async def test_token_version_map_single_flight(async_db, test_user):
+    versions = TokenVersionMap(refresh_interval=3600, full_refresh_interval=3600)
+    await asyncio.gather(*(versions.ensure_fresh(async_db) for _ in range(5)))
+    assert versions.metrics()["full_refreshes"] == 1
+
+@pytest.mark.asyncio
+async def test_token_version_map_sees_new_users(async_db, test_user):
+    await token_versions.ensure_fresh(async_db)
+    user = await create_user(async_db, UserCreate(
+        nombres="Nuevo", apellidos="Usuario", dni="55555551", fecha_nacimiento=date(1990, 1, 1),
+        email="nuevo@example.com", password="Password123", rol=UserRole.ALUMNO,
+    ))
+    assert token_versions.is_current(user.id, user.token_version)
+
+    line = json.dumps({
+        "nombres": "Masivo", "apellidos": "Usuario", "dni": "55555552", "fecha_nacimiento": "1990-01-01",
+        "email": "masivo@example.com", "password": "Password123", "rol": "ALUMNO",
+    })
+    report, _ = await import_users(async_db, line, "ndjson")
+    assert report.created == 1
+    user_id = await async_db.scalar(select(User.id).where(User.email == "masivo@example.com"))
+    assert token_versions.is_current(user_id, 0)
@@ -1,16 +1,26 @@
 # test_crud.py
 import pytest
-from datetime import date
+from datetime import date, datetime
 from app.crud.user import (
     get_user,
     get_user_by_email,
     get_user_by_dni,
     get_users,
+    get_users_keyset,
+    encode_cursor,
+    stream_users,
+    filter_conditions,
+    parse_fields,
+    READ_COLUMNS,
+    bulk_update_users,
+    bulk_delete_users,
     create_user,
     update_user,
     delete_user,
 )
-from app.schemas.user import UserCreate, UserUpdate, UserRole
+from app.schemas.user import UserCreate, UserFilter, UserUpdate, UserRole
+from sqlalchemy import select
+from app.db.models.user import User
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.exc import IntegrityError
 
@@ -69,6 +79,168 @@ async def test_get_users_with_pagination(async_db):
     assert len(users) == 3
     assert all(hasattr(u, "email") for u in users)
 
+@pytest.mark.asyncio
+async def test_get_users_projection(async_db, query_counter):
+    for i in range(3):
+        await create_user(async_db, UserCreate(
+            nombres=f"User{i}",
+            apellidos=f"Apellido{i}",
+            dni=f"6666666{i}",
+            fecha_nacimiento=date(1990, 1, 1),
+            email=f"proy{i}@example.com",
+            password="Password123",
+            rol=UserRole.ALUMNO,
+        ))
+    query_counter.reset()
+    users = await get_users(async_db)
+    assert "password_hash" not in query_counter.statements[0]
+    # version es updated_at, para los ETag
+    assert set(users[0]._mapping) == set(READ_COLUMNS) | {"version"}
+
+    fields = parse_fields("email, email,rol")
+    assert fields == ("id", "email", "rol")
+    page, cursor = await get_users_keyset(async_db, limit=2, sort="-apellidos", fields=fields)
+    assert [dict(row._mapping)["email"] for row in page] == ["proy2@example.com", "proy1@example.com"]
+    assert "apellidos" not in page[0]._mapping
+    page, _ = await get_users_keyset(async_db, limit=2, sort="-apellidos", cursor=cursor, fields=fields)
+    assert [row.email for row in page] == ["proy0@example.com"]
+
+    row = await get_user(async_db, 1, fields=("id", "dni"))
+    assert tuple(row)[:2] == (1, "66666660")
+    assert row.version is not None
+    with pytest.raises(ValueError):
+        parse_fields("email,password_hash")
+
+@pytest.mark.asyncio
+async def test_get_users_keyset_pages(async_db):
+    apellidos = ["Zapata", "Alvarez", "Molina", "Alvarez", "Benitez"]
+    for i, apellido in enumerate(apellidos):
+        await create_user(async_db, UserCreate(
+            nombres=f"User{i}",
+            apellidos=apellido,
+            dni=f"2222222{i}",
+            fecha_nacimiento=date(1990, 1, 1),
+            email=f"keyset{i}@example.com",
+            password="Password123",
+            rol=UserRole.ALUMNO,
+        ))
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = await get_users_keyset(async_db, limit=2, sort="apellidos", cursor=cursor)
+        seen.extend((u.apellidos, u.id) for u in page)
+        if cursor is None:
+            break
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+    page, cursor = await get_users_keyset(async_db, limit=3, sort="-id")
+    assert [u.id for u in page] == [5, 4, 3]
+    page, cursor = await get_users_keyset(async_db, limit=3, sort="-id", cursor=cursor)
+    assert [u.id for u in page] == [2, 1]
+    assert cursor is None
+
+@pytest.mark.asyncio
+async def test_get_users_keyset_invalid_cursor(async_db):
+    with pytest.raises(ValueError):
+        await get_users_keyset(async_db, limit=2, sort="id", cursor="no-es-un-cursor")
+    with pytest.raises(ValueError):
+        await get_users_keyset(async_db, limit=2, sort="id", cursor=encode_cursor("created_at", "2020-01-01T00:00:00", 1))
+    # JSON bien formado pero con un valor del tipo equivocado
+    for value in (None, 5, ["x"]):
+        with pytest.raises(ValueError):
+            await get_users_keyset(async_db, limit=2, sort="created_at", cursor=encode_cursor("created_at", value, 1))
+        with pytest.raises(ValueError):
+            await get_users_keyset(async_db, limit=2, sort="apellidos", cursor=encode_cursor("apellidos", value, 1))
+    with pytest.raises(ValueError):
+        await get_users_keyset(async_db, limit=2, sort="id", cursor=encode_cursor("id", None, 1))
+    with pytest.raises(ValueError):
+        await get_users_keyset(async_db, limit=2, sort="dni")
+
+@pytest.mark.asyncio
+async def test_get_users_filters(async_db):
+    rows = [("Garcia", UserRole.ALUMNO, None), ("Garzon", UserRole.DOCENTE, datetime(2024, 1, 1)),
+            ("Gas", UserRole.ALUMNO, datetime(2024, 6, 1)), ("Lopez", UserRole.DOCENTE, datetime(2023, 1, 1))]
+    for i, (apellido, rol, last_login) in enumerate(rows):
+        user = await create_user(async_db, UserCreate(
+            nombres=f"User{i}",
+            apellidos=apellido,
+            dni=f"4444444{i}",
+            fecha_nacimiento=date(1990, 1, 1),
+            email=f"filtro{i}@example.com",
+            password="Password123",
+            rol=rol,
+        ))
+        user.last_login = last_login
+        await async_db.commit()
+
+    async def apellidos(**kwargs):
+        users = await get_users(async_db, conditions=filter_conditions(UserFilter(**kwargs)))
+        return [u.apellidos for u in users]
+
+    assert await apellidos(apellidos_prefix="Gar") == ["Garcia", "Garzon"]
+    # El prefijo es exacto: distingue mayúsculas y tildes
+    assert await apellidos(apellidos_prefix="gar") == []
+    assert await apellidos(apellidos_prefix="Gá") == []
+    assert await apellidos(rol=UserRole.DOCENTE) == ["Garzon", "Lopez"]
+    # Los que nunca entraron también cuentan como inactivos
+    assert await apellidos(inactive_since=datetime(2024, 3, 1)) == ["Garcia", "Garzon", "Lopez"]
+    assert await apellidos(rol=UserRole.DOCENTE, inactive_since=datetime(2023, 6, 1)) == ["Lopez"]
+
+    page, cursor = await get_users_keyset(
+        async_db, limit=1, sort="apellidos", conditions=filter_conditions(UserFilter(apellidos_prefix="Ga"))
+    )
+    assert [u.apellidos for u in page] == ["Garcia"]
+    page, cursor = await get_users_keyset(
+        async_db, limit=5, sort="apellidos", cursor=cursor, conditions=filter_conditions(UserFilter(apellidos_prefix="Ga"))
+    )
+    assert [u.apellidos for u in page] == ["Garzon", "Gas"]
+
+@pytest.mark.asyncio
+async def test_stream_users_batches(async_db):
+    for i in range(5):
+        await create_user(async_db, UserCreate(
+            nombres="Stream",
+            apellidos="User",
+            dni=f"3333333{i}",
+            fecha_nacimiento=date(1990, 1, 1),
+            email=f"stream{i}@example.com",
+            password="Password123",
+            rol=UserRole.ALUMNO,
+        ))
+
+    batches = [rows async for rows in stream_users(async_db, batch_size=2)]
+    assert [len(rows) for rows in batches] == [2, 2, 1]
+    assert [row.email for rows in batches for row in rows] == [f"stream{i}@example.com" for i in range(5)]
+    assert "password_hash" not in batches[0][0]._fields
+
+@pytest.mark.asyncio
+async def test_bulk_update_and_delete_in_chunks(async_db):
+    for i in range(5):
+        await create_user(async_db, UserCreate(
+            nombres="Bulk",
+            apellidos="User",
+            dni=f"4444444{i}",
+            fecha_nacimiento=date(1990, 1, 1),
+            email=f"bulk{i}@example.com",
+            password="Password123",
+            rol=UserRole.ALUMNO,
+        ))
+
+    conditions = filter_conditions(UserFilter(rol=UserRole.ALUMNO), exclude_id=1)
+    affected, chunks = await bulk_update_users(async_db, conditions, {"rol": UserRole.INVITADO}, chunk_size=2)
+    assert (affected, chunks) == (4, 2)
+    users = await get_users(async_db)
+    assert [u.rol for u in users] == [UserRole.ALUMNO] + [UserRole.INVITADO] * 4
+    versions = await async_db.scalars(select(User.token_version).order_by(User.id))
+    assert list(versions) == [0, 1, 1, 1, 1]
+
+    conditions = filter_conditions(UserFilter(ids=[1, 2, 3]))
+    affected, chunks = await bulk_delete_users(async_db, conditions, chunk_size=2)
+    assert (affected, chunks) == (3, 2)
+    assert [u.id for u in await get_users(async_db)] == [4, 5]
+
 @pytest.mark.asyncio
 async def test_update_user(async_db):
     user_in = UserCreate(
@@ -93,6 +265,25 @@ async def test_update_user(async_db):
     assert updated_user.email == "updated@example.com"  # Normalizado a minúsculas
     assert updated_user.dni == "99999999"  # sin cambios
 
+@pytest.mark.asyncio
+async def test_update_user_single_statement(async_db, test_user, query_counter):
+    query_counter.reset()
+    updated_user = await update_user(async_db, test_user.id, UserUpdate(rol=UserRole.DOCENTE))
+    assert query_counter.count == 1
+    assert query_counter.statements[0].startswith("UPDATE users")
+    assert "RETURNING" in query_counter.statements[0]
+    assert updated_user.rol == UserRole.DOCENTE
+    assert updated_user.token_version == 1
+
+@pytest.mark.asyncio
+async def test_update_user_without_returning(async_db, test_user, query_counter, monkeypatch):
+    monkeypatch.setattr(async_db.get_bind().dialect, "update_returning", False)
+    query_counter.reset()
+    updated_user = await update_user(async_db, test_user.id, UserUpdate(nombres="Sin Returning"))
+    assert query_counter.count == 2
+    assert "RETURNING" not in query_counter.statements[0]
+    assert updated_user.nombres == "Sin Returning"
+
 @pytest.mark.asyncio
 async def test_delete_user(async_db):
     user_in = UserCreate(
@@ -179,3 +370,10 @@ async def test_update_nonexistent_user(async_db):
 async def test_delete_nonexistent_user(async_db):
     deleted = await delete_user(async_db, user_id=9999)
     assert deleted is False
+
+
+def test_apellidos_prefix_is_binary_on_postgresql():
+    from sqlalchemy.dialects import postgresql, sqlite
+    stmt = select(User.id).where(*filter_conditions(UserFilter(apellidos_prefix="Gar")))
+    assert 'COLLATE "C"' in str(stmt.compile(dialect=postgresql.dialect()))
+    assert "COLLATE" not in str(stmt.compile(dialect=sqlite.dialect()))
@@ -0,0 +1,37 @@
+# tests/test_db/test_errors.py
+from sqlalchemy.exc import IntegrityError
+
+from app.db.errors import unique_constraints, unique_violation
+from app.db.models.user import User
+
+
+class FakeUniqueViolation(Exception):
+    # Como asyncpg.UniqueViolationError
+    def __init__(self, constraint_name):
+        super().__init__("duplicate key value violates unique constraint")
+        self.constraint_name = constraint_name
+
+
+def _asyncpg_error(constraint_name: str) -> IntegrityError:
+    orig = Exception("<class 'asyncpg.exceptions.UniqueViolationError'>")
+    orig.__cause__ = FakeUniqueViolation(constraint_name)
+    return IntegrityError("INSERT INTO users ...", {}, orig)
+
+
+def test_unique_constraints_names():
+    names = unique_constraints(User.__table__)
+    assert names["ix_users_email"] == "email"
+    assert names["users_dni_key"] == "dni"
+
+
+def test_unique_violation_postgres():
+    assert unique_violation(_asyncpg_error("ix_users_email"), User.__table__) == "email"
+    assert unique_violation(_asyncpg_error("users_dni_key"), User.__table__) == "dni"
+    assert unique_violation(_asyncpg_error("otra_restriccion"), User.__table__) is None
+
+
+def test_unique_violation_sqlite():
+    error = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed: users.dni"))
+    assert unique_violation(error, User.__table__) == "dni"
+    error = IntegrityError("INSERT", {}, Exception("NOT NULL constraint failed: users.email"))
+    assert unique_violation(error, User.__table__) is None
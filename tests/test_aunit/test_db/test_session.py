@@ -0,0 +1,72 @@
+# tests/test_db/test_session.py
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.db import session as db_session
+from app.db.session import ReadRouter
+
+REPLICAS = ["sqlite+aiosqlite:///:memory:", "sqlite+aiosqlite:///:memory:"]
+
+
+def test_round_robin_between_replicas():
+    router = ReadRouter(REPLICAS, eject_seconds=30, sticky_seconds=5)
+    names = [router.choose("10.0.0.1")[0] for _ in range(4)]
+    assert names == ["replica-0", "replica-1", "replica-0", "replica-1"]
+    assert router.metrics()["replica-0"]["sessions"] == 2
+
+
+def test_ejected_replica_is_skipped():
+    router = ReadRouter(REPLICAS, eject_seconds=30, sticky_seconds=5)
+    router.eject("replica-0", OSError("connection refused"))
+    assert {router.choose()[0] for _ in range(3)} == {"replica-1"}
+    router.eject("replica-1", OSError("connection refused"))
+    assert router.choose()[0] == "primary"
+    metrics = router.metrics()
+    assert metrics["replica-0"]["ejected"] and metrics["replica-0"]["ejections"] == 1
+
+
+def test_writer_reads_from_primary_and_header_override():
+    router = ReadRouter(REPLICAS, eject_seconds=30, sticky_seconds=5)
+    router.mark_write("10.0.0.1")
+    assert router.choose("10.0.0.1")[0] == "primary"
+    assert router.choose("10.0.0.1", target="replica")[0].startswith("replica")
+    assert router.choose("10.0.0.2")[0].startswith("replica")
+    assert router.choose("10.0.0.2", target="primary")[0] == "primary"
+
+
+def test_without_replicas_everything_goes_to_primary():
+    router = ReadRouter([], eject_seconds=30, sticky_seconds=5)
+    router.mark_write("10.0.0.1")
+    assert router.choose("10.0.0.1", target="replica")[0] == "primary"
+    assert list(router.metrics()) == ["primary"]
+
+
+
+def test_client_key_is_token_subject():
+    from starlette.requests import Request
+    from app.core.security import create_access_token
+    token = create_access_token({"sub": "Ana@Example.com"})
+    # Misma IP (la del balanceador), distinto usuario
+    ana = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.1", 1)})
+    anonymous = Request({"type": "http", "headers": [], "client": ("10.0.0.1", 2)})
+    assert db_session._client_key(ana) == "ana@example.com"
+    assert db_session._client_key(anonymous) is None
+
+    router = ReadRouter(REPLICAS, eject_seconds=30, sticky_seconds=5)
+    router.mark_write(db_session._client_key(ana))
+    assert router.choose(db_session._client_key(ana))[0] == "primary"
+    assert router.choose(db_session._client_key(anonymous))[0].startswith("replica")
+
+@pytest.mark.asyncio
+async def test_get_read_session_ejects_on_connection_error(monkeypatch):
+    from starlette.requests import Request
+    router = ReadRouter(REPLICAS, eject_seconds=30, sticky_seconds=5)
+    monkeypatch.setattr(db_session, "read_router", router)
+    request = Request({"type": "http", "headers": [], "client": ("10.0.0.3", 1234)})
+
+    dependency = db_session.get_read_session(request)
+    await dependency.__anext__()
+    with pytest.raises(OperationalError):
+        await dependency.athrow(OperationalError("SELECT 1", {}, OSError("connection refused")))
+    assert router.metrics()["replica-0"]["ejected"]
+    await router.dispose()
@@ -0,0 +1,40 @@
+# tests/test_routers/test_router_admin.py
+import pytest
+from httpx import AsyncClient
+from datetime import date
+
+from app.core.security import create_access_token
+from app.schemas.user import UserCreate, UserRole
+from app.crud.user import create_user
+
+async def create_test_user_in_db(db, **kwargs):
+    user_data = {
+        "nombres": "Test",
+        "apellidos": "User",
+        "dni": "99999999",
+        "fecha_nacimiento": date(1990, 1, 1),
+        "email": "testuser@example.com",
+        "password": "Password123",
+        "rol": UserRole.ALUMNO
+    }
+    user_data.update(kwargs)
+    return await create_user(db, UserCreate(**user_data))
+
+def get_auth_header(email: str):
+    token = create_access_token({"sub": email})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.mark.asyncio
+async def test_read_metrics_admin(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    response = await async_client.get("/admin/metrics", headers=get_auth_header(admin.email))
+    assert response.status_code == 200
+    hashing = response.json()["hashing"]
+    assert hashing["schemes"][0] == "bcrypt"
+    assert "bcrypt" in hashing["costs"]
+
+@pytest.mark.asyncio
+async def test_read_metrics_forbidden_for_non_admin(async_client: AsyncClient, async_db):
+    user = await create_test_user_in_db(async_db)
+    response = await async_client.get("/admin/metrics", headers=get_auth_header(user.email))
+    assert response.status_code == 403
@@ -123,3 +123,14 @@ async def test_login_wrong_credentials(async_client: AsyncClient, async_db: Asyn
     assert "incorrect email or password" in response.json()["detail"].lower()
 
 
+
+@pytest.mark.asyncio
+async def test_login_throttled_returns_429(async_client: AsyncClient, async_db):
+    from app.core.config import settings
+    payload = {"email": "atacado@example.com", "password": "Password123"}
+    for _ in range(settings.THROTTLE_PAIR_LIMIT):
+        response = await async_client.post("/auth/login", json=payload)
+        assert response.status_code == 401
+    response = await async_client.post("/auth/login", json=payload)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
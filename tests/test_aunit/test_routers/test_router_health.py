@@ -0,0 +1,27 @@
+# tests/test_routers/test_router_health.py
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.pool import QueuePool
+from app.core.config import settings
+from app.db.session import build_engine, pool_status
+
+@pytest.mark.asyncio
+async def test_health_db(async_client: AsyncClient):
+    response = await async_client.get("/health/db")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert "class" in data["pool"]
+
+@pytest.mark.asyncio
+async def test_build_engine_pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 2)
+    engine = build_engine("sqlite+aiosqlite:///./no_se_usa.db")
+    assert engine.echo is False
+    assert engine.pool._pre_ping is True
+    await engine.dispose()
+
+    # En motores con QueuePool se informan los contadores
+    status = pool_status(QueuePool(lambda: None, pool_size=3, max_overflow=2))
+    assert status == {"class": "QueuePool", "size": 3, "checkedin": 0, "checkedout": 0, "overflow": -3}
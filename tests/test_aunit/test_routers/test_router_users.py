@@ -1,11 +1,13 @@
 # tests/test_routers/test_router_users.py
+import json
 import pytest
 from httpx import AsyncClient
 from datetime import date
 
+from app.core.config import settings
 from app.core.security import create_access_token
 from app.schemas.user import UserCreate, UserRole
-from app.crud.user import create_user
+from app.crud.user import create_user, encode_cursor
 from unittest.mock import AsyncMock, patch
 
 async def create_test_user_in_db(db, **kwargs):
@@ -159,3 +161,347 @@ async def test_update_password_not_self(async_client: AsyncClient, async_db):
 
     response = await async_client.patch(f"/users/{user2.id}/password", json=payload, headers=headers)
     assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_deleted_user_token_stops_working(async_client: AsyncClient, async_db):
+    user = await create_test_user_in_db(async_db, email="borrar@example.com", dni="12345671")
+    headers = get_auth_header(user.email)
+    response = await async_client.get(f"/users/{user.id}", headers=headers)
+    assert response.status_code == 200
+
+    response = await async_client.delete(f"/users/{user.id}", headers=headers)
+    assert response.status_code == 204
+
+    response = await async_client.get(f"/users/{user.id}", headers=headers)
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_role_change_applies_immediately(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    headers = get_auth_header(admin.email)
+    assert (await async_client.get("/admin/metrics", headers=headers)).status_code == 200
+
+    response = await async_client.put(f"/users/{admin.id}", json={"rol": "ALUMNO"}, headers=headers)
+    assert response.status_code == 200
+
+    assert (await async_client.get("/admin/metrics", headers=headers)).status_code == 403
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_pagination(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    await create_test_user_in_db(async_db, email="otro@example.com", dni="12345672")
+    await create_test_user_in_db(async_db, email="tercero@example.com", dni="12345673")
+    headers = get_auth_header(admin.email)
+
+    response = await async_client.get("/users/", params={"sort": "created_at", "limit": 2}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await async_client.get("/users/", params={"sort": "created_at", "limit": 2, "cursor": cursor}, headers=headers)
+    assert [u["email"] for u in response.json()] == ["tercero@example.com"]
+    assert "X-Next-Cursor" not in response.headers
+
+@pytest.mark.asyncio
+async def test_read_users_filters(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    await create_test_user_in_db(async_db, email="docente@example.com", dni="12345672", rol=UserRole.DOCENTE, apellidos="Pérez")
+    await create_test_user_in_db(async_db, email="alumno@example.com", dni="12345673", apellidos="Paz")
+    headers = get_auth_header(admin.email)
+
+    response = await async_client.get("/users/", params={"rol": "DOCENTE"}, headers=headers)
+    assert [u["email"] for u in response.json()] == ["docente@example.com"]
+
+    response = await async_client.get("/users/", params={"apellidos_prefix": "Pa", "sort": "apellidos"}, headers=headers)
+    assert [u["email"] for u in response.json()] == ["alumno@example.com"]
+
+    response = await async_client.get("/users/", params={"rol": "NADIE"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_search_users(async_client: AsyncClient, async_db, monkeypatch):
+    from app.core.search import user_search
+    monkeypatch.setattr(user_search, "enabled", True)
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    headers = get_auth_header(admin.email)
+
+    # Sin armar el índice todavía
+    response = await async_client.get("/users/search", params={"q": "mar"}, headers=headers)
+    assert response.status_code == 503
+
+    await create_test_user_in_db(async_db, email="martin@example.com", dni="22345671", nombres="Martín", apellidos="Ríos")
+    assert (await async_client.post("/admin/search/rebuild", headers=headers)).json()["users"] == 2
+
+    with patch("app.routers.user.send_welcome_email", new_callable=AsyncMock):
+        response = await async_client.post("/users/", json={
+            "nombres": "Mariana", "apellidos": "Martínez", "dni": "22345672", "fecha_nacimiento": "1990-01-01",
+            "email": "mariana@example.com", "password": "Password123", "rol": "ALUMNO",
+        })
+    assert response.status_code == 201
+
+    response = await async_client.get("/users/search", params={"q": "martin"}, headers=headers)
+    assert response.status_code == 200
+    assert [u["email"] for u in response.json()] == ["martin@example.com", "mariana@example.com"]
+
+    response = await async_client.get("/users/search", params={"q": "m"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_read_users_sparse_fields(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    headers = get_auth_header(admin.email)
+
+    response = await async_client.get("/users/", params={"fields": "email,rol"}, headers=headers)
+    assert response.json() == [{"id": admin.id, "email": "admin@example.com", "rol": "ADMIN"}]
+
+    response = await async_client.get("/users/", headers=headers)
+    assert set(response.json()[0]) == {"id", "nombres", "apellidos", "dni", "fecha_nacimiento", "email", "rol"}
+
+    response = await async_client.get(f"/users/{admin.id}", params={"fields": "dni"}, headers=headers)
+    assert response.json() == {"id": admin.id, "dni": "12345670"}
+
+    response = await async_client.get(f"/users/{admin.id}", params={"fields": "password_hash"}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_read_users_fast_json_matches_default(async_client: AsyncClient, async_db, monkeypatch):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    await create_test_user_in_db(async_db, email="otro@example.com", dni="12345672", apellidos="Núñez")
+    headers = get_auth_header(admin.email)
+    requests = [
+        ("/users/", {}),
+        ("/users/", {"sort": "-apellidos", "limit": 1, "fields": "email"}),
+        (f"/users/{admin.id}", {"fields": "dni,fecha_nacimiento"}),
+    ]
+
+    expected = []
+    for url, params in requests:
+        response = await async_client.get(url, params=params, headers=headers)
+        expected.append((response.json(), response.headers.get("X-Next-Cursor")))
+
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    for (url, params), (body, next_cursor) in zip(requests, expected):
+        response = await async_client.get(url, params=params, headers=headers)
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == body
+        assert response.headers.get("X-Next-Cursor") == next_cursor
+
+@pytest.mark.asyncio
+async def test_read_users_invalid_cursor(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    response = await async_client.get("/users/", params={"cursor": "basura"}, headers=get_auth_header(admin.email))
+    assert response.status_code == 400
+    cursor = encode_cursor("created_at", None, 1)
+    response = await async_client.get("/users/", params={"sort": "created_at", "cursor": cursor}, headers=get_auth_header(admin.email))
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_read_user_etag_not_modified(async_client: AsyncClient, async_db):
+    user = await create_test_user_in_db(async_db)
+    headers = get_auth_header(user.email)
+    response = await async_client.get(f"/users/{user.id}", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await async_client.get(f"/users/{user.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    # Cada proyección tiene su propio ETag
+    response = await async_client.get(f"/users/{user.id}", params={"fields": "email"}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    await async_client.put(f"/users/{user.id}", json={"nombres": "Otro"}, headers=headers)
+    response = await async_client.get(f"/users/{user.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+@pytest.mark.asyncio
+async def test_read_users_etag_not_modified(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    headers = get_auth_header(admin.email)
+    response = await async_client.get("/users/", params={"limit": 10}, headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await async_client.get("/users/", params={"limit": 10}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    response = await async_client.get("/users/", params={"limit": 5}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    await create_test_user_in_db(async_db, email="nuevo@example.com", dni="40000400")
+    response = await async_client.get("/users/", params={"limit": 10}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+@pytest.mark.asyncio
+async def test_update_user_if_match(async_client: AsyncClient, async_db):
+    user = await create_test_user_in_db(async_db)
+    headers = get_auth_header(user.email)
+    etag = (await async_client.get(f"/users/{user.id}", headers=headers)).headers["ETag"]
+
+    response = await async_client.put(f"/users/{user.id}", json={"nombres": "Uno"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag
+
+    # Con el ETag viejo la escritura se rechaza y no pisa el cambio anterior
+    response = await async_client.put(f"/users/{user.id}", json={"nombres": "Dos"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+    response = await async_client.get(f"/users/{user.id}", headers=headers)
+    assert response.json()["nombres"] == "Uno"
+    assert response.headers["ETag"] == new_etag
+
+@pytest.mark.asyncio
+async def test_export_users_ndjson(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    await create_test_user_in_db(async_db, email="other@example.com", dni="12345671", apellidos="Gómez")
+    response = await async_client.get("/users/export", headers=get_auth_header(admin.email))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["email"] for row in rows] == ["admin@example.com", "other@example.com"]
+    assert rows[1]["apellidos"] == "Gómez"
+    assert rows[0]["rol"] == "ADMIN"
+    assert "password_hash" not in rows[0]
+
+@pytest.mark.asyncio
+async def test_export_users_csv(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    response = await async_client.get("/users/export?format=csv", headers=get_auth_header(admin.email))
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "id,nombres,apellidos,dni,fecha_nacimiento,email,rol"
+    assert lines[1].endswith(",1990-01-01,admin@example.com,ADMIN")
+
+    response = await async_client.get("/users/export?format=xml", headers=get_auth_header(admin.email))
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_export_users_forbidden_for_non_admin(async_client: AsyncClient, async_db):
+    user = await create_test_user_in_db(async_db)
+    response = await async_client.get("/users/export", headers=get_auth_header(user.email))
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+@patch("app.routers.user.send_welcome_emails", new_callable=AsyncMock)
+async def test_bulk_import_ndjson(mock_send_emails, async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    base = {"nombres": "Alu", "apellidos": "Mno", "fecha_nacimiento": "2005-03-01", "password": "Password123", "rol": "ALUMNO"}
+    lines = [
+        json.dumps({**base, "dni": "40000001", "email": "Alu1@example.com"}),
+        json.dumps({**base, "dni": "40000002", "email": "alu2@example.com", "password": "corta"}),
+        "{no es json",
+        json.dumps({**base, "dni": "40000003", "email": "alu1@example.com"}),
+        json.dumps({**base, "dni": "12345670", "email": "alu4@example.com"}),
+        json.dumps({**base, "dni": "40000005", "email": "alu5@example.com"}),
+        json.dumps({**base, "dni": "40000007", "email": 123}),
+    ]
+    response = await async_client.post("/users/bulk", content="\n".join(lines), headers=get_auth_header(admin.email))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["total"], report["created"], report["failed"]) == (7, 2, 5)
+    statuses = {r["row"]: (r["status"], r["detail"]) for r in report["results"]}
+    assert statuses[1] == ("created", None)
+    assert statuses[2][0] == "error"
+    assert statuses[3] == ("error", "JSON inválido")
+    assert statuses[4] == ("error", "Email repetido en el archivo.")
+    assert statuses[5] == ("error", "DNI ya registrado.")
+    assert statuses[6] == ("created", None)
+    assert statuses[7][0] == "error"
+    mock_send_emails.assert_awaited_once_with([("alu1@example.com", "Alu"), ("alu5@example.com", "Alu")])
+
+    response = await async_client.post("/auth/login", json={"email": "alu1@example.com", "password": "Password123"})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+@patch("app.routers.user.send_welcome_emails", new_callable=AsyncMock)
+async def test_bulk_import_csv(mock_send_emails, async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    content = (
+        "nombres,apellidos,dni,fecha_nacimiento,email,password,rol\n"
+        "Ana,Ruiz,40000011,2005-01-01,ana@example.com,Password123,ALUMNO\n"
+        "Luis,Paz,40000012,2005-01-01,admin@example.com,Password123,ALUMNO\n"
+    )
+    response = await async_client.post("/users/bulk?format=csv", content=content, headers=get_auth_header(admin.email))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["failed"]) == (1, 1)
+    assert report["results"][1]["detail"] == "Email ya registrado."
+
+@pytest.mark.asyncio
+@patch("app.routers.user.send_welcome_emails", new_callable=AsyncMock)
+async def test_bulk_import_csv_extra_columns(mock_send_emails, async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    content = (
+        "nombres,apellidos,dni,fecha_nacimiento,email,password,rol\n"
+        "Ana,Ruiz,40000011,2005-01-01,ana@example.com,Password123,ALUMNO,sobra\n"
+        "Luis,Paz,40000012,2005-01-01,luis@example.com,Password123,ALUMNO\n"
+    )
+    response = await async_client.post("/users/bulk?format=csv", content=content, headers=get_auth_header(admin.email))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["failed"]) == (1, 1)
+    assert report["results"][0]["status"] == "error"
+
+@pytest.mark.asyncio
+async def test_bulk_import_forbidden_for_non_admin(async_client: AsyncClient, async_db):
+    user = await create_test_user_in_db(async_db)
+    response = await async_client.post("/users/bulk", content="", headers=get_auth_header(user.email))
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_bulk_update_role(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    for i in range(3):
+        await create_test_user_in_db(async_db, email=f"alu{i}@example.com", dni=f"4000010{i}")
+    docente = await create_test_user_in_db(async_db, email="doc@example.com", dni="40000200", rol=UserRole.DOCENTE)
+    # El docente queda en cache antes del cambio
+    assert (await async_client.get("/users/", headers=get_auth_header(docente.email))).status_code == 200
+
+    body = {"filter": {"rol": "ALUMNO"}, "patch": {"rol": "INVITADO"}, "dry_run": True}
+    response = await async_client.patch("/users/bulk", json=body, headers=get_auth_header(admin.email))
+    assert response.json() == {"matched": 3, "affected": 0, "chunks": 0, "dry_run": True}
+
+    body = {"filter": {"rol": "ALUMNO"}, "patch": {"rol": "INVITADO"}}
+    response = await async_client.patch("/users/bulk", json=body, headers=get_auth_header(admin.email))
+    assert response.status_code == 200
+    assert response.json()["affected"] == 3
+
+    body = {"filter": {"ids": [admin.id, docente.id]}, "patch": {"rol": "ALUMNO"}}
+    response = await async_client.patch("/users/bulk", json=body, headers=get_auth_header(admin.email))
+    assert response.json()["affected"] == 1  # el admin que opera queda afuera
+    response = await async_client.get("/users/", headers=get_auth_header(admin.email))
+    roles = {u["email"]: u["rol"] for u in response.json()}
+    assert roles["admin@example.com"] == "ADMIN"
+    assert roles["doc@example.com"] == "ALUMNO"
+    assert roles["alu0@example.com"] == "INVITADO"
+
+    # El docente sale de la base, no de la cache
+    response = await async_client.get("/users/export", headers=get_auth_header(docente.email))
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_bulk_update_requires_filter_and_patch(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    response = await async_client.patch("/users/bulk", json={"filter": {}, "patch": {"rol": "INVITADO"}}, headers=get_auth_header(admin.email))
+    assert response.status_code == 400
+    response = await async_client.patch("/users/bulk", json={"filter": {"rol": "ALUMNO"}, "patch": {}}, headers=get_auth_header(admin.email))
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_bulk_delete(async_client: AsyncClient, async_db):
+    admin = await create_test_user_in_db(async_db, email="admin@example.com", dni="12345670", rol=UserRole.ADMIN)
+    for i in range(3):
+        await create_test_user_in_db(async_db, email=f"inv{i}@example.com", dni=f"4000030{i}", rol=UserRole.INVITADO)
+    body = {"filter": {"rol": "INVITADO"}, "dry_run": True}
+    response = await async_client.post("/users/bulk/delete", json=body, headers=get_auth_header(admin.email))
+    assert response.json()["matched"] == 3
+
+    response = await async_client.post("/users/bulk/delete", json={"filter": {"rol": "INVITADO"}}, headers=get_auth_header(admin.email))
+    assert response.json()["affected"] == 3
+    response = await async_client.get("/users/", headers=get_auth_header(admin.email))
+    assert [u["email"] for u in response.json()] == ["admin@example.com"]
+
+@pytest.mark.asyncio
+async def test_bulk_delete_forbidden_for_non_admin(async_client: AsyncClient, async_db):
+    user = await create_test_user_in_db(async_db)
+    response = await async_client.post("/users/bulk/delete", json={"filter": {"rol": "ALUMNO"}}, headers=get_auth_header(user.email))
+    assert response.status_code == 403
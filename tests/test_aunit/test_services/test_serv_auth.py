@@ -1,10 +1,17 @@
 # test_serv_auth.py
+import asyncio
 import pytest
-from datetime import datetime
-from app.services.auth import login_user, forgot_password_process, reset_password_process
+from datetime import date, datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.db.base import Base
+from app.crud.user import create_user, get_user_by_email
+from app.schemas.user import UserCreate, UserRole
+from app.services.auth import login_user, forgot_password_process, reset_password_process, MAX_ATTEMPTS
 from app.schemas.token import UserLogin, ForgotPasswordRequest, ResetPasswordRequest
 from app.core.security import create_password_reset_token, verify_password
 from unittest.mock import patch, ANY
+from passlib.hash import bcrypt
 from app.services.auth import forgot_password_process
 
 
@@ -36,6 +43,19 @@ async def test_login_user_locked_out(async_db, test_user):
         await login_user(login_data, async_db)
     assert "Demasiados intentos fallidos" in str(exc_info.value)
 
+@pytest.mark.asyncio
+async def test_login_user_rehashes_outdated_hash(async_db, test_user):
+    test_user.password_hash = bcrypt.using(rounds=4).hash("Password123")
+    async_db.add(test_user)
+    await async_db.commit()
+
+    login_data = UserLogin(email=test_user.email, password="Password123")
+    await login_user(login_data, async_db)
+
+    await async_db.refresh(test_user)
+    assert not test_user.password_hash.startswith("$2b$04$")
+    assert verify_password("Password123", test_user.password_hash)
+
 @pytest.mark.asyncio
 @patch("app.services.auth.send_reset_email")
 async def test_forgot_password_process(mock_send_email, async_db, test_user):
@@ -58,3 +78,53 @@ async def test_reset_password_process(async_db, test_user):
 
     await async_db.refresh(test_user)
     assert verify_password("new_secret", test_user.password_hash)
+
+@pytest.mark.asyncio
+async def test_login_lockout_expired_resets_counter(async_db, test_user):
+    test_user.failed_login_attempts = 3
+    test_user.last_failed_login = datetime.utcnow() - timedelta(hours=1)
+    await async_db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await login_user(UserLogin(email=test_user.email, password="wrong"), async_db)
+    assert exc_info.value.status_code == 401
+    await async_db.refresh(test_user)
+    assert test_user.failed_login_attempts == 1
+
+@pytest.mark.asyncio
+async def test_parallel_failed_logins_lock_out(tmp_path, monkeypatch):
+    from app.core.config import settings
+    # Sólo el contador de la base; el throttle en memoria se prueba aparte
+    monkeypatch.setattr(settings, "THROTTLE_ENABLED", False)
+    # Base en archivo: cada login con su propia conexión, como en producción
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'lockout.db'}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_maker() as db:
+        await create_user(db, UserCreate(
+            nombres="Lock", apellidos="Out", dni="70707070", fecha_nacimiento=date(1990, 1, 1),
+            email="lock@example.com", password="Password123", rol=UserRole.ALUMNO,
+        ))
+
+    async def wrong_password(plain, hashed):
+        await asyncio.sleep(0.01)
+        return False, None
+
+    async def attempt():
+        async with session_maker() as db:
+            try:
+                await login_user(UserLogin(email="lock@example.com", password="Wrong12345"), db)
+            except HTTPException as e:
+                return e.status_code
+
+    with patch("app.services.auth.verify_and_update_async", new=wrong_password):
+        codes = await asyncio.gather(*(attempt() for _ in range(100)))
+
+    async with session_maker() as db:
+        user = await get_user_by_email(db, "lock@example.com")
+    await engine.dispose()
+
+    assert user.failed_login_attempts == MAX_ATTEMPTS
+    assert codes.count(401) == MAX_ATTEMPTS
+    assert codes.count(403) == 100 - MAX_ATTEMPTS
@@ -4,10 +4,13 @@ import pytest
 from app.services.users import (
     get_user_by_email,
     create_user,
+    create_user_service,
     update_user_password,
     update_user_password_by_email
 )
+from app.services.bulk import import_users
 from app.schemas.user import UserCreate, UserRole
+from unittest.mock import AsyncMock, patch
 from app.core.security import verify_password
 
 @pytest.mark.asyncio
@@ -77,3 +80,88 @@ async def test_update_user_password_by_email(async_db, test_user):
     )
     await async_db.refresh(test_user)
     assert verify_password("new_secret", test_user.password_hash)
+
+@pytest.mark.asyncio
+async def test_update_password_statements(async_db, test_user, query_counter):
+    # Lectura para verificar la actual + UPDATE ... RETURNING + revocación, en un commit
+    query_counter.reset()
+    await update_user_password(async_db, test_user.id, "Password123", "NewSecret123")
+    assert [q.split()[0] for q in query_counter.statements] == ["SELECT", "UPDATE", "INSERT"]
+    assert "RETURNING" in query_counter.statements[1]
+
+    query_counter.reset()
+    user = await update_user_password_by_email(async_db, test_user.email, "OtherSecret123")
+    assert [q.split()[0] for q in query_counter.statements] == ["UPDATE", "INSERT"]
+    assert user.token_version == 2
+    assert user.last_password_change is not None
+    assert verify_password("OtherSecret123", user.password_hash)
+
+@pytest.mark.asyncio
+async def test_update_password_by_email_not_found(async_db):
+    from fastapi import HTTPException
+    with pytest.raises(HTTPException) as exc_info:
+        await update_user_password_by_email(async_db, "nadie@example.com", "OtherSecret123")
+    assert exc_info.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_import_users_retries_rows_on_conflict(async_db, test_user):
+    # Simula un alta concurrente entre el chequeo por lote y el insert
+    content = "\n".join([
+        '{"nombres": "A", "apellidos": "B", "dni": "40000021", "fecha_nacimiento": "2005-01-01", "email": "a@example.com", "password": "Password123", "rol": "ALUMNO"}',
+        '{"nombres": "C", "apellidos": "D", "dni": "' + test_user.dni + '", "fecha_nacimiento": "2005-01-01", "email": "c@example.com", "password": "Password123", "rol": "ALUMNO"}',
+    ])
+    with patch("app.services.bulk.get_existing_identities", new=AsyncMock(return_value=(set(), set()))):
+        report, created = await import_users(async_db, content, "ndjson")
+    assert [r.status for r in report.results] == ["created", "error"]
+    assert report.results[1].detail == "DNI ya registrado."
+    assert created == [("a@example.com", "A")]
+    assert await get_user_by_email(async_db, "a@example.com") is not None
+
+
+@pytest.mark.asyncio
+async def test_import_users_reports_rows_when_hashing_is_saturated(async_db):
+    from fastapi import HTTPException
+    from app.core.hashing import hash_many_async
+    row = '{"nombres": "A", "apellidos": "B", "dni": "4000003%d", "fecha_nacimiento": "2005-01-01", "email": "h%d@example.com", "password": "Password123", "rol": "ALUMNO"}'
+    content = "\n".join(row % (i, i) for i in range(2))
+    calls = 0
+
+    async def saturated_after_first(passwords):
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise HTTPException(status_code=503, detail="ocupado", headers={"Retry-After": "1"})
+        return await hash_many_async(passwords)
+
+    with patch("app.services.bulk.hash_many_async", new=saturated_after_first), \
+            patch("app.services.bulk.asyncio.sleep", new=AsyncMock()) as sleep:
+        report, created = await import_users(async_db, content, "ndjson", batch_size=1)
+    # El primer lote queda creado y el segundo figura como error, sin cortar el import
+    assert [r.status for r in report.results] == ["created", "error"]
+    assert created == [("h0@example.com", "A")]
+    assert sleep.await_count == 2
+
+@pytest.mark.asyncio
+async def test_create_user_service_single_statement(async_db, test_user, query_counter):
+    from fastapi import HTTPException
+    # El rollback tras el conflicto expira los objetos de la sesión
+    existing_email, existing_dni = test_user.email, test_user.dni
+    user_data = dict(
+        nombres="Nuevo",
+        apellidos="Usuario",
+        fecha_nacimiento=date(1990, 1, 1),
+        password="Password123",
+        rol=UserRole.ALUMNO,
+    )
+    query_counter.reset()
+    user = await create_user_service(async_db, UserCreate(dni="30303030", email="nuevo@example.com", **user_data))
+    assert user.id is not None and user.created_at is not None
+    assert query_counter.count == 1
+    assert query_counter.statements[0].startswith("INSERT INTO users")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await create_user_service(async_db, UserCreate(dni="30303031", email=existing_email.upper(), **user_data))
+    assert exc_info.value.detail == "Email already registered"
+    with pytest.raises(HTTPException) as exc_info:
+        await create_user_service(async_db, UserCreate(dni=existing_dni, email="otro@example.com", **user_data))
+    assert exc_info.value.detail == "DNI already registered"
@@ -90,3 +90,146 @@ async def test_reset_password_invalid_token(async_client: AsyncClient):
     response = await async_client.post("/auth/reset-password", json=payload)
     assert response.status_code == 400
     assert "Token inválido" in response.text or "expirado" in response.text.lower()
+
+
+@pytest.mark.asyncio
+async def test_stateless_auth_skips_user_lookup(async_client: AsyncClient, test_user: User, query_counter, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Primera lectura: carga el mapa de versiones
+    response = await async_client.get(f"/users/{test_user.id}", headers=headers)
+    assert response.status_code == 200
+
+    query_counter.reset()
+    response = await async_client.get(f"/users/{test_user.id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == test_user.email
+    # Sólo la consulta del endpoint; la autenticación no toca la base
+    assert query_counter.count == 1
+
+
+@pytest.mark.asyncio
+async def test_stateless_token_revoked_after_password_change(async_client: AsyncClient, test_user: User, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    response = await async_client.patch(f"/users/{test_user.id}/password", headers=headers, json={
+        "current_password": "Password123",
+        "new_password": "NewPassword123"
+    })
+    assert response.status_code == 204
+
+    response = await async_client.get(f"/users/{test_user.id}", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_issues_new_access_token(async_client: AsyncClient, test_user: User):
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    refresh_token = login.json()["refresh_token"]
+
+    with patch("app.services.auth.verify_and_update_async") as mock_verify:
+        response = await async_client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    mock_verify.assert_not_called()
+    assert response.status_code == 200
+    data = response.json()
+    assert data["user_id"] == test_user.id
+
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    response = await async_client.get(f"/users/{test_user.id}", headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_cannot_authenticate_requests(async_client: AsyncClient, test_user: User):
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    headers = {"Authorization": f"Bearer {login.json()['refresh_token']}"}
+    response = await async_client.get(f"/users/{test_user.id}", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_refresh_token(async_client: AsyncClient, test_user: User):
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    refresh_token = login.json()["refresh_token"]
+
+    response = await async_client.post("/auth/logout", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+
+    response = await async_client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_password_change_revokes_refresh_tokens(async_client: AsyncClient, test_user: User):
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    data = login.json()
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+    # Token emitido en un segundo anterior al cambio de contraseña
+    from app.core.security import create_refresh_token
+    with patch("app.core.security.time.time", return_value=datetime.utcnow().timestamp() - 5):
+        old_refresh = create_refresh_token({"sub": test_user.email, "user_id": test_user.id, "user_role": "ALUMNO"})
+
+    response = await async_client.patch(f"/users/{test_user.id}/password", headers=headers, json={
+        "current_password": "Password123",
+        "new_password": "NewPassword123"
+    })
+    assert response.status_code == 204
+
+    response = await async_client.post("/auth/refresh", json={"refresh_token": old_refresh})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stateless", [False, True])
+async def test_refresh_rejected_after_role_change(async_client: AsyncClient, async_db, test_user: User, monkeypatch, stateless):
+    from app.core.config import settings
+    from app.crud.user import update_user
+    from app.schemas.user import UserRole, UserUpdate
+    monkeypatch.setattr(settings, "AUTH_STATELESS", stateless)
+    await update_user(async_db, test_user.id, UserUpdate(rol=UserRole.ADMIN))
+
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    refresh_token = login.json()["refresh_token"]
+    assert login.json()["user_role"] == "ADMIN"
+
+    # Se lo degrada: el refresh con el rol viejo ya no emite tokens
+    await update_user(async_db, test_user.id, UserUpdate(rol=UserRole.ALUMNO))
+    response = await async_client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_not_signed_with_published_keys(async_client: AsyncClient, test_user: User):
+    login = await async_client.post("/auth/login", json={"email": test_user.email, "password": "Password123"})
+    refresh_token = login.json()["refresh_token"]
+    assert jwt.get_unverified_header(refresh_token)["alg"] == "HS256"
+    assert "kid" not in jwt.get_unverified_header(refresh_token)
+
+
+@pytest.mark.asyncio
+async def test_signup_and_login_read_from_primary(async_client: AsyncClient, monkeypatch):
+    # Sin bearer no hay sub del que colgar la escritura: se marca el email escrito
+    from app.db.session import read_router
+    monkeypatch.setattr(read_router, "replicas", [("replica-0", None)])
+    with patch("app.routers.user.send_welcome_email"):
+        response = await async_client.post("/users/", json={
+            "nombres": "Nueva", "apellidos": "Alta", "dni": "33444555", "fecha_nacimiento": "1990-01-01",
+            "email": "Nueva@Example.com", "password": "Password123", "rol": "ALUMNO",
+        })
+    assert response.status_code == 201
+    assert read_router.choose("nueva@example.com")[0] == "primary"
+
+    read_router.clear()
+    response = await async_client.post("/auth/login", json={"email": "NUEVA@example.com", "password": "Password123"})
+    assert response.status_code == 200
+    assert read_router.choose("nueva@example.com")[0] == "primary"
+    assert read_router.choose("otra@example.com")[0] == "replica-0"